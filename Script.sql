@@ -1,6 +1,10 @@
 CREATE DATABASE IF NOT EXISTS citas_medicas;
 USE citas_medicas;
 
+DROP TABLE IF EXISTS metadatos;
+DROP TABLE IF EXISTS citas_eliminadas;
+DROP TABLE IF EXISTS resumen_citas;
+DROP TABLE IF EXISTS horarios_medicos;
 DROP TABLE IF EXISTS citas;
 DROP TABLE IF EXISTS pacientes;
 DROP TABLE IF EXISTS medicos;
@@ -8,10 +12,12 @@ DROP TABLE IF EXISTS medicos;
 CREATE TABLE pacientes (
     id_paciente INT AUTO_INCREMENT PRIMARY KEY,
     nombre_completo VARCHAR(255) NOT NULL,
+    nombre_normalizado VARCHAR(255) DEFAULT NULL,
     telefono VARCHAR(20) DEFAULT NULL,
     email VARCHAR(255) DEFAULT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_pacientes_nombre_normalizado (nombre_normalizado),
     INDEX idx_nombre (nombre_completo)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -35,22 +41,68 @@ CREATE TABLE citas (
     estado VARCHAR(50) NOT NULL DEFAULT 'Programada',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    slot_medico_activo INT GENERATED ALWAYS AS (IF(estado = 'Cancelada', NULL, id_medico)) STORED,
+    slot_paciente_activo INT GENERATED ALWAYS AS (IF(estado = 'Cancelada', NULL, id_paciente)) STORED,
     FOREIGN KEY (id_paciente) REFERENCES pacientes(id_paciente) 
-        ON DELETE RESTRICT ON UPDATE CASCADE,
+        ON DELETE RESTRICT ON UPDATE RESTRICT,
     FOREIGN KEY (id_medico) REFERENCES medicos(id_medico) 
-        ON DELETE RESTRICT ON UPDATE CASCADE,
+        ON DELETE RESTRICT ON UPDATE RESTRICT,
+    UNIQUE KEY uq_slot_medico (fecha, hora, slot_medico_activo),
+    UNIQUE KEY uq_slot_paciente (fecha, hora, slot_paciente_activo),
     INDEX idx_fecha_hora_medico (fecha, hora, id_medico),
     INDEX idx_fecha_hora_paciente (fecha, hora, id_paciente),
+    INDEX idx_fecha_hora (fecha, hora),
     INDEX idx_estado (estado),
-    INDEX idx_fecha (fecha)
+    INDEX idx_fecha (fecha),
+    INDEX idx_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
-INSERT INTO pacientes (nombre_completo, telefono, email) VALUES
-('María López García', '555-1234', 'maria.lopez@email.com'),
-('Juan Pérez Martínez', '555-5678', 'juan.perez@email.com'),
-('Ana Rodríguez Sánchez', '555-9012', 'ana.rodriguez@email.com'),
-('Carlos González Torres', '555-3456', 'carlos.gonzalez@email.com'),
-('Laura Fernández Díaz', '555-7890', 'laura.fernandez@email.com');
+CREATE TABLE horarios_medicos (
+    id_horario INT AUTO_INCREMENT PRIMARY KEY,
+    id_medico INT NOT NULL,
+    dia_semana TINYINT NOT NULL,
+    hora_inicio TIME NOT NULL,
+    hora_fin TIME NOT NULL,
+    duracion_minutos SMALLINT NOT NULL DEFAULT 20,
+    FOREIGN KEY (id_medico) REFERENCES medicos(id_medico)
+        ON DELETE CASCADE ON UPDATE RESTRICT,
+    CHECK (dia_semana BETWEEN 0 AND 6),
+    CHECK (duracion_minutos > 0),
+    INDEX idx_horarios_medico_dia (id_medico, dia_semana)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE resumen_citas (
+    id_medico INT NOT NULL,
+    fecha DATE NOT NULL,
+    estado VARCHAR(50) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_medico, fecha, estado),
+    INDEX idx_resumen_fecha (fecha, id_medico)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE citas_eliminadas (
+    id_cita INT PRIMARY KEY,
+    id_paciente INT NOT NULL,
+    id_medico INT NOT NULL,
+    fecha DATE NOT NULL,
+    hora TIME NOT NULL,
+    estado VARCHAR(50) NOT NULL,
+    eliminado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_eliminado_en (eliminado_en)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE metadatos (
+    clave VARCHAR(64) PRIMARY KEY,
+    valor MEDIUMTEXT NOT NULL,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT INTO pacientes (nombre_completo, nombre_normalizado, telefono, email) VALUES
+('María López García', 'maria lopez garcia', '555-1234', 'maria.lopez@email.com'),
+('Juan Pérez Martínez', 'juan perez martinez', '555-5678', 'juan.perez@email.com'),
+('Ana Rodríguez Sánchez', 'ana rodriguez sanchez', '555-9012', 'ana.rodriguez@email.com'),
+('Carlos González Torres', 'carlos gonzalez torres', '555-3456', 'carlos.gonzalez@email.com'),
+('Laura Fernández Díaz', 'laura fernandez diaz', '555-7890', 'laura.fernandez@email.com');
 
 INSERT INTO medicos (nombre_completo, especialidad, telefono) VALUES
 ('Dr. Roberto Martínez', 'Cardiología', '555-1001'),
@@ -66,6 +118,9 @@ INSERT INTO citas (id_paciente, id_medico, fecha, hora, estado) VALUES
 (1, 4, '2024-12-22', '14:00', 'Programada'),
 (4, 5, '2024-12-20', '15:00', 'Completada');
 
+INSERT INTO resumen_citas (id_medico, fecha, estado, total)
+SELECT id_medico, fecha, estado, COUNT(*) FROM citas GROUP BY id_medico, fecha, estado;
+
 SELECT 'Base de datos creada exitosamente!' AS mensaje;
 SELECT COUNT(*) AS total_pacientes FROM pacientes;
 SELECT COUNT(*) AS total_medicos FROM medicos;
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.datos import DURACION_TURNO, HORA_INICIO, TURNOS_POR_DIA, generar_datos
+from benchmarks.medicion import resumir
+from model.cita_repository import CitaRepository
+from model.sqlite_config import SQLiteConfig
+
+MEZCLA = (('listar', 50), ('obtener', 25), ('crear', 15), ('cancelar', 10))
+INICIO_FUTURO = date(2090, 1, 1)
+
+
+class ClienteHTTP:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+    
+    async def _conectar(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+    
+    async def solicitar(self, metodo: str, ruta: str, cuerpo: Optional[dict] = None) -> Tuple[int, dict]:
+        if self._writer is None:
+            await self._conectar()
+        datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else b''
+        self._writer.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(datos)}\r\n\r\n".encode('latin-1') + datos
+        )
+        try:
+            await self._writer.drain()
+            encabezado = await self._reader.readuntil(b'\r\n\r\n')
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.cerrar()
+            raise
+        lineas = encabezado.decode('latin-1').split('\r\n')
+        estado = int(lineas[0].split(' ')[1])
+        cabeceras = {}
+        for linea in lineas[1:]:
+            nombre, _, valor = linea.partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        respuesta = await self._reader.readexactly(int(cabeceras.get('content-length', '0')))
+        if cabeceras.get('connection', '').lower() == 'close':
+            self.cerrar()
+        return estado, json.loads(respuesta) if respuesta else {}
+    
+    def cerrar(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+class Carga:
+    def __init__(self, host: str, port: int, clientes: int, duracion: float, semilla: int):
+        self.host = host
+        self.port = port
+        self.clientes = clientes
+        self.duracion = duracion
+        self.aleatorio = random.Random(semilla)
+        self.operaciones = [nombre for nombre, peso in MEZCLA for _ in range(peso)]
+        self.latencias: Dict[str, List[float]] = defaultdict(list)
+        self.estados: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.errores = 0
+        self.medicos: List[int] = []
+        self.pacientes: List[int] = []
+        self.citas: List[int] = []
+        self.creadas: List[int] = []
+    
+    async def preparar(self):
+        cliente = ClienteHTTP(self.host, self.port)
+        try:
+            _, medicos = await cliente.solicitar('GET', '/medicos')
+            _, pagina = await cliente.solicitar('GET', '/citas?limit=500')
+        finally:
+            cliente.cerrar()
+        self.medicos = [medico['id_medico'] for medico in medicos.get('medicos', [])]
+        self.pacientes = sorted({cita['id_paciente'] for cita in pagina.get('citas', [])})
+        self.citas = [cita['id_cita'] for cita in pagina.get('citas', [])]
+        if not self.medicos or not self.pacientes:
+            raise RuntimeError("El servidor no tiene médicos o citas para generar carga")
+    
+    def _solicitud(self, operacion: str) -> Tuple[str, str, Optional[dict]]:
+        aleatorio = self.aleatorio
+        if operacion == 'listar':
+            return 'GET', f"/citas?limit=50&offset={aleatorio.randrange(0, 1000, 50)}", None
+        if operacion == 'obtener':
+            return 'GET', f"/citas/{aleatorio.choice(self.citas)}", None
+        if operacion == 'crear':
+            minutos = HORA_INICIO + aleatorio.randrange(TURNOS_POR_DIA) * DURACION_TURNO
+            return 'POST', '/citas', {
+                'id_paciente': aleatorio.choice(self.pacientes),
+                'id_medico': aleatorio.choice(self.medicos),
+                'fecha': (INICIO_FUTURO + timedelta(days=aleatorio.randrange(3650))).isoformat(),
+                'hora': f"{minutos // 60:02d}:{minutos % 60:02d}",
+            }
+        id_cita = self.creadas.pop() if self.creadas else aleatorio.choice(self.citas)
+        return 'POST', f"/citas/{id_cita}/cancelar", None
+    
+    async def _cliente(self, limite: float):
+        cliente = ClienteHTTP(self.host, self.port)
+        try:
+            while time.perf_counter() < limite:
+                operacion = self.aleatorio.choice(self.operaciones)
+                metodo, ruta, cuerpo = self._solicitud(operacion)
+                inicio = time.perf_counter()
+                try:
+                    estado, respuesta = await cliente.solicitar(metodo, ruta, cuerpo)
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    self.errores += 1
+                    continue
+                self.latencias[operacion].append(time.perf_counter() - inicio)
+                self.estados[operacion][estado] += 1
+                if operacion == 'crear' and estado == 201:
+                    self.creadas.append(respuesta['cita']['id_cita'])
+        finally:
+            cliente.cerrar()
+    
+    async def ejecutar(self) -> dict:
+        await self.preparar()
+        inicio = time.perf_counter()
+        await asyncio.gather(*(self._cliente(inicio + self.duracion) for _ in range(self.clientes)))
+        total = time.perf_counter() - inicio
+        solicitudes = sum(len(latencias) for latencias in self.latencias.values())
+        todas = [latencia for latencias in self.latencias.values() for latencia in latencias]
+        return {
+            'clientes': self.clientes,
+            'duracion_s': total,
+            'solicitudes': solicitudes,
+            'solicitudes_por_s': solicitudes / total if total else 0.0,
+            'errores_conexion': self.errores,
+            'total': resumir(todas),
+            'operaciones': {operacion: dict(resumir(latencias),
+                                            estados={str(e): n for e, n in sorted(self.estados[operacion].items())})
+                            for operacion, latencias in sorted(self.latencias.items())},
+        }
+
+
+def _descartar(flujo):
+    for _ in flujo:
+        pass
+
+
+def iniciar_servidor_local(directorio: str, citas: int, concurrencia: int, port: int) -> subprocess.Popen:
+    ruta = os.path.join(directorio, 'carga.db')
+    repository = CitaRepository(SQLiteConfig(ruta, seed=False))
+    try:
+        medicos = max(5, citas // 500)
+        generar_datos(repository.db_config, medicos=medicos, pacientes=max(medicos * 4, citas // 10), citas=citas)
+    finally:
+        repository.close()
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(raiz, 'server.py'), '--backend', 'sqlite', '--sqlite', ruta,
+         '--port', str(port), '--concurrencia', str(concurrencia)],
+        cwd=raiz, stdout=subprocess.PIPE, text=True, env=dict(os.environ, PYTHONUNBUFFERED='1')
+    )
+    for linea in proceso.stdout:
+        if 'escuchando' in linea:
+            threading.Thread(target=_descartar, args=(proceso.stdout,), daemon=True).start()
+            return proceso
+    raise RuntimeError(f"El servidor terminó antes de escuchar (código {proceso.wait()})")
+
+
+def imprimir(resultado: dict):
+    print(f"{resultado['solicitudes']} solicitudes en {resultado['duracion_s']:.1f} s con {resultado['clientes']} "
+          f"clientes: {resultado['solicitudes_por_s']:.0f} sol/s ({resultado['errores_conexion']} errores de conexión)")
+    print(f"{'operación':<10} {'n':>7} {'p50 (ms)':>9} {'p95 (ms)':>9} {'máx (ms)':>9}  estados")
+    for operacion, medida in resultado['operaciones'].items():
+        estados = ', '.join(f"{estado}×{n}" for estado, n in medida['estados'].items())
+        print(f"{operacion:<10} {medida['n']:>7} {medida['p50_us'] / 1000:>9.2f} {medida['p95_us'] / 1000:>9.2f} "
+              f"{medida['max_us'] / 1000:>9.2f}  {estados}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera carga HTTP concurrente contra server.py")
+    parser.add_argument('--url', default='http://127.0.0.1:8080', help="URL base del servidor")
+    parser.add_argument('--clientes', type=int, default=32, help="Clientes concurrentes con conexión persistente")
+    parser.add_argument('--duracion', type=float, default=10.0, help="Segundos de carga")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla de la mezcla de operaciones")
+    parser.add_argument('--local', action='store_true',
+                        help="Levanta server.py sobre una base SQLite temporal con datos sintéticos")
+    parser.add_argument('--citas', type=int, default=10000, help="Citas sintéticas para --local")
+    parser.add_argument('--concurrencia', type=int, default=8, help="Concurrencia del servidor con --local")
+    parser.add_argument('--salida', help="Archivo JSON de resultados")
+    args = parser.parse_args(argv)
+    
+    partes = urlsplit(args.url)
+    host, port = partes.hostname or '127.0.0.1', partes.port or 80
+    with tempfile.TemporaryDirectory() as directorio:
+        proceso = None
+        if args.local:
+            print(f"Generando {args.citas} citas y levantando el servidor en el puerto {port}...")
+            proceso = iniciar_servidor_local(directorio, args.citas, args.concurrencia, port)
+        try:
+            resultado = asyncio.run(Carga(host, port, args.clientes, args.duracion, args.semilla).ejecutar())
+        finally:
+            if proceso is not None:
+                proceso.terminate()
+                proceso.wait(10)
+    
+    imprimir(resultado)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+        print(f"✓ Resultados guardados en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,182 @@
+import argparse
+import random
+from datetime import date, timedelta
+from typing import List, Set
+
+from cli import crear_db_config
+from model.cita import Cita
+from model.cita_repository import CitaRepository, INSERT_CITA
+from model.database_backend import DatabaseBackend
+from model.paciente import normalizar_nombre
+from model.resumen_citas import ResumenCitas
+
+NOMBRES = ['María', 'Juan', 'Ana', 'Carlos', 'Laura', 'José', 'Lucía', 'Miguel', 'Elena', 'Jorge',
+           'Sofía', 'Pedro', 'Carmen', 'Luis', 'Paula', 'Diego', 'Marta', 'Andrés', 'Rosa', 'Pablo']
+APELLIDOS = ['López', 'Pérez', 'Rodríguez', 'González', 'Fernández', 'Martínez', 'Sánchez', 'Gómez',
+             'Díaz', 'Torres', 'Ruiz', 'Ramírez', 'Flores', 'Romero', 'Morales', 'Ortiz', 'Castro',
+             'Vargas', 'Herrera', 'Medina']
+ESPECIALIDADES = ['Cardiología', 'Pediatría', 'Medicina General', 'Ginecología', 'Dermatología',
+                  'Traumatología', 'Neurología', 'Oftalmología']
+
+HORA_INICIO = 8 * 60
+DURACION_TURNO = 20
+TURNOS_POR_DIA = 18
+OCUPACION = 0.7
+
+
+def _nombres_unicos(aleatorio: random.Random, cantidad: int, existentes: Set[str],
+                    prefijo: str = '') -> List[str]:
+    vistos = set(existentes)
+    nombres = []
+    while len(nombres) < cantidad:
+        base = f"{prefijo}{aleatorio.choice(NOMBRES)} {aleatorio.choice(APELLIDOS)} {aleatorio.choice(APELLIDOS)}"
+        nombre = base
+        sufijo = len(nombres) + 1
+        while normalizar_nombre(nombre) in vistos:
+            nombre = f"{base} {sufijo}"
+            sufijo += cantidad
+        vistos.add(normalizar_nombre(nombre))
+        nombres.append(nombre)
+    return nombres
+
+
+def _nombres_existentes(db_config: DatabaseBackend, tabla: str) -> Set[str]:
+    filas = db_config.execute_query(f"SELECT nombre_completo FROM {tabla}", dictionary=False)
+    return {normalizar_nombre(fila[0]) for fila in filas}
+
+
+def _estado(aleatorio: random.Random, pasada: bool) -> str:
+    tirada = aleatorio.random()
+    if pasada:
+        return 'Completada' if tirada < 0.80 else 'Cancelada' if tirada < 0.92 else 'Programada'
+    return 'Programada' if tirada < 0.90 else 'Cancelada'
+
+
+def _insertar_referencias(db_config: DatabaseBackend, tabla: str, id_campo: str, columnas: List[str],
+                          filas: List[tuple]) -> List[int]:
+    marcadores = ', '.join(['%s'] * len(columnas))
+    query = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})"
+    with db_config.transaction() as (connection, cursor):
+        cursor.execute(f"SELECT COALESCE(MAX({id_campo}), 0) FROM {tabla}")
+        ultimo = cursor.fetchall()[0][0]
+        cursor.executemany(query, filas)
+        cursor.execute(f"SELECT {id_campo} FROM {tabla} WHERE {id_campo} > %s ORDER BY {id_campo}", (ultimo,))
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def generar_datos(db_config: DatabaseBackend, medicos: int = 20, pacientes: int = 1000,
+                  citas: int = 10000, semilla: int = 42, colisiones: float = 0.05,
+                  desde: date = date(2030, 1, 7), lote: int = 5000) -> dict:
+    aleatorio = random.Random(semilla)
+    
+    ids_medicos = _insertar_referencias(
+        db_config, 'medicos', 'id_medico', ['nombre_completo', 'especialidad', 'telefono'],
+        [(nombre, ESPECIALIDADES[i % len(ESPECIALIDADES)], f"555-{2000 + i:04d}")
+         for i, nombre in enumerate(_nombres_unicos(aleatorio, medicos, _nombres_existentes(db_config, 'medicos'),
+                                                    'Dr. '))]
+    )
+    columnas = ['nombre_completo', 'telefono', 'email']
+    normalizado = 'nombre_normalizado' in db_config.get_columns('pacientes')
+    if normalizado:
+        columnas.append('nombre_normalizado')
+    filas = []
+    for i, nombre in enumerate(_nombres_unicos(aleatorio, pacientes, _nombres_existentes(db_config, 'pacientes'))):
+        fila = (nombre, f"555-{i % 10000:04d}", f"paciente{i}@email.com")
+        filas.append(fila + (normalizar_nombre(nombre),) if normalizado else fila)
+    ids_pacientes = _insertar_referencias(db_config, 'pacientes', 'id_paciente', columnas, filas)
+    
+    dias_habiles = max(1, -(-citas // max(1, int(len(ids_medicos) * TURNOS_POR_DIA * OCUPACION))))
+    hoy = desde + timedelta(days=dias_habiles * 7 // 10)
+    generadas = 0
+    colisionadas = 0
+    pendientes = []
+    dia = desde
+    with db_config.transaction() as (connection, cursor):
+        while generadas < citas:
+            if dia.weekday() < 5:
+                for turno in range(TURNOS_POR_DIA):
+                    minutos = HORA_INICIO + turno * DURACION_TURNO
+                    hora = f"{minutos // 60:02d}:{minutos % 60:02d}"
+                    ocupados = set()
+                    for id_medico in ids_medicos:
+                        if generadas >= citas or aleatorio.random() >= OCUPACION:
+                            continue
+                        id_paciente = aleatorio.choice(ids_pacientes)
+                        if id_paciente in ocupados:
+                            continue
+                        ocupados.add(id_paciente)
+                        fecha = dia.isoformat()
+                        if aleatorio.random() < colisiones and generadas + 1 < citas:
+                            otro = aleatorio.choice(ids_pacientes)
+                            pendientes.append((otro, id_medico, fecha, hora, 'Cancelada'))
+                            generadas += 1
+                            colisionadas += 1
+                        pendientes.append((id_paciente, id_medico, fecha, hora, _estado(aleatorio, dia < hoy)))
+                        generadas += 1
+                    if len(pendientes) >= lote:
+                        cursor.executemany(INSERT_CITA, pendientes)
+                        pendientes = []
+            dia += timedelta(days=1)
+        if pendientes:
+            cursor.executemany(INSERT_CITA, pendientes)
+    
+    resumen = ResumenCitas(db_config)
+    if resumen.disponible:
+        resumen.reconstruir()
+    
+    return {
+        'medicos': len(ids_medicos),
+        'pacientes': len(ids_pacientes),
+        'citas': generadas,
+        'colisiones': colisionadas,
+        'desde': desde.isoformat(),
+        'hasta': (dia - timedelta(days=1)).isoformat(),
+        'hoy': hoy.isoformat(),
+        'ids_medicos': ids_medicos,
+        'ids_pacientes': ids_pacientes,
+    }
+
+
+def citas_libres(datos: dict, cantidad: int, semilla: int = 7) -> List[Cita]:
+    aleatorio = random.Random(semilla)
+    inicio = date.fromisoformat(datos['hasta']) + timedelta(days=1)
+    nuevas = []
+    for i in range(cantidad):
+        dia, resto = divmod(i, TURNOS_POR_DIA * len(datos['ids_medicos']))
+        turno, posicion = divmod(resto, len(datos['ids_medicos']))
+        minutos = HORA_INICIO + turno * DURACION_TURNO
+        nuevas.append(Cita(
+            datos['ids_pacientes'][(i + dia) % len(datos['ids_pacientes'])],
+            datos['ids_medicos'][posicion],
+            (inicio + timedelta(days=dia)).isoformat(),
+            f"{minutos // 60:02d}:{minutos % 60:02d}"
+        ))
+    aleatorio.shuffle(nuevas)
+    return nuevas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de médicos, pacientes y citas")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="Motor de base de datos (por defecto DB_BACKEND)")
+    parser.add_argument('--sqlite', help="Ruta de la base SQLite (por defecto DB_SQLITE_PATH)")
+    parser.add_argument('--medicos', type=int, default=20, help="Cantidad de médicos")
+    parser.add_argument('--pacientes', type=int, default=1000, help="Cantidad de pacientes")
+    parser.add_argument('--citas', type=int, default=10000, help="Cantidad de citas")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla del generador aleatorio")
+    parser.add_argument('--colisiones', type=float, default=0.05,
+                        help="Proporción de turnos con una cita cancelada y reagendada")
+    args = parser.parse_args(argv)
+    
+    repository = CitaRepository(crear_db_config(args.backend, args.sqlite))
+    try:
+        datos = generar_datos(repository.db_config, args.medicos, args.pacientes, args.citas,
+                              args.semilla, args.colisiones)
+    finally:
+        repository.close()
+    print(f"✓ {datos['medicos']} médicos, {datos['pacientes']} pacientes y {datos['citas']} citas generadas "
+          f"({datos['colisiones']} colisiones) del {datos['desde']} al {datos['hasta']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.datos import generar_datos
+from model.cita import Cita
+from model.cita_repository import CitaRepository, SELECT_CITAS
+from model.sqlite_config import SQLiteConfig
+
+QUERY = f"""
+{SELECT_CITAS}
+ORDER BY c.fecha, c.hora, c.id_cita
+"""
+
+
+def decodificar_diccionarios(repository: CitaRepository) -> list:
+    return [Cita.from_dict(row) for row in repository.db_config.execute_query(QUERY)]
+
+
+def decodificar_tuplas(repository: CitaRepository) -> list:
+    return repository.get_all()
+
+
+def medir(funcion, repository: CitaRepository, repeticiones: int):
+    mejor = None
+    filas = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        filas = len(funcion(repository))
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return filas, mejor
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara la decodificación de citas por diccionario y por tupla")
+    parser.add_argument('--filas', type=int, default=100000, help="Citas a generar")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones por método (se toma la mejor)")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        db_config = SQLiteConfig(os.path.join(directorio, 'benchmark.db'), seed=False)
+        repository = CitaRepository(db_config)
+        try:
+            generar_datos(db_config, medicos=50, pacientes=5000, citas=args.filas)
+            resultados = {}
+            for nombre, funcion in (('diccionario + from_dict', decodificar_diccionarios),
+                                    ('tupla + decodificador', decodificar_tuplas)):
+                filas, duracion = medir(funcion, repository, args.repeticiones)
+                resultados[nombre] = duracion
+                print(f"{nombre:<24} {filas:>8} filas  {duracion:8.3f} s  {filas / duracion:>12,.0f} filas/s")
+            base, rapido = resultados.values()
+            print(f"Mejora: {base / rapido:.2f}x")
+        finally:
+            repository.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
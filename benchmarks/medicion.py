@@ -0,0 +1,49 @@
+import statistics
+import time
+from typing import Callable, Iterable, List
+
+from model.query_instrumentation import query_scope
+
+
+def resumir(latencias: List[float]) -> dict:
+    latencias = sorted(latencias)
+    total = sum(latencias)
+    n = len(latencias)
+    if not n:
+        return {'n': 0, 'total_s': 0.0}
+    return {
+        'n': n,
+        'total_s': total,
+        'media_us': statistics.fmean(latencias) * 1e6,
+        'p50_us': latencias[(n - 1) // 2] * 1e6,
+        'p95_us': latencias[max(0, int(n * 0.95) - 1)] * 1e6,
+        'max_us': latencias[-1] * 1e6,
+        'ops_por_s': n / total if total else 0.0,
+    }
+
+
+def medir(operacion: Callable, argumentos: Iterable) -> dict:
+    latencias = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        operacion(argumento)
+        latencias.append(time.perf_counter() - inicio)
+    return resumir(latencias)
+
+
+def medir_total(operacion: Callable, n: int) -> dict:
+    inicio = time.perf_counter()
+    operacion()
+    total = time.perf_counter() - inicio
+    return {
+        'n': n,
+        'total_s': total,
+        'media_us': total / n * 1e6 if n else 0.0,
+        'ops_por_s': n / total if total else 0.0,
+    }
+
+
+def contar_viajes(operacion: Callable, argumento) -> dict:
+    with query_scope() as ambito:
+        operacion(argumento)
+    return {'viajes': ambito.round_trips, 'repetidas': ambito.repeated()}
@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import shutil
+import tempfile
+
+from benchmarks.datos import citas_libres, generar_datos
+from benchmarks.medicion import medir
+from cli import crear_db_config
+from model.cita_repository import CitaRepository
+
+
+def ejecutar(db_config, repeticiones: int, datos: dict = None) -> dict:
+    repository = CitaRepository(db_config)
+    try:
+        ids = [cita.id_cita for cita in repository.get_page(limit=1000)]
+        muestra = repository.get_by_id(ids[0])
+        resultados = {
+            'get_by_id': medir(repository.get_by_id, [random.choice(ids) for _ in range(repeticiones)]),
+            'conflictos': medir(lambda _: repository._buscar_conflicto(muestra, excluir_id=muestra.id_cita),
+                                range(repeticiones)),
+        }
+        if datos is not None:
+            nuevas = citas_libres(datos, repeticiones)
+            resultados['insertar'] = medir(repository.add, nuevas)
+            resultados['actualizar'] = medir(lambda c: repository.update(c.id_cita, c), nuevas)
+        resultados['cache'] = db_config.statement_stats()
+        return resultados
+    finally:
+        repository.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara la latencia con y sin sentencias preparadas")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], default='sqlite',
+                        help="Motor de base de datos (MySQL usa la configuración DB_* y solo mide lecturas)")
+    parser.add_argument('--filas', type=int, default=20000, help="Citas a generar en la base SQLite temporal")
+    parser.add_argument('--repeticiones', type=int, default=2000, help="Ejecuciones por operación")
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, 'benchmark.db')
+        datos = None
+        if args.backend == 'sqlite':
+            repository = CitaRepository(crear_db_config('sqlite', ruta, prepared=False))
+            datos = generar_datos(repository.db_config, medicos=20, pacientes=2000, citas=args.filas)
+            repository.close()
+        resultados = {}
+        for preparadas in (False, True):
+            copia = os.path.join(directorio, f"benchmark_{int(preparadas)}.db")
+            if datos is not None:
+                shutil.copyfile(ruta, copia)
+            db_config = crear_db_config(args.backend, copia, prepared=preparadas)
+            resultados[preparadas] = ejecutar(db_config, args.repeticiones, datos)
+    
+    sin, con = resultados[False], resultados[True]
+    print(f"{'operación':<12} {'sin (µs)':>10} {'con (µs)':>10} {'p95 sin':>10} {'p95 con':>10} {'mejora':>8}")
+    for operacion in sin:
+        if operacion == 'cache':
+            continue
+        base, preparada = sin[operacion], con[operacion]
+        print(f"{operacion:<12} {base['media_us']:>10.1f} {preparada['media_us']:>10.1f} "
+              f"{base['p95_us']:>10.1f} {preparada['p95_us']:>10.1f} "
+              f"{base['media_us'] / preparada['media_us']:>7.2f}x")
+    print(f"Caché de sentencias: {con['cache']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Optional
+
+from benchmarks.datos import ESPECIALIDADES, citas_libres, generar_datos
+from benchmarks.medicion import contar_viajes, medir, medir_total
+from model.cita import Cita
+from model.cita_batch import CitaBatch
+from model.cita_repository import CitaRepository, SELECT_CITAS
+from model.medico_repository import MedicoRepository
+from model.paciente_repository import PacienteRepository
+from model.sqlite_config import SQLiteConfig
+from viewmodel.cita_viewmodel import CitaViewModel
+
+ESCALAS = (1000, 10000, 50000)
+
+
+class ArbolSimulado:
+    def __init__(self):
+        self.filas = {}
+    
+    def get_children(self, item: str = ''):
+        return tuple(self.filas)
+    
+    def delete(self, *items):
+        for item in items:
+            del self.filas[item]
+    
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.filas[iid] = values
+        return iid
+    
+    def selection(self):
+        return ()
+
+
+def vista_sin_interfaz(viewmodel: CitaViewModel):
+    try:
+        from view.cita_view import CitaView
+    except ImportError:
+        return None
+    vista = CitaView.__new__(CitaView)
+    vista.viewmodel = viewmodel
+    vista.tree = ArbolSimulado()
+    vista.cita_seleccionada = None
+    vista._lista_virtual = None
+    vista._lote = CitaBatch()
+    vista._cambios = {}
+    vista._orden = []
+    vista._cargando = False
+    vista._al_cargar = None
+    return vista
+
+
+def version_codigo() -> Optional[str]:
+    try:
+        resultado = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return resultado.stdout.strip() or None
+
+
+def medir_escala(directorio: str, escala: int, operaciones: int, repeticiones: int, semilla: int) -> dict:
+    db_config = SQLiteConfig(os.path.join(directorio, f"escala_{escala}.db"), seed=False)
+    repository = CitaRepository(db_config)
+    try:
+        medicos = max(5, escala // 500)
+        datos = generar_datos(db_config, medicos=medicos, pacientes=max(medicos * 4, escala // 10),
+                              citas=escala, semilla=semilla)
+        repository.enable_slot_index()
+        viewmodel = CitaViewModel(repository, PacienteRepository(db_config), MedicoRepository(db_config))
+        aleatorio = random.Random(semilla)
+        resultados = {}
+        
+        resultados['repository.get_all'] = medir(lambda _: repository.get_all(), range(repeticiones))
+        ids = [fila[0] for fila in db_config.execute_query("SELECT id_cita FROM citas", dictionary=False)]
+        resultados['repository.get_by_id'] = medir(repository.get_by_id,
+                                                   [aleatorio.choice(ids) for _ in range(operaciones)])
+        
+        libres = citas_libres(datos, operaciones * 2 + 1, semilla)
+        nuevas, para_viewmodel, muestra = libres[:operaciones], libres[operaciones:-1], libres[-1]
+        resultados['repository.add'] = medir(repository.add, nuevas)
+        completadas = [Cita(c.id_paciente, c.id_medico, c.fecha, c.hora, 'Completada', c.id_cita) for c in nuevas]
+        resultados['repository.update'] = medir(lambda c: repository.update(c.id_cita, c), completadas)
+        resultados['repository.cancel'] = medir(repository.cancel, [c.id_cita for c in nuevas])
+        resultados['repository.delete'] = medir(repository.delete, [c.id_cita for c in nuevas])
+        resultados['viewmodel.agregar_cita'] = medir(
+            lambda c: viewmodel.agregar_cita(c.id_paciente, c.id_medico, c.fecha, c.hora), para_viewmodel
+        )
+        
+        resultados['viewmodel.buscar_huecos_especialidad'] = medir(
+            lambda especialidad: viewmodel.buscar_huecos_especialidad(especialidad, datos['desde'], datos['hasta']),
+            [aleatorio.choice(ESPECIALIDADES) for _ in range(operaciones)]
+        )
+        
+        viajes = {
+            'repository.add': contar_viajes(repository.add, muestra),
+            'repository.update': contar_viajes(lambda c: repository.update(c.id_cita, c), muestra),
+            'repository.cancel': contar_viajes(repository.cancel, muestra.id_cita),
+            'repository.delete': contar_viajes(repository.delete, muestra.id_cita),
+            'repository.get_by_id': contar_viajes(repository.get_by_id, aleatorio.choice(ids)),
+        }
+        
+        filas = db_config.execute_query(SELECT_CITAS)
+        resultados['cita.from_dict'] = medir_total(lambda: [Cita.from_dict(fila) for fila in filas], len(filas))
+        
+        vista = vista_sin_interfaz(viewmodel)
+        if vista is not None:
+            resultados['view._cargar_citas'] = medir(lambda _: vista._cargar_citas(), range(repeticiones))
+            resultados['view._cargar_citas']['filas'] = len(vista.tree.filas)
+        
+        datos = {clave: valor for clave, valor in datos.items() if not clave.startswith('ids_')}
+        return {'datos': datos, 'operaciones': resultados, 'viajes': viajes}
+    finally:
+        repository.close()
+
+
+def comparar(actual: dict, anterior: dict, umbral: float) -> int:
+    regresiones = 0
+    print(f"{'escala':>8} {'operación':<26} {'antes (µs)':>12} {'ahora (µs)':>12} {'cambio':>8}")
+    for escala, resultado in actual['escalas'].items():
+        previas = anterior.get('escalas', {}).get(escala, {}).get('operaciones', {})
+        for operacion, medida in resultado['operaciones'].items():
+            previa = previas.get(operacion)
+            if not previa or not previa.get('media_us'):
+                continue
+            cambio = medida['media_us'] / previa['media_us']
+            marca = " ⚠ regresión" if cambio > umbral else ""
+            regresiones += bool(marca)
+            print(f"{escala:>8} {operacion:<26} {previa['media_us']:>12.1f} {medida['media_us']:>12.1f} "
+                  f"{cambio:>7.2f}x{marca}")
+    return regresiones
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mide repositorio, viewmodel y vista a varias escalas sobre SQLite")
+    parser.add_argument('--escalas', type=int, nargs='+', default=list(ESCALAS), help="Cantidad de citas por escala")
+    parser.add_argument('--operaciones', type=int, default=200, help="Operaciones individuales por medición")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Repeticiones de las lecturas completas")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla de los datos sintéticos")
+    parser.add_argument('--salida', default='benchmark.json', help="Archivo JSON de resultados")
+    parser.add_argument('--comparar', help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument('--umbral', type=float, default=1.2, help="Cambio relativo que se considera regresión")
+    args = parser.parse_args(argv)
+    
+    resultado = {
+        'version': version_codigo(),
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semilla': args.semilla,
+        'escalas': {},
+    }
+    with tempfile.TemporaryDirectory() as directorio:
+        for escala in args.escalas:
+            print(f"Midiendo escala de {escala} citas...")
+            resultado['escalas'][str(escala)] = medir_escala(directorio, escala, args.operaciones,
+                                                             args.repeticiones, args.semilla)
+    
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+    print(f"✓ Resultados guardados en {args.salida}")
+    
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+        return 1 if comparar(resultado, anterior, args.umbral) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
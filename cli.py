@@ -0,0 +1,387 @@
+import argparse
+import csv
+import json
+import sys
+from contextlib import redirect_stdout
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from model.cita import Cita
+from model.cita_export import FORMATOS, exportar_citas
+from model.cita_repository import CitaRepository
+from model.config import (DB_HOST, DB_DATABASE, DB_USER, DB_PASSWORD, DB_PORT,
+                          DB_BACKEND, DB_SQLITE_PATH, DB_PREPARED, DB_PREPARED_CACHE,
+                          DB_SLOW_QUERY_MS)
+from model.database_backend import DatabaseBackend, SCHEMA_TABLE, SCHEMA_VERSION
+from model.database_config import DatabaseConfig
+from model.disponibilidad import BuscadorHuecos
+from model.horario import DIAS_SEMANA, HORARIO_PREDETERMINADO, HorarioMedico
+from model.horario_repository import HorarioRepository
+from model.paciente import normalizar_nombre
+from model.query_instrumentation import SlowQueryLog
+from model.reference_cache import CachedMedicoRepository, CachedPacienteRepository
+from model.sqlite_config import SQLiteConfig
+from viewmodel.cita_viewmodel import CitaViewModel
+
+MOTIVOS = {
+    'registro_invalido': "Registro mal formado",
+    'datos_invalidos': "Identificadores de paciente o médico inválidos",
+    'estado_invalido': "Estado inválido",
+    'fecha_invalida': "Formato de fecha inválido. Use YYYY-MM-DD",
+    'hora_invalida': "Formato de hora inválido. Use HH:MM",
+    'paciente_inexistente': "El paciente no existe",
+    'medico_inexistente': "El médico no existe",
+    'medico_ocupado': "El médico ya tiene una cita programada a esa fecha y hora",
+    'paciente_ocupado': "El paciente ya tiene una cita programada a esa fecha y hora",
+    'error': "Error de base de datos",
+}
+
+
+def crear_db_config(backend: Optional[str] = None, sqlite_path: Optional[str] = None,
+                    prepared: bool = DB_PREPARED, pool_size: int = 0) -> DatabaseBackend:
+    if (backend or DB_BACKEND) == 'sqlite':
+        db_config = SQLiteConfig(sqlite_path or DB_SQLITE_PATH, pool_size=pool_size, prepared_statements=prepared,
+                                 statement_cache_size=DB_PREPARED_CACHE)
+    else:
+        db_config = DatabaseConfig(
+            host=DB_HOST,
+            database=DB_DATABASE,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            port=DB_PORT,
+            pool_size=pool_size,
+            prepared_statements=prepared,
+            statement_cache_size=DB_PREPARED_CACHE
+        )
+    if DB_SLOW_QUERY_MS > 0:
+        db_config.add_query_hook(SlowQueryLog(DB_SLOW_QUERY_MS, output=lambda mensaje: print(mensaje, file=sys.stderr)))
+    return db_config
+
+
+def leer_registros(ruta: str, formato: Optional[str] = None) -> Iterator[Optional[dict]]:
+    if formato is None:
+        formato = 'jsonl' if ruta.lower().endswith(('.jsonl', '.json')) else 'csv'
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        if formato == 'jsonl':
+            for linea in archivo:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    registro = None
+                yield registro if isinstance(registro, dict) else None
+        else:
+            yield from csv.DictReader(archivo)
+
+
+def _valor(registro: dict, *claves: str) -> str:
+    for clave in claves:
+        valor = registro.get(clave)
+        if valor not in (None, ''):
+            return str(valor).strip()
+    return ''
+
+
+def construir_cita(registro: Optional[dict],
+                   medicos: Dict[str, int],
+                   paciente_repo: CachedPacienteRepository,
+                   crear_pacientes: bool) -> Tuple[Optional[Cita], Optional[str]]:
+    if registro is None:
+        return None, 'registro_invalido'
+    
+    estado = _valor(registro, 'estado') or 'Programada'
+    if estado not in Cita.ESTADOS:
+        return None, 'estado_invalido'
+    
+    id_medico = _valor(registro, 'id_medico')
+    if not id_medico:
+        id_medico = medicos.get(normalizar_nombre(_valor(registro, 'medico', 'nombre_medico')))
+        if not id_medico:
+            return None, 'medico_inexistente'
+    
+    id_paciente = _valor(registro, 'id_paciente')
+    if not id_paciente:
+        nombre = _valor(registro, 'paciente', 'nombre_paciente')
+        if not nombre:
+            return None, 'paciente_inexistente'
+        if crear_pacientes:
+            paciente = paciente_repo.get_or_create(nombre)
+        else:
+            paciente = paciente_repo.find_by_nombre(nombre)
+        if not paciente:
+            return None, 'paciente_inexistente'
+        id_paciente = paciente.id_paciente
+    
+    cita = Cita(id_paciente, id_medico, _valor(registro, 'fecha'), _valor(registro, 'hora'), estado)
+    return cita, None
+
+
+def importar(args) -> int:
+    db_config = crear_db_config(args.backend, args.sqlite)
+    repository = CitaRepository(db_config)
+    paciente_repo = CachedPacienteRepository(db_config)
+    medico_repo = CachedMedicoRepository(db_config)
+    medicos = {normalizar_nombre(m.nombre_completo): m.id_medico for m in medico_repo.get_all()}
+    
+    reporte: List[dict] = []
+    citas: List[Cita] = []
+    posiciones: List[int] = []
+    try:
+        for numero, registro in enumerate(leer_registros(args.archivo, args.formato), start=1):
+            cita, motivo = construir_cita(registro, medicos, paciente_repo,
+                                          args.crear_pacientes and not args.simular)
+            reporte.append({'fila': numero, 'aceptada': False, 'motivo': motivo, 'id_cita': None})
+            if cita is not None:
+                posiciones.append(numero - 1)
+                citas.append(cita)
+        
+        resultado = repository.add_many(citas, chunk_size=args.lote, simular=args.simular)
+        for posicion, fila in zip(posiciones, resultado):
+            reporte[posicion].update(aceptada=fila['aceptada'], motivo=fila['motivo'], id_cita=fila['id_cita'])
+    finally:
+        repository.close()
+    
+    aceptadas = sum(1 for fila in reporte if fila['aceptada'])
+    rechazadas = len(reporte) - aceptadas
+    for fila in reporte:
+        if not fila['aceptada']:
+            print(f"✗ Fila {fila['fila']}: {MOTIVOS.get(fila['motivo'], fila['motivo'])}")
+    accion = "validadas" if args.simular else "importadas"
+    print(f"✓ {aceptadas} citas {accion}, {rechazadas} rechazadas")
+    
+    if args.reporte:
+        with open(args.reporte, 'w', newline='', encoding='utf-8') as archivo:
+            writer = csv.DictWriter(archivo, fieldnames=['fila', 'aceptada', 'motivo', 'id_cita'])
+            writer.writeheader()
+            writer.writerows(reporte)
+    return 0 if rechazadas == 0 else 1
+
+
+def exportar(args) -> int:
+    mensajes = sys.stderr if args.archivo == '-' else sys.stdout
+    with redirect_stdout(mensajes):
+        db_config = crear_db_config(args.backend, args.sqlite)
+        repository = CitaRepository(db_config)
+    try:
+        total = exportar_citas(
+            repository, args.archivo,
+            formato=args.formato,
+            comprimir=True if args.gzip else None,
+            desde=args.desde,
+            hasta=args.hasta,
+            id_medico=args.medico,
+            estado=args.estado,
+            batch_size=args.lote
+        )
+    finally:
+        with redirect_stdout(mensajes):
+            repository.close()
+    print(f"✓ {total} citas exportadas a {args.archivo}", file=mensajes)
+    return 0
+
+
+def leer_turno(texto: str) -> List[HorarioMedico]:
+    try:
+        dias, resto = texto.split('@')
+        rango, _, duracion = resto.partition('/')
+        inicio, fin = rango.split('-')
+        primero, _, ultimo = dias.partition('-')
+        return [HorarioMedico(None, dia, inicio, fin, int(duracion or 20))
+                for dia in range(int(primero), int(ultimo or primero) + 1)]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Turno inválido '{texto}'. Use DIAS@HH:MM-HH:MM/MIN, por ejemplo 0-4@08:00-14:00/20")
+
+
+def horario(args) -> int:
+    db_config = crear_db_config(args.backend, args.sqlite)
+    repository = CitaRepository(db_config)
+    horario_repo = HorarioRepository(db_config)
+    try:
+        if args.turno:
+            turnos = [turno for grupo in args.turno for turno in grupo]
+            exito, mensaje = horario_repo.set_semana(args.medico, turnos)
+            print(f"{'✓' if exito else '✗'} {mensaje}")
+            if not exito:
+                return 1
+        turnos = horario_repo.get_by_medico(args.medico)
+        if not turnos:
+            print("Sin horario definido; se usa el horario predeterminado:")
+            turnos = list(HORARIO_PREDETERMINADO)
+        for turno in turnos:
+            print(f"  {turno}")
+    finally:
+        repository.close()
+    return 0
+
+
+def huecos(args) -> int:
+    db_config = crear_db_config(args.backend, args.sqlite)
+    repository = CitaRepository(db_config)
+    viewmodel = CitaViewModel(repository, medico_repo=CachedMedicoRepository(db_config),
+                              buscador=BuscadorHuecos(db_config))
+    try:
+        if args.especialidad:
+            resultado = viewmodel.buscar_huecos_especialidad(args.especialidad, args.desde, args.hasta, args.n)
+        else:
+            resultado = viewmodel.buscar_huecos(args.medico, args.desde, args.hasta, args.n)
+    finally:
+        repository.close()
+    if not resultado:
+        print("✗ No hay horarios libres en el rango indicado")
+        return 1
+    for hueco in resultado:
+        especialidad = f" ({hueco.especialidad})" if hueco.especialidad else ""
+        print(f"{hueco.fecha} {hueco.hora}  {hueco.nombre_medico or hueco.id_medico}{especialidad}")
+    return 0
+
+
+def resumen(args) -> int:
+    mensajes = sys.stderr if args.accion == 'mostrar' else sys.stdout
+    with redirect_stdout(mensajes):
+        repository = CitaRepository(crear_db_config(args.backend, args.sqlite))
+    try:
+        if not repository.resumen.disponible:
+            print("✗ La tabla resumen_citas no existe")
+            return 1
+        if args.accion == 'reconstruir':
+            print(f"✓ Resumen reconstruido: {repository.resumen.reconstruir()} filas")
+            return 0
+        if args.accion == 'verificar':
+            diferencias = repository.resumen.verificar()
+            for diferencia in diferencias[:args.limite]:
+                print(f"✗ Médico {diferencia['id_medico']} {diferencia['fecha']} {diferencia['estado']}: "
+                      f"{diferencia['registrado']} registradas, {diferencia['esperado']} reales")
+            if diferencias:
+                print(f"✗ {len(diferencias)} diferencias; ejecute 'resumen reconstruir' para corregirlas")
+                return 1
+            print("✓ El resumen coincide con las citas")
+            return 0
+        writer = csv.DictWriter(sys.stdout, fieldnames=['fecha', 'id_medico', 'estado', 'total'])
+        writer.writeheader()
+        writer.writerows(repository.get_resumen(desde=args.desde, hasta=args.hasta, id_medico=args.medico))
+        return 0
+    finally:
+        with redirect_stdout(mensajes):
+            repository.close()
+
+
+def esquema(args) -> int:
+    db_config = crear_db_config(args.backend, args.sqlite)
+    if args.accion == 'invalidar':
+        try:
+            db_config.invalidate_schema()
+        finally:
+            db_config.close_connection()
+        print("✓ Verificación de esquema invalidada; se repetirá en el próximo inicio")
+        return 0
+    repository = CitaRepository(db_config, verify_schema=True)
+    try:
+        for tabla, detalle in sorted(db_config.schema.items()):
+            print(f"  {tabla:<20} {len(detalle['columnas']):>3} columnas {len(detalle['indices']):>3} índices")
+        if not db_config.table_exists(SCHEMA_TABLE):
+            print(f"✗ La tabla {SCHEMA_TABLE} no existe; ejecute Script.sql para guardar la verificación")
+            return 1
+        print(f"✓ Esquema versión {SCHEMA_VERSION} verificado y guardado")
+        return 0
+    finally:
+        repository.close()
+
+
+def reportes(args) -> int:
+    with redirect_stdout(sys.stderr):
+        repository = CitaRepository(crear_db_config(args.backend, args.sqlite))
+    viewmodel = CitaViewModel(repository)
+    try:
+        tablas = viewmodel.generar_reportes(args.desde, args.hasta, args.por)
+    except (RuntimeError, ValueError) as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    finally:
+        with redirect_stdout(sys.stderr):
+            repository.close()
+    for nombre in ([args.reporte] if args.reporte else list(tablas)):
+        tabla = tablas[nombre]
+        if args.csv:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(tabla.columnas)
+            writer.writerows(tabla.filas)
+        else:
+            print(tabla.formatear())
+            print()
+    return 0
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Herramientas de línea de comandos para Citas Médicas")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="Motor de base de datos (por defecto DB_BACKEND)")
+    parser.add_argument('--sqlite', help="Ruta de la base SQLite (por defecto DB_SQLITE_PATH)")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    
+    importar_parser = subparsers.add_parser('importar', help="Importar citas desde CSV o JSONL")
+    importar_parser.add_argument('archivo', help="Archivo .csv o .jsonl")
+    importar_parser.add_argument('--formato', choices=['csv', 'jsonl'], help="Formato del archivo (se deduce de la extensión)")
+    importar_parser.add_argument('--lote', type=int, default=500, help="Filas por executemany")
+    importar_parser.add_argument('--simular', action='store_true', help="Validar sin escribir en la base de datos")
+    importar_parser.add_argument('--crear-pacientes', action='store_true', help="Crear los pacientes que no existan")
+    importar_parser.add_argument('--reporte', help="Guardar el resultado por fila en un CSV")
+    importar_parser.set_defaults(func=importar)
+    
+    exportar_parser = subparsers.add_parser('exportar', help="Exportar citas a CSV o JSONL")
+    exportar_parser.add_argument('archivo', help="Archivo de salida (.csv, .jsonl, opcionalmente .gz) o '-' para stdout")
+    exportar_parser.add_argument('--formato', choices=FORMATOS, help="Formato de salida (se deduce de la extensión)")
+    exportar_parser.add_argument('--gzip', action='store_true', help="Comprimir la salida con gzip")
+    exportar_parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD")
+    exportar_parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD")
+    exportar_parser.add_argument('--medico', type=int, help="ID del médico")
+    exportar_parser.add_argument('--estado', choices=Cita.ESTADOS, help="Estado de la cita")
+    exportar_parser.add_argument('--lote', type=int, default=1000, help="Filas leídas por fetchmany")
+    exportar_parser.set_defaults(func=exportar)
+    
+    huecos_parser = subparsers.add_parser('huecos', help="Buscar los próximos horarios libres")
+    destino = huecos_parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument('--medico', type=int, help="ID del médico")
+    destino.add_argument('--especialidad', help="Buscar entre todos los médicos de la especialidad")
+    huecos_parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD (por defecto hoy)")
+    huecos_parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD")
+    huecos_parser.add_argument('-n', type=int, default=10, help="Cantidad de horarios a mostrar")
+    huecos_parser.set_defaults(func=huecos)
+    
+    horario_parser = subparsers.add_parser('horario', help="Consultar o definir el horario semanal de un médico")
+    horario_parser.add_argument('medico', type=int, help="ID del médico")
+    horario_parser.add_argument('--turno', type=leer_turno, action='append',
+                                help=f"Turno DIAS@HH:MM-HH:MM/MIN; días 0-6 = {', '.join(DIAS_SEMANA)}. "
+                                     "Reemplaza el horario actual")
+    horario_parser.set_defaults(func=horario)
+    
+    resumen_parser = subparsers.add_parser('resumen', help="Mostrar, verificar o reconstruir el resumen diario de citas")
+    resumen_parser.add_argument('accion', choices=['mostrar', 'verificar', 'reconstruir'], help="Acción a realizar")
+    resumen_parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD")
+    resumen_parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD")
+    resumen_parser.add_argument('--medico', type=int, help="ID del médico")
+    resumen_parser.add_argument('--limite', type=int, default=20, help="Diferencias a mostrar al verificar")
+    resumen_parser.set_defaults(func=resumen)
+    
+    esquema_parser = subparsers.add_parser('esquema', help="Verificar el esquema y guardarlo en la tabla metadatos")
+    esquema_parser.add_argument('accion', choices=['verificar', 'invalidar'], help="Acción a realizar")
+    esquema_parser.set_defaults(func=esquema)
+    
+    reportes_parser = subparsers.add_parser('reportes', help="Cancelaciones, inasistencias, utilización y horas pico")
+    reportes_parser.add_argument('--desde', help="Fecha inicial YYYY-MM-DD")
+    reportes_parser.add_argument('--hasta', help="Fecha final YYYY-MM-DD")
+    reportes_parser.add_argument('--por', choices=['medico', 'especialidad'], default='especialidad',
+                                 help="Agrupar por médico o especialidad")
+    reportes_parser.add_argument('--reporte', choices=['tasas', 'utilizacion', 'horas'],
+                                 help="Mostrar un solo reporte (por defecto todos)")
+    reportes_parser.add_argument('--csv', action='store_true', help="Escribir en CSV en lugar de texto")
+    reportes_parser.set_defaults(func=reportes)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = crear_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
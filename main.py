@@ -1,5 +1,8 @@
 import os
 import sys
+import time
+
+INICIO = time.perf_counter()
 
 if sys.platform == 'darwin':
     os.environ['PYTHON_CONNECT_TO_APP'] = '1'
@@ -8,41 +11,137 @@ import tkinter as tk
 
 root = tk.Tk()
 root.withdraw()
+TK_LISTO = time.perf_counter()
 
 from model.cita_repository import CitaRepository
 from model.paciente_repository import PacienteRepository
 from model.medico_repository import MedicoRepository
+from model.reference_cache import CachedMedicoRepository, CachedPacienteRepository
 from model.database_config import DatabaseConfig
-from model.config import DB_HOST, DB_DATABASE, DB_USER, DB_PASSWORD, DB_PORT
+from model.sqlite_config import SQLiteConfig
+from model.query_instrumentation import SlowQueryLog
+from model.event_bus import EventBus
+from model.sincronizacion import SincronizadorCitas
+from model.arranque import TiemposArranque
+from model.config import (DB_HOST, DB_DATABASE, DB_USER, DB_PASSWORD, DB_PORT, DB_POOL_SIZE,
+                          DB_SLOT_INDEX, DB_CACHE_REFERENCIAS, DB_CACHE_SONDEO,
+                          DB_PREPARED, DB_PREPARED_CACHE, DB_SLOW_QUERY_MS, DB_SYNC_SEGUNDOS, DB_SYNC_MARGEN,
+                          DB_VERIFICAR_ESQUEMA, DB_BACKEND, DB_SQLITE_PATH, UI_LISTA_VIRTUAL, UI_WORKERS,
+                          UI_EVENTOS_MS, UI_INICIO_RAPIDO, UI_ARRANQUE_JSON)
 from viewmodel.cita_viewmodel import CitaViewModel
+from viewmodel.task_executor import TaskExecutor
 from view.cita_view import CitaView
 
+IMPORTACIONES_LISTAS = time.perf_counter()
+
+
+def reportar_arranque(tiempos: TiemposArranque):
+    print(tiempos.formatear())
+    if UI_ARRANQUE_JSON:
+        try:
+            tiempos.guardar(UI_ARRANQUE_JSON)
+        except OSError as e:
+            print(f"Error guardando tiempos de arranque: {e}")
+
 
 def main():
+    tiempos = TiemposArranque(INICIO, pendientes=('primer_pintado', 'datos', 'segundo_plano'),
+                              al_completar=reportar_arranque)
+    tiempos.registrar('tkinter', INICIO, TK_LISTO)
+    tiempos.registrar('importaciones', TK_LISTO, IMPORTACIONES_LISTAS)
+    tiempos.datos['inicio_rapido'] = UI_INICIO_RAPIDO
     try:
-        db_config = DatabaseConfig(
-            host=DB_HOST,
-            database=DB_DATABASE,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            port=DB_PORT
-        )
+        with tiempos.fase('conexion'):
+            if DB_BACKEND == 'sqlite':
+                db_config = SQLiteConfig(
+                    DB_SQLITE_PATH,
+                    pool_size=DB_POOL_SIZE,
+                    prepared_statements=DB_PREPARED,
+                    statement_cache_size=DB_PREPARED_CACHE
+                )
+            else:
+                db_config = DatabaseConfig(
+                    host=DB_HOST,
+                    database=DB_DATABASE,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    port=DB_PORT,
+                    pool_size=DB_POOL_SIZE,
+                    prepared_statements=DB_PREPARED,
+                    statement_cache_size=DB_PREPARED_CACHE
+                )
+            
+            if DB_SLOW_QUERY_MS > 0:
+                db_config.add_query_hook(SlowQueryLog(DB_SLOW_QUERY_MS))
+            
+            event_bus = EventBus(window=UI_EVENTOS_MS / 1000) if UI_EVENTOS_MS > 0 else None
         
-        repository = CitaRepository(db_config)
-        paciente_repo = PacienteRepository(db_config)
-        medico_repo = MedicoRepository(db_config)
+        with tiempos.fase('esquema'):
+            repository = CitaRepository(db_config, event_bus=event_bus, verify_schema=DB_VERIFICAR_ESQUEMA,
+                                        defer_summary=True)
+        tiempos.datos['esquema_en_cache'] = repository.schema_cached
         
-        viewmodel = CitaViewModel(repository, paciente_repo, medico_repo)
+        sincronizador = None
+        if DB_SYNC_SEGUNDOS > 0:
+            sincronizador = SincronizadorCitas(repository, intervalo=DB_SYNC_SEGUNDOS, margen=DB_SYNC_MARGEN)
+            if UI_INICIO_RAPIDO and sincronizador.disponible:
+                with tiempos.fase('marca_sincronizacion'):
+                    sincronizador.marcar()
         
-        view = CitaView(root, viewmodel)
+        def inicializar_en_segundo_plano():
+            with tiempos.fase('resumen'):
+                repository.initialize_summary()
+            if sincronizador is not None:
+                with tiempos.fase('sincronizacion'):
+                    sincronizador.iniciar()
+            if DB_SLOT_INDEX:
+                with tiempos.fase('indice_horarios'):
+                    repository.enable_slot_index()
+        
+        if not UI_INICIO_RAPIDO:
+            inicializar_en_segundo_plano()
+        
+        with tiempos.fase('repositorios'):
+            if DB_CACHE_REFERENCIAS:
+                paciente_repo = CachedPacienteRepository(db_config, probe_interval=DB_CACHE_SONDEO,
+                                                         preload=not UI_INICIO_RAPIDO)
+                medico_repo = CachedMedicoRepository(db_config, probe_interval=DB_CACHE_SONDEO,
+                                                     preload=not UI_INICIO_RAPIDO)
+            else:
+                paciente_repo = PacienteRepository(db_config)
+                medico_repo = MedicoRepository(db_config)
+            
+            executor = TaskExecutor(max_workers=UI_WORKERS)
+            executor.bind(root)
+            
+            viewmodel = CitaViewModel(repository, paciente_repo, medico_repo, executor=executor)
+        
+        with tiempos.fase('vista'):
+            view = CitaView(root, viewmodel, lista_virtual=UI_LISTA_VIRTUAL,
+                            al_cargar=lambda: tiempos.marcar('datos'))
         
         def on_closing():
+            executor.shutdown()
+            if sincronizador is not None:
+                sincronizador.detener()
+            if event_bus is not None:
+                event_bus.close()
             repository.close()
             root.destroy()
         
         root.protocol("WM_DELETE_WINDOW", on_closing)
         
-        root.deiconify()
+        with tiempos.fase('primer_pintado'):
+            root.deiconify()
+            root.update_idletasks()
+        tiempos.marcar('primer_pintado')
+        
+        if UI_INICIO_RAPIDO:
+            viewmodel.ejecutar(inicializar_en_segundo_plano, clave='arranque',
+                               callback=lambda _: tiempos.marcar('segundo_plano'),
+                               on_error=lambda e: print(f"Error en la inicialización en segundo plano: {e}"))
+        else:
+            tiempos.marcar('segundo_plano')
         
         root.mainloop()
         
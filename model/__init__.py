@@ -1,7 +1,10 @@
 from .cita import Cita
 from .observer import Observer, Subject
+from .event_bus import EventBus
 from .cita_repository import CitaRepository
+from .database_backend import DatabaseBackend
 from .database_config import DatabaseConfig
+from .sqlite_config import SQLiteConfig
 
-__all__ = ['Cita', 'Observer', 'Subject', 'CitaRepository', 'DatabaseConfig']
+__all__ = ['Cita', 'Observer', 'Subject', 'EventBus', 'CitaRepository', 'DatabaseBackend', 'DatabaseConfig', 'SQLiteConfig']
 
@@ -0,0 +1,63 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class TiemposArranque:
+    def __init__(self, inicio: Optional[float] = None, pendientes: Iterable[str] = (),
+                 al_completar: Optional[Callable[['TiemposArranque'], None]] = None):
+        self.inicio = time.perf_counter() if inicio is None else inicio
+        self.fases: List[Tuple[str, float, float, str]] = []
+        self.marcas: Dict[str, float] = {}
+        self.datos: Dict[str, object] = {}
+        self._pendientes = set(pendientes)
+        self._al_completar = al_completar
+        self._lock = threading.Lock()
+    
+    def registrar(self, nombre: str, desde: float, hasta: Optional[float] = None):
+        hasta = time.perf_counter() if hasta is None else hasta
+        with self._lock:
+            self.fases.append((nombre, desde - self.inicio, hasta - desde, threading.current_thread().name))
+    
+    @contextmanager
+    def fase(self, nombre: str):
+        desde = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, desde)
+    
+    def marcar(self, nombre: str):
+        completado = False
+        with self._lock:
+            self.marcas[nombre] = time.perf_counter() - self.inicio
+            if nombre in self._pendientes:
+                self._pendientes.discard(nombre)
+                completado = not self._pendientes
+        if completado and self._al_completar is not None:
+            self._al_completar(self)
+    
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'fases': [{'fase': nombre, 'inicio_ms': inicio * 1000, 'duracion_ms': duracion * 1000, 'hilo': hilo}
+                          for nombre, inicio, duracion, hilo in sorted(self.fases, key=lambda fase: fase[1])],
+                'marcas_ms': {nombre: valor * 1000 for nombre, valor in self.marcas.items()},
+                **self.datos,
+            }
+    
+    def formatear(self) -> str:
+        datos = self.to_dict()
+        lineas = ["Tiempos de arranque:"]
+        for fase in datos['fases']:
+            lineas.append(f"  {fase['fase']:<22} {fase['duracion_ms']:>9.1f} ms  (desde {fase['inicio_ms']:>7.1f} ms, "
+                          f"{fase['hilo']})")
+        for nombre, valor in sorted(datos['marcas_ms'].items(), key=lambda marca: marca[1]):
+            lineas.append(f"  → {nombre:<20} {valor:>9.1f} ms")
+        return '\n'.join(lineas)
+    
+    def guardar(self, ruta: str):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(self.to_dict(), archivo, ensure_ascii=False, indent=2)
@@ -0,0 +1,139 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Optional, Tuple, Union
+from .cita import Cita
+from .cita_repository import CitaRepository
+from .medico import Medico
+from .medico_repository import MedicoRepository
+from .paciente import Paciente
+from .paciente_repository import PacienteRepository
+
+
+class AsyncRepository:
+    def __init__(self, repository, executor: Optional[Executor] = None, max_workers: Optional[int] = None):
+        self.repository = repository
+        self.db_config = repository.db_config
+        self.max_workers = max(1, max_workers or self.db_config.pool_size)
+        if not self.db_config.pool_size and executor is None:
+            print("⚠ Sin pool de conexiones (DB_POOL_SIZE=0 o SQLite en memoria): "
+                  "las consultas asíncronas comparten una conexión y se ejecutan de a una")
+        self._propio = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=self.max_workers,
+                                                       thread_name_prefix='citas-async')
+    
+    async def _run(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+    
+    async def close(self):
+        if self._propio:
+            self.executor.shutdown(wait=False)
+
+
+class AsyncCitaRepository(AsyncRepository):
+    repository: CitaRepository
+    
+    def attach(self, observer):
+        self.repository.attach(observer)
+    
+    def detach(self, observer):
+        self.repository.detach(observer)
+    
+    async def get_all(self) -> List[Cita]:
+        return await self._run(self.repository.get_all)
+    
+    async def get_by_id(self, id_cita: int) -> Optional[Cita]:
+        return await self._run(self.repository.get_by_id, id_cita)
+    
+    async def count(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                    id_medico: Optional[int] = None, estado: Optional[str] = None) -> int:
+        return await self._run(self.repository.count, desde, hasta, id_medico, estado)
+    
+    async def get_page(self, after: Optional[Tuple[str, str, int]] = None, limit: int = 100,
+                       desde: Optional[str] = None, hasta: Optional[str] = None,
+                       id_medico: Optional[int] = None, estado: Optional[str] = None,
+                       offset: int = 0) -> List[Cita]:
+        return await self._run(self.repository.get_page, after, limit, desde, hasta, id_medico, estado, offset)
+    
+    async def iter_pages(self, limit: int = 500, desde: Optional[str] = None, hasta: Optional[str] = None,
+                         id_medico: Optional[int] = None, estado: Optional[str] = None) -> AsyncIterator[List[Cita]]:
+        after = None
+        while True:
+            pagina = await self.get_page(after, limit, desde, hasta, id_medico, estado)
+            if pagina:
+                yield pagina
+            if len(pagina) < limit:
+                return
+            ultima = pagina[-1]
+            after = (str(ultima.fecha), str(ultima.hora), ultima.id_cita)
+    
+    async def get_range(self, desde: str, hasta: str, id_medico: Optional[int] = None,
+                        estado: Optional[str] = None) -> List[Cita]:
+        return await self._run(self.repository.get_range, desde, hasta, id_medico, estado)
+    
+    async def add(self, cita: Cita) -> Union[bool, str]:
+        return await self._run(self.repository.add, cita)
+    
+    async def add_many(self, citas: List[Cita], chunk_size: int = 500,
+                       simular: bool = False, reintentos: int = 3) -> List[dict]:
+        return await self._run(self.repository.add_many, citas, chunk_size, simular, reintentos)
+    
+    async def update(self, id_cita: int, cita_actualizada: Cita) -> Union[bool, str]:
+        return await self._run(self.repository.update, id_cita, cita_actualizada)
+    
+    async def delete(self, id_cita: int) -> bool:
+        return await self._run(self.repository.delete, id_cita)
+    
+    async def cancel(self, id_cita: int) -> bool:
+        return await self._run(self.repository.cancel, id_cita)
+    
+    async def close(self):
+        await self._run(self.repository.close)
+        await super().close()
+
+
+class AsyncPacienteRepository(AsyncRepository):
+    repository: PacienteRepository
+    
+    async def get_all(self) -> List[Paciente]:
+        return await self._run(self.repository.get_all)
+    
+    async def get_by_id(self, id_paciente: int) -> Optional[Paciente]:
+        return await self._run(self.repository.get_by_id, id_paciente)
+    
+    async def find_by_nombre(self, nombre: str) -> Optional[Paciente]:
+        return await self._run(self.repository.find_by_nombre, nombre)
+    
+    async def get_or_create(self, nombre: str, telefono: str = "", email: str = "") -> Optional[Paciente]:
+        return await self._run(self.repository.get_or_create, nombre, telefono, email)
+    
+    async def add(self, paciente: Paciente) -> bool:
+        return await self._run(self.repository.add, paciente)
+    
+    async def update(self, id_paciente: int, paciente: Paciente) -> bool:
+        return await self._run(self.repository.update, id_paciente, paciente)
+    
+    async def delete(self, id_paciente: int) -> bool:
+        return await self._run(self.repository.delete, id_paciente)
+
+
+class AsyncMedicoRepository(AsyncRepository):
+    repository: MedicoRepository
+    
+    async def get_all(self) -> List[Medico]:
+        return await self._run(self.repository.get_all)
+    
+    async def get_by_id(self, id_medico: int) -> Optional[Medico]:
+        return await self._run(self.repository.get_by_id, id_medico)
+    
+    async def add(self, medico: Medico) -> bool:
+        return await self._run(self.repository.add, medico)
+    
+    async def update(self, id_medico: int, medico: Medico) -> bool:
+        return await self._run(self.repository.update, id_medico, medico)
+    
+    async def delete(self, id_medico: int) -> bool:
+        return await self._run(self.repository.delete, id_medico)
+    
+    async def get_citas_by_medico(self, id_medico: int) -> List[dict]:
+        return await self._run(self.repository.get_citas_by_medico, id_medico)
+
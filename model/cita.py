@@ -1,8 +1,32 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 
 
+def formatear_fecha(fecha) -> str:
+    if hasattr(fecha, 'strftime'):
+        return fecha.strftime('%Y-%m-%d')
+    if not isinstance(fecha, str):
+        return str(fecha)
+    return fecha
+
+
+def formatear_hora(hora) -> str:
+    if hasattr(hora, 'strftime'):
+        return hora.strftime('%H:%M')
+    if isinstance(hora, timedelta):
+        minutos = int(hora.total_seconds()) // 60
+        return f"{minutos // 60:02d}:{minutos % 60:02d}"
+    if not isinstance(hora, str):
+        hora = str(hora)
+        if ':' in hora and hora.count(':') == 2:
+            hora = ':'.join(hora.split(':')[:2])
+    return hora
+
+
 class Cita:
+    __slots__ = ('id_cita', 'id_paciente', 'id_medico', 'fecha', 'hora', 'estado',
+                 'nombre_paciente', 'nombre_medico')
+    
     ESTADOS = ['Programada', 'Completada', 'Cancelada']
     
     def __init__(self, id_paciente: int, id_medico: int,
@@ -41,25 +65,11 @@ class Cita:
     
     @classmethod
     def from_dict(cls, data: dict):
-        fecha = data['fecha']
-        if hasattr(fecha, 'strftime'):
-            fecha = fecha.strftime('%Y-%m-%d')
-        elif not isinstance(fecha, str):
-            fecha = str(fecha)
-        
-        hora = data['hora']
-        if hasattr(hora, 'strftime'):
-            hora = hora.strftime('%H:%M')
-        elif not isinstance(hora, str):
-            hora = str(hora)
-            if ':' in hora and hora.count(':') == 2:
-                hora = ':'.join(hora.split(':')[:2])
-        
         return cls(
             id_paciente=data.get('id_paciente'),
             id_medico=data.get('id_medico'),
-            fecha=fecha,
-            hora=hora,
+            fecha=formatear_fecha(data['fecha']),
+            hora=formatear_hora(data['hora']),
             estado=data.get('estado', 'Programada'),
             id_cita=data.get('id_cita'),
             nombre_paciente=data.get('nombre_paciente'),
@@ -0,0 +1,160 @@
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from .cita import Cita
+
+_CODIGOS_ESTADO = {estado: codigo for codigo, estado in enumerate(Cita.ESTADOS)}
+
+
+def fecha_a_ordinal(fecha) -> int:
+    if isinstance(fecha, datetime):
+        return fecha.date().toordinal()
+    if isinstance(fecha, date):
+        return fecha.toordinal()
+    return date.fromisoformat(str(fecha)[:10]).toordinal()
+
+
+def hora_a_minutos(hora) -> int:
+    if isinstance(hora, timedelta):
+        return int(hora.total_seconds()) // 60
+    if hasattr(hora, 'hour'):
+        return hora.hour * 60 + hora.minute
+    partes = str(hora).split(':')
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def clave_orden(fecha, hora, id_cita: int) -> int:
+    return ((fecha_a_ordinal(fecha) * 1440 + hora_a_minutos(hora)) << 32) | id_cita
+
+
+class CitaBatch:
+    __slots__ = ('_ids', '_pacientes', '_medicos', '_fechas', '_horas', '_estados',
+                 '_nombres_paciente', '_nombres_medico', '_ids_ordenados', '_posiciones')
+    
+    def __init__(self):
+        self._ids = array('q')
+        self._pacientes = array('i')
+        self._medicos = array('i')
+        self._fechas = array('i')
+        self._horas = array('H')
+        self._estados = array('B')
+        self._nombres_paciente: Dict[int, str] = {}
+        self._nombres_medico: Dict[int, str] = {}
+        self._ids_ordenados: Optional[array] = None
+        self._posiciones: Optional[array] = None
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict]) -> 'CitaBatch':
+        lote = cls()
+        for row in rows:
+            lote.append_row(row)
+        lote._indexar()
+        return lote
+    
+    @classmethod
+    def from_tuples(cls, rows: Iterable[tuple]) -> 'CitaBatch':
+        lote = cls()
+        for row in rows:
+            lote._agregar(*row)
+        lote._indexar()
+        return lote
+    
+    @classmethod
+    def from_citas(cls, citas: Iterable[Cita]) -> 'CitaBatch':
+        lote = cls()
+        for cita in citas:
+            lote.append(cita)
+        lote._indexar()
+        return lote
+    
+    def append_row(self, row: dict):
+        self._agregar(row['id_cita'], row['id_paciente'], row['id_medico'], row['fecha'],
+                      row['hora'], row.get('estado'), row.get('nombre_paciente'),
+                      row.get('nombre_medico'))
+    
+    def append(self, cita: Cita):
+        self._agregar(cita.id_cita, cita.id_paciente, cita.id_medico, cita.fecha, cita.hora,
+                      cita.estado, cita.nombre_paciente, cita.nombre_medico)
+    
+    def _agregar(self, id_cita, id_paciente, id_medico, fecha, hora, estado,
+                 nombre_paciente, nombre_medico):
+        id_paciente = int(id_paciente)
+        id_medico = int(id_medico)
+        self._posiciones = None
+        self._ids.append(int(id_cita))
+        self._pacientes.append(id_paciente)
+        self._medicos.append(id_medico)
+        self._fechas.append(fecha_a_ordinal(fecha))
+        self._horas.append(hora_a_minutos(hora))
+        self._estados.append(_CODIGOS_ESTADO.get(estado, 0))
+        if nombre_paciente is not None and id_paciente not in self._nombres_paciente:
+            self._nombres_paciente[id_paciente] = sys.intern(nombre_paciente)
+        if nombre_medico is not None and id_medico not in self._nombres_medico:
+            self._nombres_medico[id_medico] = sys.intern(nombre_medico)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __iter__(self) -> Iterator[Cita]:
+        for posicion in range(len(self._ids)):
+            yield self._materializar(posicion)
+    
+    def __getitem__(self, posicion: Union[int, slice]) -> Union[Cita, List[Cita]]:
+        if isinstance(posicion, slice):
+            return [self._materializar(i) for i in range(*posicion.indices(len(self._ids)))]
+        if posicion < 0:
+            posicion += len(self._ids)
+        if not 0 <= posicion < len(self._ids):
+            raise IndexError("Posición fuera del lote de citas")
+        return self._materializar(posicion)
+    
+    def _materializar(self, posicion: int) -> Cita:
+        id_paciente = self._pacientes[posicion]
+        id_medico = self._medicos[posicion]
+        minutos = self._horas[posicion]
+        return Cita(
+            id_paciente=id_paciente,
+            id_medico=id_medico,
+            fecha=date.fromordinal(self._fechas[posicion]).isoformat(),
+            hora=f"{minutos // 60:02d}:{minutos % 60:02d}",
+            estado=Cita.ESTADOS[self._estados[posicion]],
+            id_cita=self._ids[posicion],
+            nombre_paciente=self._nombres_paciente.get(id_paciente),
+            nombre_medico=self._nombres_medico.get(id_medico)
+        )
+    
+    def id_cita(self, posicion: int) -> int:
+        return self._ids[posicion]
+    
+    def clave_orden(self, posicion: int) -> int:
+        return ((self._fechas[posicion] * 1440 + self._horas[posicion]) << 32) | self._ids[posicion]
+    
+    def estado(self, posicion: int) -> str:
+        return Cita.ESTADOS[self._estados[posicion]]
+    
+    def _indexar(self):
+        posiciones = sorted(range(len(self._ids)), key=self._ids.__getitem__)
+        self._ids_ordenados = array('q', (self._ids[posicion] for posicion in posiciones))
+        self._posiciones = array('i', posiciones)
+    
+    def posicion(self, id_cita: int) -> Optional[int]:
+        if self._posiciones is None:
+            self._indexar()
+        indice = bisect_left(self._ids_ordenados, id_cita)
+        if indice < len(self._ids_ordenados) and self._ids_ordenados[indice] == id_cita:
+            return self._posiciones[indice]
+        return None
+    
+    def get(self, id_cita: int) -> Optional[Cita]:
+        posicion = self.posicion(id_cita)
+        return self._materializar(posicion) if posicion is not None else None
+    
+    def nbytes(self) -> int:
+        columnas = (self._ids, self._pacientes, self._medicos, self._fechas, self._horas, self._estados,
+                    self._ids_ordenados, self._posiciones)
+        total = sum(sys.getsizeof(columna) for columna in columnas if columna is not None)
+        for nombres in (self._nombres_paciente, self._nombres_medico):
+            total += sys.getsizeof(nombres) + sum(sys.getsizeof(nombre) for nombre in nombres.values())
+        return total
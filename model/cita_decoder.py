@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional
+from .cita import Cita, formatear_fecha, formatear_hora
+
+COLUMNAS_CITA = ('id_cita', 'id_paciente', 'id_medico', 'fecha', 'hora', 'estado',
+                 'nombre_paciente', 'nombre_medico')
+
+
+class CitaRowDecoder:
+    columnas = COLUMNAS_CITA
+    
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._fecha = lru_cache(maxsize=cache_size)(formatear_fecha)
+        self._hora = lru_cache(maxsize=cache_size)(formatear_hora)
+    
+    def decode(self, row: tuple) -> Cita:
+        id_cita, id_paciente, id_medico, fecha, hora, estado, nombre_paciente, nombre_medico = row
+        return Cita(id_paciente, id_medico, self._fecha(fecha), self._hora(hora),
+                    estado, id_cita, nombre_paciente, nombre_medico)
+    
+    def decode_one(self, rows: list) -> Optional[Cita]:
+        return self.decode(rows[0]) if rows else None
+    
+    def decode_all(self, rows: Iterable[tuple]) -> List[Cita]:
+        decode = self.decode
+        return [decode(row) for row in rows]
+    
+    def iter_decode(self, rows: Iterable[tuple]) -> Iterator[Cita]:
+        decode = self.decode
+        for row in rows:
+            yield decode(row)
+    
+    def stats(self) -> dict:
+        return {
+            'fechas': self._fecha.cache_info()._asdict(),
+            'horas': self._hora.cache_info()._asdict(),
+        }
@@ -0,0 +1,80 @@
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Optional, TextIO
+from .cita import Cita
+from .cita_repository import CitaRepository
+
+CAMPOS_CITA = tuple(Cita(0, 0, '', '').to_dict())
+FORMATOS = ('csv', 'jsonl')
+
+
+def deducir_formato(ruta: str) -> str:
+    nombre = ruta.lower()
+    if nombre.endswith('.gz'):
+        nombre = nombre[:-3]
+    return 'jsonl' if nombre.endswith(('.jsonl', '.json')) else 'csv'
+
+
+@contextmanager
+def _abrir_destino(ruta: str, comprimir: bool):
+    if ruta == '-':
+        if comprimir:
+            with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') as binario:
+                with io.TextIOWrapper(binario, encoding='utf-8', newline='') as archivo:
+                    yield archivo
+        else:
+            yield sys.stdout
+        return
+    temporal = f"{ruta}.tmp"
+    try:
+        if comprimir:
+            archivo = gzip.open(temporal, 'wt', encoding='utf-8', newline='')
+        else:
+            archivo = open(temporal, 'w', encoding='utf-8', newline='')
+        with archivo:
+            yield archivo
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def escribir_citas(citas, archivo: TextIO, formato: str = 'csv') -> int:
+    total = 0
+    if formato == 'jsonl':
+        for cita in citas:
+            archivo.write(json.dumps(cita.to_dict(), ensure_ascii=False))
+            archivo.write('\n')
+            total += 1
+    else:
+        writer = csv.DictWriter(archivo, fieldnames=CAMPOS_CITA)
+        writer.writeheader()
+        for cita in citas:
+            writer.writerow(cita.to_dict())
+            total += 1
+    return total
+
+
+def exportar_citas(repository: CitaRepository, ruta: str,
+                   formato: Optional[str] = None,
+                   comprimir: Optional[bool] = None,
+                   desde: Optional[str] = None, hasta: Optional[str] = None,
+                   id_medico: Optional[int] = None, estado: Optional[str] = None,
+                   batch_size: int = 1000) -> int:
+    formato = formato or deducir_formato(ruta)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportación no soportado: {formato}")
+    if comprimir is None:
+        comprimir = ruta.lower().endswith('.gz')
+    citas = repository.iter_all(desde=desde, hasta=hasta, id_medico=id_medico,
+                                estado=estado, batch_size=batch_size)
+    try:
+        with _abrir_destino(ruta, comprimir) as archivo:
+            return escribir_citas(citas, archivo, formato)
+    finally:
+        citas.close()
@@ -1,163 +1,493 @@
-from typing import List, Optional
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from .cita import Cita
+from .cita_batch import CitaBatch
+from .cita_decoder import CitaRowDecoder
+from .event_bus import EventBus
 from .observer import Subject
+from .resumen_citas import ResumenCitas, cambios, clave_resumen
+from .database_backend import DatabaseBackend, SCHEMA_TABLE
 from .database_config import DatabaseConfig
+from .slot_index import SlotOccupancyIndex, normalizar_hora
+
+SELECT_CITAS = """SELECT 
+            c.id_cita,
+            c.id_paciente,
+            c.id_medico,
+            c.fecha,
+            c.hora,
+            c.estado,
+            p.nombre_completo AS nombre_paciente,
+            m.nombre_completo AS nombre_medico
+        FROM citas c
+        INNER JOIN pacientes p ON c.id_paciente = p.id_paciente
+        INNER JOIN medicos m ON c.id_medico = m.id_medico"""
+
+INSERT_CITA = """
+        INSERT INTO citas (id_paciente, id_medico, fecha, hora, estado)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+
+UPDATE_CITA = """
+        UPDATE citas 
+        SET id_paciente = %s, id_medico = %s, fecha = %s, hora = %s, estado = %s
+        WHERE id_cita = %s
+        """
+
+DELETE_CITA = "DELETE FROM citas WHERE id_cita = %s"
+
+CANCEL_CITA = "UPDATE citas SET estado = 'Cancelada' WHERE id_cita = %s"
+
+INSERT_TOMBSTONE = """
+        INSERT INTO citas_eliminadas (id_cita, id_paciente, id_medico, fecha, hora, estado)
+        SELECT id_cita, id_paciente, id_medico, fecha, hora, estado
+        FROM citas
+        WHERE id_cita = %s
+        """
+
+SLOT_CONSTRAINTS = {
+    'uq_slot_medico': "medico_ocupado",
+    'uq_slot_paciente': "paciente_ocupado",
+}
+
+IN_CHUNK_SIZE = 500
 
 class CitaRepository(Subject):
-    def __init__(self, db_config: DatabaseConfig = None):
-        super().__init__()
+    def __init__(self, db_config: DatabaseBackend = None, slot_index: bool = False,
+                 event_bus: Optional[EventBus] = None, verify_schema: bool = False,
+                 defer_summary: bool = False):
+        super().__init__(event_bus)
         self.db_config = db_config if db_config else DatabaseConfig()
-        self._initialize_database()
+        self.slot_index: Optional[SlotOccupancyIndex] = None
+        self.slot_constraints = False
+        self.change_stamps = False
+        self.schema_cached = False
+        self.decoder = CitaRowDecoder()
+        self._initialize_database(verify_schema)
+        self.resumen = ResumenCitas(self.db_config)
+        self.tombstones = self.db_config.table_exists('citas_eliminadas')
+        self._resumen_listo = False
+        self._resumen_lock = threading.Lock()
+        if not defer_summary:
+            self.initialize_summary()
+        if slot_index:
+            self.enable_slot_index()
+    
+    def initialize_summary(self) -> bool:
+        if self._resumen_listo:
+            return False
+        with self._resumen_lock:
+            if self._resumen_listo:
+                return False
+            reconstruido = self.resumen.inicializar()
+            self._resumen_listo = True
+        if reconstruido:
+            print("✓ Resumen de citas reconstruido")
+        return reconstruido
     
-    def _initialize_database(self):
+    def _initialize_database(self, verify_schema: bool = False):
         try:
-            self.db_config.create_database_if_not_exists()
-            connection = self.db_config.get_connection()
-            cursor = connection.cursor()
-            cursor.execute("SHOW TABLES LIKE 'pacientes'")
-            if not cursor.fetchone():
-                raise Exception("La tabla 'pacientes' no existe.")
-            cursor.execute("SHOW TABLES LIKE 'medicos'")
-            if not cursor.fetchone():
-                raise Exception("La tabla 'medicos' no existe.")
-            cursor.execute("SHOW TABLES LIKE 'citas'")
-            if not cursor.fetchone():
-                raise Exception("La tabla 'citas' no existe.")
-            cursor.execute("DESCRIBE citas")
-            columnas = cursor.fetchall()
-            nombres_columnas = [col[0] for col in columnas]
+            self.schema_cached = not verify_schema and self.db_config.load_schema()
+            if not self.schema_cached:
+                self.db_config.create_database_if_not_exists()
+                self.db_config.refresh_schema()
+            for tabla in ('pacientes', 'medicos', 'citas'):
+                if not self.db_config.table_exists(tabla):
+                    raise Exception(f"La tabla '{tabla}' no existe.")
+            nombres_columnas = self.db_config.get_columns('citas')
             if 'id_cita' not in nombres_columnas or 'id_paciente' not in nombres_columnas or 'id_medico' not in nombres_columnas:
                 raise Exception("La tabla 'citas' no tiene la estructura correcta.")
-            cursor.close()
+            self.change_stamps = {'created_at', 'updated_at'} <= set(nombres_columnas)
+            indices = set(self.db_config.get_indexes('citas'))
+            self.slot_constraints = set(SLOT_CONSTRAINTS) <= indices
+            if not self.schema_cached and not self.db_config.store_schema():
+                print(f"⚠ La tabla '{SCHEMA_TABLE}' no existe; el esquema se verificará en cada inicio")
         except Exception as e:
             print(f"Error verificando base de datos: {e}")
             import traceback
             traceback.print_exc()
             raise
     
+    def enable_slot_index(self) -> SlotOccupancyIndex:
+        if self.slot_index is None:
+            query = """
+            SELECT id_cita, id_paciente, id_medico, fecha, hora, estado,
+                   NULL AS nombre_paciente, NULL AS nombre_medico
+            FROM citas
+            WHERE estado != 'Cancelada'
+            """
+            index = SlotOccupancyIndex()
+            self.attach(index)
+            try:
+                results = self.db_config.execute_query(query, dictionary=False)
+            except Exception:
+                self.detach(index)
+                raise
+            index.load(self.decoder.iter_decode(results))
+            self.slot_index = index
+        return self.slot_index
+    
+    def disable_slot_index(self):
+        if self.slot_index is not None:
+            self.detach(self.slot_index)
+            self.slot_index = None
+    
     def get_all(self) -> List[Cita]:
-        query = """
-        SELECT 
-            c.id_cita,
-            c.id_paciente,
-            c.id_medico,
-            c.fecha,
-            c.hora,
-            c.estado,
-            p.nombre_completo AS nombre_paciente,
-            m.nombre_completo AS nombre_medico
-        FROM citas c
-        INNER JOIN pacientes p ON c.id_paciente = p.id_paciente
-        INNER JOIN medicos m ON c.id_medico = m.id_medico
-        ORDER BY c.fecha, c.hora
+        query = f"""
+        {SELECT_CITAS}
+        ORDER BY c.fecha, c.hora, c.id_cita
         """
-        results = self.db_config.execute_query(query)
-        return [Cita.from_dict(cita) for cita in results]
+        return self.decoder.decode_all(self.db_config.execute_query(query, dictionary=False))
     
     def get_by_id(self, id_cita: int) -> Optional[Cita]:
-        query = """
-        SELECT 
-            c.id_cita,
-            c.id_paciente,
-            c.id_medico,
-            c.fecha,
-            c.hora,
-            c.estado,
-            p.nombre_completo AS nombre_paciente,
-            m.nombre_completo AS nombre_medico
-        FROM citas c
-        INNER JOIN pacientes p ON c.id_paciente = p.id_paciente
-        INNER JOIN medicos m ON c.id_medico = m.id_medico
+        query = f"""
+        {SELECT_CITAS}
         WHERE c.id_cita = %s
         """
-        results = self.db_config.execute_query(query, (id_cita,))
-        if results:
-            return Cita.from_dict(results[0])
-        return None
+        results = self.db_config.execute_query(query, (id_cita,), dictionary=False, prepared=True)
+        return self.decoder.decode_one(results)
     
-    def add(self, cita: Cita):
-        duplicate_medico_query = """
+    @staticmethod
+    def _filtros(desde: Optional[str] = None, hasta: Optional[str] = None,
+                 id_medico: Optional[int] = None, estado: Optional[str] = None) -> Tuple[List[str], list]:
+        condiciones = []
+        params = []
+        if desde is not None:
+            condiciones.append("c.fecha >= %s")
+            params.append(desde)
+        if hasta is not None:
+            condiciones.append("c.fecha <= %s")
+            params.append(hasta)
+        if id_medico is not None:
+            condiciones.append("c.id_medico = %s")
+            params.append(id_medico)
+        if estado is not None:
+            condiciones.append("c.estado = %s")
+            params.append(estado)
+        return condiciones, params
+    
+    def count(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+              id_medico: Optional[int] = None, estado: Optional[str] = None) -> int:
+        condiciones, params = self._filtros(desde, hasta, id_medico, estado)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"SELECT COUNT(*) as count FROM citas c {where}"
+        results = self.db_config.execute_query(query, tuple(params))
+        return results[0]['count'] if results else 0
+    
+    def get_resumen(self, agrupar: Tuple[str, ...] = ('fecha', 'id_medico', 'estado'),
+                    desde: Optional[str] = None, hasta: Optional[str] = None,
+                    id_medico: Optional[int] = None) -> List[dict]:
+        self.initialize_summary()
+        return self.resumen.totales(agrupar, desde, hasta, id_medico)
+    
+    def get_page(self, after: Optional[Tuple[str, str, int]] = None, limit: int = 100,
+                 desde: Optional[str] = None, hasta: Optional[str] = None,
+                 id_medico: Optional[int] = None, estado: Optional[str] = None,
+                 offset: int = 0) -> List[Cita]:
+        condiciones, params = self._filtros(desde, hasta, id_medico, estado)
+        if after is not None:
+            fecha, hora, id_cita = after
+            condiciones.append(
+                "c.fecha >= %s AND (c.fecha > %s OR (c.fecha = %s AND "
+                "(c.hora > %s OR (c.hora = %s AND c.id_cita > %s))))"
+            )
+            params.extend([fecha, fecha, fecha, hora, hora, id_cita])
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"""
+        {SELECT_CITAS}
+        {where}
+        ORDER BY c.fecha, c.hora, c.id_cita
+        LIMIT %s OFFSET %s
+        """
+        params.extend([limit, offset])
+        return self.decoder.decode_all(self.db_config.execute_query(query, tuple(params), dictionary=False))
+    
+    def get_range(self, desde: str, hasta: str, id_medico: Optional[int] = None,
+                  estado: Optional[str] = None) -> List[Cita]:
+        condiciones, params = self._filtros(desde, hasta, id_medico, estado)
+        query = f"""
+        {SELECT_CITAS}
+        WHERE {' AND '.join(condiciones)}
+        ORDER BY c.fecha, c.hora, c.id_cita
+        """
+        return self.decoder.decode_all(self.db_config.execute_query(query, tuple(params), dictionary=False))
+    
+    def iter_all(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                 id_medico: Optional[int] = None, estado: Optional[str] = None,
+                 batch_size: int = 500) -> Iterator[Cita]:
+        condiciones, params = self._filtros(desde, hasta, id_medico, estado)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"""
+        {SELECT_CITAS}
+        {where}
+        ORDER BY c.fecha, c.hora, c.id_cita
+        """
+        rows = self.db_config.stream_query(query, tuple(params), batch_size=batch_size, dictionary=False)
+        yield from self.decoder.iter_decode(rows)
+    
+    def get_batch(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                  id_medico: Optional[int] = None, estado: Optional[str] = None,
+                  batch_size: int = 1000) -> CitaBatch:
+        condiciones, params = self._filtros(desde, hasta, id_medico, estado)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"""
+        {SELECT_CITAS}
+        {where}
+        ORDER BY c.fecha, c.hora, c.id_cita
+        """
+        rows = self.db_config.stream_query(query, tuple(params), batch_size=batch_size, dictionary=False)
+        return CitaBatch.from_tuples(rows)
+    
+    def _buscar_conflicto(self, cita: Cita, excluir_id: Optional[int] = None) -> Optional[str]:
+        excluir = " AND id_cita != %s" if excluir_id is not None else ""
+        extra = (excluir_id,) if excluir_id is not None else ()
+        
+        duplicate_medico_query = f"""
         SELECT COUNT(*) as count FROM citas 
-        WHERE fecha = %s AND hora = %s AND id_medico = %s AND estado != 'Cancelada'
+        WHERE fecha = %s AND hora = %s AND id_medico = %s{excluir} AND estado != 'Cancelada'
         """
         results = self.db_config.execute_query(
-            duplicate_medico_query, 
-            (cita.fecha, cita.hora, cita.id_medico)
+            duplicate_medico_query,
+            (cita.fecha, cita.hora, cita.id_medico) + extra,
+            dictionary=False,
+            prepared=True
         )
-        if results and results[0]['count'] > 0:
+        if results and results[0][0] > 0:
             return "medico_ocupado"
         
-        duplicate_paciente_query = """
+        duplicate_paciente_query = f"""
         SELECT COUNT(*) as count FROM citas 
-        WHERE fecha = %s AND hora = %s AND id_paciente = %s AND estado != 'Cancelada'
+        WHERE fecha = %s AND hora = %s AND id_paciente = %s{excluir} AND estado != 'Cancelada'
         """
         results = self.db_config.execute_query(
             duplicate_paciente_query,
-            (cita.fecha, cita.hora, cita.id_paciente)
+            (cita.fecha, cita.hora, cita.id_paciente) + extra,
+            dictionary=False,
+            prepared=True
         )
-        if results and results[0]['count'] > 0:
+        if results and results[0][0] > 0:
             return "paciente_ocupado"
+        return None
+    
+    def _conflicto_por_restriccion(self, error: Exception) -> Optional[str]:
+        return SLOT_CONSTRAINTS.get(self.db_config.unique_violation(error))
+    
+    @contextmanager
+    def _escritura(self, query: str, transaccion: bool = False):
+        self.initialize_summary()
+        if transaccion or self.resumen.disponible:
+            with self.db_config.transaction() as (connection, cursor):
+                yield connection, cursor
+            return
+        with self.db_config.statement(query) as (connection, cursor):
+            yield connection, cursor
+            self.db_config.commit(connection)
+    
+    def _clave_actual(self, cursor, id_cita: int):
+        if self.resumen.disponible:
+            return self.resumen.leer(cursor, id_cita)
+        return None
+    
+    def _resumir(self, cursor, anteriores=(), nuevas=()):
+        if self.resumen.disponible:
+            self.resumen.aplicar(cursor, cambios(anteriores, nuevas))
+    
+    def add(self, cita: Cita):
+        if self.slot_index is not None:
+            conflicto = self.slot_index.conflicto(cita)
+            if conflicto:
+                return conflicto
+        
+        if not self.slot_constraints:
+            conflicto = self._buscar_conflicto(cita)
+            if conflicto:
+                return conflicto
         
-        insert_query = """
-        INSERT INTO citas (id_paciente, id_medico, fecha, hora, estado)
-        VALUES (%s, %s, %s, %s, %s)
-        """
         try:
-            connection = self.db_config.get_connection()
-            cursor = connection.cursor()
-            cursor.execute(
-                insert_query,
-                (cita.id_paciente, cita.id_medico, cita.fecha, cita.hora, cita.estado)
-            )
-            cita.id_cita = cursor.lastrowid
-            connection.commit()
-            cursor.close()
+            with self._escritura(INSERT_CITA) as (connection, cursor):
+                cursor.execute(
+                    INSERT_CITA,
+                    (cita.id_paciente, cita.id_medico, cita.fecha, cita.hora, cita.estado)
+                )
+                cita.id_cita = cursor.lastrowid
+                self._resumir(cursor, nuevas=[clave_resumen(cita)])
             self.notify('cita_agregada', cita)
             return True
         except Exception as e:
+            conflicto = self._conflicto_por_restriccion(e)
+            if conflicto:
+                return conflicto
             print(f"Error agregando cita: {e}")
             return False
     
+    def _ids_existentes(self, tabla: str, columna: str, ids: Set[int]) -> Set[int]:
+        existentes: Set[int] = set()
+        ids = sorted(ids)
+        for inicio in range(0, len(ids), IN_CHUNK_SIZE):
+            bloque = ids[inicio:inicio + IN_CHUNK_SIZE]
+            marcadores = ', '.join(['%s'] * len(bloque))
+            query = f"SELECT {columna} FROM {tabla} WHERE {columna} IN ({marcadores})"
+            existentes.update(fila[columna] for fila in self.db_config.execute_query(query, tuple(bloque)))
+        return existentes
+    
+    def _validar_lote(self, citas: List[Cita], reporte: List[dict]) -> List[int]:
+        validas = []
+        for indice, cita in enumerate(citas):
+            try:
+                cita.id_paciente = int(cita.id_paciente)
+                cita.id_medico = int(cita.id_medico)
+            except (TypeError, ValueError):
+                reporte[indice]['motivo'] = "datos_invalidos"
+                continue
+            try:
+                cita.fecha = datetime.strptime(str(cita.fecha).strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+            except ValueError:
+                reporte[indice]['motivo'] = "fecha_invalida"
+                continue
+            try:
+                cita.hora = datetime.strptime(normalizar_hora(str(cita.hora).strip()), "%H:%M").strftime("%H:%M")
+            except ValueError:
+                reporte[indice]['motivo'] = "hora_invalida"
+                continue
+            validas.append(indice)
+        
+        pacientes = self._ids_existentes('pacientes', 'id_paciente', {citas[i].id_paciente for i in validas})
+        medicos = self._ids_existentes('medicos', 'id_medico', {citas[i].id_medico for i in validas})
+        existentes = []
+        for indice in validas:
+            if citas[indice].id_paciente not in pacientes:
+                reporte[indice]['motivo'] = "paciente_inexistente"
+            elif citas[indice].id_medico not in medicos:
+                reporte[indice]['motivo'] = "medico_inexistente"
+            else:
+                existentes.append(indice)
+        return existentes
+    
+    def _horarios_ocupados(self, fechas: Set[str]) -> Tuple[Set[tuple], Set[tuple]]:
+        ocupados_medico: Set[tuple] = set()
+        ocupados_paciente: Set[tuple] = set()
+        fechas = sorted(fechas)
+        for inicio in range(0, len(fechas), IN_CHUNK_SIZE):
+            bloque = fechas[inicio:inicio + IN_CHUNK_SIZE]
+            marcadores = ', '.join(['%s'] * len(bloque))
+            query = f"""
+            SELECT id_paciente, id_medico, fecha, hora
+            FROM citas
+            WHERE fecha IN ({marcadores}) AND estado != 'Cancelada'
+            """
+            for fila in self.db_config.stream_query(query, tuple(bloque)):
+                fecha = str(fila['fecha'])
+                hora = normalizar_hora(fila['hora'])
+                ocupados_medico.add((fecha, hora, fila['id_medico']))
+                ocupados_paciente.add((fecha, hora, fila['id_paciente']))
+        return ocupados_medico, ocupados_paciente
+    
+    def _filtrar_conflictos(self, citas: List[Cita], candidatas: List[int], reporte: List[dict]) -> List[int]:
+        fechas = {citas[i].fecha for i in candidatas if citas[i].estado != 'Cancelada'}
+        ocupados_medico, ocupados_paciente = self._horarios_ocupados(fechas)
+        aceptadas = []
+        for indice in candidatas:
+            cita = citas[indice]
+            reporte[indice]['motivo'] = None
+            if cita.estado != 'Cancelada':
+                clave_medico = (cita.fecha, cita.hora, cita.id_medico)
+                clave_paciente = (cita.fecha, cita.hora, cita.id_paciente)
+                if clave_medico in ocupados_medico:
+                    reporte[indice]['motivo'] = "medico_ocupado"
+                    continue
+                if clave_paciente in ocupados_paciente:
+                    reporte[indice]['motivo'] = "paciente_ocupado"
+                    continue
+                ocupados_medico.add(clave_medico)
+                ocupados_paciente.add(clave_paciente)
+            aceptadas.append(indice)
+        return aceptadas
+    
+    def _insertar_lote(self, citas: List[Cita], chunk_size: int):
+        filas = [(c.id_paciente, c.id_medico, c.fecha, c.hora, c.estado) for c in citas]
+        self.initialize_summary()
+        with self.db_config.transaction() as (connection, cursor):
+            ids = self.db_config.insert_rows(cursor, INSERT_CITA, filas, chunk_size)
+            if len(ids) != len(citas) or None in ids:
+                raise RuntimeError(f"Se obtuvieron {len(ids)} ids para {len(citas)} citas importadas")
+            self._resumir(cursor, nuevas=[clave_resumen(c) for c in citas])
+            if self.change_stamps:
+                self._sellar_cambios(cursor, ids)
+        for cita, id_cita in zip(citas, ids):
+            cita.id_cita = id_cita
+    
+    def _sellar_cambios(self, cursor, ids: List[int]):
+        for inicio in range(0, len(ids), IN_CHUNK_SIZE):
+            bloque = ids[inicio:inicio + IN_CHUNK_SIZE]
+            marcadores = ', '.join(['%s'] * len(bloque))
+            cursor.execute(
+                "UPDATE citas SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP "
+                f"WHERE id_cita IN ({marcadores})",
+                tuple(bloque)
+            )
+    
+    def add_many(self, citas: List[Cita], chunk_size: int = 500,
+                 simular: bool = False, reintentos: int = 3) -> List[Dict]:
+        reporte = [
+            {'fila': indice, 'aceptada': False, 'motivo': None, 'id_cita': None}
+            for indice in range(len(citas))
+        ]
+        candidatas = self._validar_lote(citas, reporte)
+        aceptadas: List[int] = []
+        for intento in range(reintentos):
+            aceptadas = self._filtrar_conflictos(citas, candidatas, reporte)
+            if simular or not aceptadas:
+                break
+            try:
+                self._insertar_lote([citas[i] for i in aceptadas], chunk_size)
+                break
+            except Exception as e:
+                if self._conflicto_por_restriccion(e) and intento + 1 < reintentos:
+                    continue
+                print(f"Error importando citas: {e}")
+                for indice in aceptadas:
+                    reporte[indice]['motivo'] = "error"
+                return reporte
+        
+        for indice in aceptadas:
+            reporte[indice]['aceptada'] = True
+            reporte[indice]['id_cita'] = citas[indice].id_cita
+        if aceptadas and not simular:
+            self.notify('citas_importadas', [citas[i] for i in aceptadas])
+        return reporte
+    
     def update(self, id_cita: int, cita_actualizada: Cita):
+        if self.slot_index is not None:
+            conflicto = self.slot_index.conflicto(cita_actualizada, excluir_id=id_cita)
+            if conflicto:
+                return conflicto
+        
         if not self.get_by_id(id_cita):
             return False
         
-        duplicate_medico_query = """
-        SELECT COUNT(*) as count FROM citas 
-        WHERE fecha = %s AND hora = %s AND id_medico = %s AND id_cita != %s AND estado != 'Cancelada'
-        """
-        results = self.db_config.execute_query(
-            duplicate_medico_query,
-            (cita_actualizada.fecha, cita_actualizada.hora, cita_actualizada.id_medico, id_cita)
-        )
-        if results and results[0]['count'] > 0:
-            return "medico_ocupado"
+        if not self.slot_constraints:
+            conflicto = self._buscar_conflicto(cita_actualizada, excluir_id=id_cita)
+            if conflicto:
+                return conflicto
         
-        duplicate_paciente_query = """
-        SELECT COUNT(*) as count FROM citas 
-        WHERE fecha = %s AND hora = %s AND id_paciente = %s AND id_cita != %s AND estado != 'Cancelada'
-        """
-        results = self.db_config.execute_query(
-            duplicate_paciente_query,
-            (cita_actualizada.fecha, cita_actualizada.hora, cita_actualizada.id_paciente, id_cita)
-        )
-        if results and results[0]['count'] > 0:
-            return "paciente_ocupado"
-        
-        update_query = """
-        UPDATE citas 
-        SET id_paciente = %s, id_medico = %s, fecha = %s, hora = %s, estado = %s
-        WHERE id_cita = %s
-        """
         try:
-            self.db_config.execute_update(
-                update_query,
-                (cita_actualizada.id_paciente, cita_actualizada.id_medico,
-                 cita_actualizada.fecha, cita_actualizada.hora, cita_actualizada.estado, id_cita)
-            )
+            with self._escritura(UPDATE_CITA) as (connection, cursor):
+                anterior = self._clave_actual(cursor, id_cita)
+                cursor.execute(
+                    UPDATE_CITA,
+                    (cita_actualizada.id_paciente, cita_actualizada.id_medico,
+                     cita_actualizada.fecha, cita_actualizada.hora, cita_actualizada.estado, id_cita)
+                )
+                if anterior is not None:
+                    self._resumir(cursor, [anterior], [clave_resumen(cita_actualizada)])
             self.notify('cita_actualizada', cita_actualizada)
             return True
         except Exception as e:
+            conflicto = self._conflicto_por_restriccion(e)
+            if conflicto:
+                return conflicto
             print(f"Error actualizando cita: {e}")
             return False
     
@@ -166,9 +496,13 @@ class CitaRepository(Subject):
         if not cita_eliminada:
             return False
         
-        delete_query = "DELETE FROM citas WHERE id_cita = %s"
         try:
-            self.db_config.execute_update(delete_query, (id_cita,))
+            with self._escritura(DELETE_CITA, transaccion=self.tombstones) as (connection, cursor):
+                anterior = self._clave_actual(cursor, id_cita)
+                if self.tombstones:
+                    cursor.execute(INSERT_TOMBSTONE, (id_cita,))
+                cursor.execute(DELETE_CITA, (id_cita,))
+                self._resumir(cursor, [anterior])
             self.notify('cita_eliminada', cita_eliminada)
             return True
         except Exception as e:
@@ -180,9 +514,12 @@ class CitaRepository(Subject):
         if not cita or cita.estado == 'Cancelada':
             return False
         
-        update_query = "UPDATE citas SET estado = 'Cancelada' WHERE id_cita = %s"
         try:
-            self.db_config.execute_update(update_query, (id_cita,))
+            with self._escritura(CANCEL_CITA) as (connection, cursor):
+                anterior = self._clave_actual(cursor, id_cita)
+                cursor.execute(CANCEL_CITA, (id_cita,))
+                if anterior is not None:
+                    self._resumir(cursor, [anterior], [anterior[:2] + ('Cancelada',)])
             cita.estado = 'Cancelada'
             self.notify('cita_cancelada', cita)
             return True
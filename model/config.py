@@ -6,3 +6,27 @@ DB_DATABASE = os.getenv('DB_DATABASE', 'citas_medicas')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', 'root2919')
 
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_SLOT_INDEX = os.getenv('DB_SLOT_INDEX', '1') == '1'
+DB_CACHE_REFERENCIAS = os.getenv('DB_CACHE_REFERENCIAS', '1') == '1'
+DB_CACHE_SONDEO = float(os.getenv('DB_CACHE_SONDEO', '5'))
+DB_PREPARED = os.getenv('DB_PREPARED', '1') == '1'
+DB_PREPARED_CACHE = int(os.getenv('DB_PREPARED_CACHE', '32'))
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '0'))
+DB_SYNC_SEGUNDOS = float(os.getenv('DB_SYNC_SEGUNDOS', '2'))
+DB_SYNC_MARGEN = float(os.getenv('DB_SYNC_MARGEN', '5'))
+DB_VERIFICAR_ESQUEMA = os.getenv('DB_VERIFICAR_ESQUEMA', '0') == '1'
+
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+DB_SQLITE_PATH = os.getenv('DB_SQLITE_PATH', 'citas_medicas.db')
+
+UI_LISTA_VIRTUAL = os.getenv('UI_LISTA_VIRTUAL', '0') == '1'
+UI_WORKERS = int(os.getenv('UI_WORKERS', '4'))
+UI_EVENTOS_MS = float(os.getenv('UI_EVENTOS_MS', '50'))
+UI_INICIO_RAPIDO = os.getenv('UI_INICIO_RAPIDO', '1') == '1'
+UI_ARRANQUE_JSON = os.getenv('UI_ARRANQUE_JSON', '')
+
+API_HOST = os.getenv('API_HOST', '127.0.0.1')
+API_PORT = int(os.getenv('API_PORT', '8080'))
+API_CONCURRENCIA = int(os.getenv('API_CONCURRENCIA', '8'))
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', '10'))
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Optional
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, factory: Callable[[], Any],
+                 max_size: int = 5,
+                 timeout: float = 10.0,
+                 idle_timeout: float = 300.0,
+                 health_check_interval: float = 30.0,
+                 validate: Optional[Callable[[Any], bool]] = None,
+                 reset: Optional[Callable[[Any], None]] = None,
+                 close: Optional[Callable[[Any], None]] = None):
+        if max_size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._validate = validate
+        self._reset = reset
+        self._close = close
+        self._cond = threading.Condition()
+        self._idle: deque = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._created = 0
+        self._evicted = 0
+        self._health_check_failures = 0
+    
+    def acquire(self, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+        connection = None
+        last_used = 0.0
+        expired = []
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError("El pool de conexiones está cerrado")
+                expired.extend(self._evict_idle_locked(time.monotonic()))
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No hay conexiones disponibles tras {timeout:.1f}s "
+                        f"({self._in_use} en uso de {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            wait_time = time.monotonic() - start
+            if waited:
+                self._waits += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+        
+        for stale in expired:
+            self._close_quietly(stale)
+        
+        try:
+            if connection is not None and time.monotonic() - last_used >= self.health_check_interval:
+                if not self._is_healthy(connection):
+                    with self._cond:
+                        self._health_check_failures += 1
+                    self._close_quietly(connection)
+                    connection = None
+            if connection is None:
+                connection = self.factory()
+                with self._cond:
+                    self._created += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return connection
+    
+    def release(self, connection, discard: bool = False):
+        if not discard and self._reset:
+            try:
+                self._reset(connection)
+            except Exception:
+                discard = True
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+                connection = None
+            self._cond.notify()
+        if connection is not None:
+            self._close_quietly(connection)
+    
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        connection = self.acquire(timeout)
+        discard = False
+        try:
+            yield connection
+        except Exception:
+            discard = not self._is_healthy(connection)
+            raise
+        finally:
+            self.release(connection, discard=discard)
+    
+    def evict_idle(self) -> int:
+        with self._cond:
+            expired = self._evict_idle_locked(time.monotonic())
+        for connection in expired:
+            self._close_quietly(connection)
+        return len(expired)
+    
+    def close_all(self):
+        with self._cond:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection in idle:
+            self._close_quietly(connection)
+    
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_max': self._wait_time_max,
+                'wait_time_avg': self._wait_time_total / self._checkouts if self._checkouts else 0.0,
+                'created': self._created,
+                'evicted': self._evicted,
+                'health_check_failures': self._health_check_failures,
+            }
+    
+    def _evict_idle_locked(self, now: float) -> list:
+        if not self.idle_timeout:
+            return []
+        expired = []
+        while self._idle and now - self._idle[0][1] >= self.idle_timeout:
+            connection, _ = self._idle.popleft()
+            expired.append(connection)
+        self._size -= len(expired)
+        self._evicted += len(expired)
+        return expired
+    
+    def _is_healthy(self, connection) -> bool:
+        if not self._validate:
+            return True
+        try:
+            return bool(self._validate(connection))
+        except Exception:
+            return False
+    
+    def _close_quietly(self, connection):
+        try:
+            if self._close:
+                self._close(connection)
+            else:
+                connection.close()
+        except Exception:
+            pass
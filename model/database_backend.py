@@ -0,0 +1,495 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .connection_pool import ConnectionPool
+from .query_instrumentation import InstrumentedCursor, QueryEvent, active_scopes, caller
+
+SCHEMA_VERSION = 1
+SCHEMA_TABLE = 'metadatos'
+SCHEMA_KEY = 'esquema'
+
+
+class DatabaseBackend(ABC):
+    backend_name = 'Base de datos'
+    error_class = Exception
+    row_lock = ''
+    
+    def __init__(self,
+                 database: str,
+                 pool_size: int = 0,
+                 pool_timeout: float = 10.0,
+                 pool_idle_timeout: float = 300.0,
+                 pool_health_check_interval: float = 30.0,
+                 prepared_statements: bool = False,
+                 statement_cache_size: int = 32):
+        self.database = database
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_health_check_interval = pool_health_check_interval
+        self._connection = None
+        self.hold_connection = False
+        self._pool: Optional[ConnectionPool] = None
+        self._lock = threading.RLock()
+        self._checkouts = 0
+        self._in_use = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self.prepared_statements = prepared_statements
+        self.statement_cache_size = statement_cache_size
+        self._statements: Dict[int, OrderedDict] = {}
+        self._statements_lock = threading.Lock()
+        self._statement_hits = 0
+        self._statement_misses = 0
+        self._statement_evictions = 0
+        self._query_hooks: List[Callable[[QueryEvent], None]] = []
+        self._schema: Optional[Dict[str, dict]] = None
+    
+    @abstractmethod
+    def _connect(self):
+        pass
+    
+    @abstractmethod
+    def _is_alive(self, connection) -> bool:
+        pass
+    
+    @abstractmethod
+    def _open_cursor(self, connection, dictionary: bool = False):
+        pass
+    
+    @abstractmethod
+    def _begin(self, connection):
+        pass
+    
+    @abstractmethod
+    def create_database_if_not_exists(self):
+        pass
+    
+    @abstractmethod
+    def _fetch_tables(self) -> List[str]:
+        pass
+    
+    @abstractmethod
+    def _fetch_table_exists(self, table: str) -> bool:
+        pass
+    
+    @abstractmethod
+    def _fetch_columns(self, table: str) -> List[str]:
+        pass
+    
+    @abstractmethod
+    def _fetch_indexes(self, table: str) -> List[str]:
+        pass
+    
+    def table_exists(self, table: str) -> bool:
+        if self._schema is not None:
+            return table in self._schema
+        return self._fetch_table_exists(table)
+    
+    def get_columns(self, table: str) -> List[str]:
+        if self._schema is not None:
+            return list(self._schema.get(table, {}).get('columnas', []))
+        return self._fetch_columns(table)
+    
+    def get_indexes(self, table: str) -> List[str]:
+        if self._schema is not None:
+            return list(self._schema.get(table, {}).get('indices', []))
+        return self._fetch_indexes(table)
+    
+    @property
+    def schema(self) -> Dict[str, dict]:
+        return dict(self._schema or {})
+    
+    def load_schema(self, version: int = SCHEMA_VERSION) -> bool:
+        try:
+            with self.connection() as (connection, cursor):
+                cursor.execute(f"SELECT valor FROM {SCHEMA_TABLE} WHERE clave = %s", (SCHEMA_KEY,))
+                filas = cursor.fetchall()
+        except self.error_class:
+            return False
+        if not filas:
+            return False
+        try:
+            datos = json.loads(filas[0][0])
+        except (TypeError, ValueError):
+            return False
+        if datos.get('version') != version or not isinstance(datos.get('tablas'), dict):
+            return False
+        self._schema = datos['tablas']
+        return True
+    
+    def refresh_schema(self) -> Dict[str, dict]:
+        self._schema = None
+        self._schema = {
+            tabla: {'columnas': self._fetch_columns(tabla), 'indices': self._fetch_indexes(tabla)}
+            for tabla in self._fetch_tables()
+        }
+        return self._schema
+    
+    def store_schema(self, version: int = SCHEMA_VERSION) -> bool:
+        if self._schema is None or SCHEMA_TABLE not in self._schema:
+            return False
+        valor = json.dumps({'version': version, 'tablas': self._schema}, ensure_ascii=False)
+        with self.transaction() as (connection, cursor):
+            cursor.execute(f"DELETE FROM {SCHEMA_TABLE} WHERE clave = %s", (SCHEMA_KEY,))
+            cursor.execute(f"INSERT INTO {SCHEMA_TABLE} (clave, valor) VALUES (%s, %s)", (SCHEMA_KEY, valor))
+        return True
+    
+    def invalidate_schema(self):
+        self._schema = None
+        if self._fetch_table_exists(SCHEMA_TABLE):
+            self.execute_update(f"DELETE FROM {SCHEMA_TABLE} WHERE clave = %s", (SCHEMA_KEY,))
+    
+    @abstractmethod
+    def unique_violation(self, error: Exception) -> Optional[str]:
+        pass
+    
+    def insert_rows(self, cursor, query: str, rows: List[tuple], chunk_size: int = 500) -> List[int]:
+        ids = []
+        for row in rows:
+            cursor.execute(query, row)
+            ids.append(cursor.lastrowid)
+        return ids
+    
+    @abstractmethod
+    def increment_query(self, table: str, keys: Tuple[str, ...], column: str) -> str:
+        pass
+    
+    def _reset_connection(self, connection):
+        if connection.in_transaction:
+            connection.rollback()
+    
+    def _close_raw(self, connection):
+        self._discard_statements(connection)
+        connection.close()
+    
+    def _open_prepared_cursor(self, connection, dictionary: bool = False):
+        return self._open_cursor(connection, dictionary)
+    
+    def _close_cursor(self, cursor):
+        try:
+            cursor.close()
+        except self.error_class:
+            pass
+    
+    def _prepared_cursor(self, connection, query: str, dictionary: bool = False):
+        with self._statements_lock:
+            cursores = self._statements.get(id(connection))
+            if cursores is None:
+                cursores = self._statements[id(connection)] = OrderedDict()
+        clave = (query, dictionary)
+        cursor = cursores.get(clave)
+        if cursor is not None:
+            cursores.move_to_end(clave)
+            with self._statements_lock:
+                self._statement_hits += 1
+            return cursor
+        cursor = self._open_prepared_cursor(connection, dictionary)
+        cursores[clave] = cursor
+        antiguos = []
+        while len(cursores) > self.statement_cache_size:
+            antiguos.append(cursores.popitem(last=False)[1])
+        with self._statements_lock:
+            self._statement_misses += 1
+            self._statement_evictions += len(antiguos)
+        for antiguo in antiguos:
+            self._close_cursor(antiguo)
+        return cursor
+    
+    def _forget_statement(self, connection, query: str, dictionary: bool = False):
+        with self._statements_lock:
+            cursores = self._statements.get(id(connection))
+        cursor = cursores.pop((query, dictionary), None) if cursores else None
+        if cursor is not None:
+            self._close_cursor(cursor)
+    
+    def _discard_statements(self, connection):
+        with self._statements_lock:
+            cursores = self._statements.pop(id(connection), None)
+        if cursores:
+            for cursor in cursores.values():
+                self._close_cursor(cursor)
+    
+    def add_query_hook(self, hook: Callable[[QueryEvent], None]) -> Callable[[QueryEvent], None]:
+        self._query_hooks.append(hook)
+        return hook
+    
+    def remove_query_hook(self, hook: Callable[[QueryEvent], None]):
+        if hook in self._query_hooks:
+            self._query_hooks.remove(hook)
+    
+    def _instrumentado(self) -> bool:
+        return bool(self._query_hooks or active_scopes())
+    
+    def _emitir(self, kind: str, query: str, latency: float, rows: Optional[int], llamador: str,
+                error: Optional[BaseException] = None):
+        event = QueryEvent(self.backend_name, kind, query, latency, rows, llamador, error)
+        for ambito in active_scopes():
+            ambito.record(event)
+        for hook in list(self._query_hooks):
+            try:
+                hook(event)
+            except Exception as e:
+                print(f"Error en hook de consultas: {e}")
+    
+    def _instrumentar(self, cursor):
+        if self._instrumentado():
+            return InstrumentedCursor(cursor, self._emitir)
+        return cursor
+    
+    def _control(self, sentencia: str, accion: Callable, *args):
+        if not self._instrumentado():
+            return accion(*args)
+        llamador = caller()
+        inicio = time.perf_counter()
+        try:
+            resultado = accion(*args)
+        except Exception as e:
+            self._emitir('control', sentencia, time.perf_counter() - inicio, None, llamador, e)
+            raise
+        self._emitir('control', sentencia, time.perf_counter() - inicio, None, llamador)
+        return resultado
+    
+    def commit(self, connection):
+        if connection.in_transaction:
+            self._control('COMMIT', connection.commit)
+    
+    def get_connection(self):
+        with self._lock:
+            if self._connection is None or not self._control('PING', self._is_alive, self._connection):
+                if self._connection is not None:
+                    anterior, self._connection = self._connection, None
+                    try:
+                        self._close_raw(anterior)
+                    except self.error_class:
+                        pass
+                try:
+                    self._connection = self._connect()
+                    print(f"✓ Conectado a {self.backend_name}: {self.database}")
+                except self.error_class as e:
+                    print(f"✗ Error conectando a {self.backend_name}: {e}")
+                    raise
+            return self._connection
+    
+    def get_pool(self) -> ConnectionPool:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ConnectionPool(
+                        self._connect,
+                        max_size=self.pool_size,
+                        timeout=self.pool_timeout,
+                        idle_timeout=self.pool_idle_timeout,
+                        health_check_interval=self.pool_health_check_interval,
+                        validate=self._is_alive,
+                        reset=self._reset_connection,
+                        close=self._close_raw
+                    )
+                    print(f"✓ Pool de conexiones {self.backend_name} ({self.pool_size}): {self.database}")
+        return self._pool
+    
+    def acquire_connection(self):
+        if self.pool_size:
+            return self.get_pool().acquire()
+        start = time.monotonic()
+        self._lock.acquire()
+        wait_time = time.monotonic() - start
+        try:
+            connection = self.get_connection()
+        except Exception:
+            self._lock.release()
+            raise
+        self._checkouts += 1
+        self._in_use += 1
+        self._wait_time_total += wait_time
+        self._wait_time_max = max(self._wait_time_max, wait_time)
+        return connection
+    
+    def release_connection(self, connection, discard: bool = False):
+        if self.pool_size:
+            self.get_pool().release(connection, discard=discard)
+            return
+        self._in_use -= 1
+        try:
+            if discard and not self.hold_connection:
+                self._connection = None
+                self._close_raw(connection)
+            else:
+                self._reset_connection(connection)
+        except self.error_class:
+            pass
+        finally:
+            self._lock.release()
+    
+    @contextmanager
+    def connection(self, dictionary: bool = False):
+        connection = self.acquire_connection()
+        discard = False
+        cursor = None
+        try:
+            cursor = self._instrumentar(self._open_cursor(connection, dictionary))
+            yield connection, cursor
+        except Exception:
+            try:
+                connection.rollback()
+            except self.error_class:
+                discard = True
+            raise
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except self.error_class:
+                    discard = True
+            self.release_connection(connection, discard=discard)
+    
+    @contextmanager
+    def statement(self, query: str, dictionary: bool = False):
+        if not self.prepared_statements:
+            with self.connection(dictionary) as (connection, cursor):
+                yield connection, cursor
+            return
+        connection = self.acquire_connection()
+        discard = False
+        cursor = None
+        try:
+            cursor = self._instrumentar(self._prepared_cursor(connection, query, dictionary))
+            yield connection, cursor
+        except Exception as e:
+            if not isinstance(e, self.error_class):
+                self._forget_statement(connection, query, dictionary)
+            try:
+                connection.rollback()
+            except self.error_class:
+                discard = True
+            raise
+        finally:
+            if isinstance(cursor, InstrumentedCursor):
+                cursor.flush()
+            self.release_connection(connection, discard=discard)
+    
+    def statement_stats(self) -> dict:
+        with self._statements_lock:
+            abiertas = sum(len(cursores) for cursores in self._statements.values())
+            aciertos, fallos, desalojos = self._statement_hits, self._statement_misses, self._statement_evictions
+        total = aciertos + fallos
+        return {
+            'enabled': self.prepared_statements,
+            'max_size': self.statement_cache_size,
+            'open': abiertas,
+            'hits': aciertos,
+            'misses': fallos,
+            'evictions': desalojos,
+            'hit_ratio': aciertos / total if total else 0.0,
+        }
+    
+    @contextmanager
+    def transaction(self, dictionary: bool = False):
+        with self.connection(dictionary) as (connection, cursor):
+            self._control('BEGIN', self._begin, connection)
+            yield connection, cursor
+            if isinstance(cursor, InstrumentedCursor):
+                cursor.flush()
+            self._control('COMMIT', connection.commit)
+    
+    @contextmanager
+    def _dedicated_connection(self, dictionary: bool = False):
+        connection = self._connect()
+        cursor = self._instrumentar(self._open_cursor(connection, dictionary))
+        try:
+            yield connection, cursor
+        finally:
+            try:
+                cursor.close()
+            except self.error_class:
+                pass
+            self._close_raw(connection)
+    
+    def stream_query(self, query: str, params: tuple = None, batch_size: int = 500,
+                     dictionary: bool = True) -> Iterator:
+        if self.hold_connection:
+            yield from self.execute_query(query, params, dictionary=dictionary)
+            return
+        if self.pool_size:
+            context = self.connection(dictionary=dictionary)
+        else:
+            context = self._dedicated_connection(dictionary=dictionary)
+        with context as (connection, cursor):
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+            except self.error_class as e:
+                print(f"Error ejecutando consulta: {e}")
+                raise
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+    
+    def pool_stats(self) -> dict:
+        if self.pool_size:
+            return self.get_pool().stats()
+        size = 1 if self._connection is not None else 0
+        return {
+            'max_size': 1,
+            'size': size,
+            'in_use': min(self._in_use, size),
+            'idle': size - min(self._in_use, size),
+            'checkouts': self._checkouts,
+            'waits': 0,
+            'wait_time_total': self._wait_time_total,
+            'wait_time_max': self._wait_time_max,
+            'wait_time_avg': self._wait_time_total / self._checkouts if self._checkouts else 0.0,
+            'created': size,
+            'evicted': 0,
+            'health_check_failures': 0,
+        }
+    
+    def close_connection(self):
+        if self._pool is not None:
+            self._pool.close_all()
+            self._pool = None
+            print(f"Pool de conexiones {self.backend_name} cerrado")
+        if self._connection is not None and self._is_alive(self._connection):
+            self._close_raw(self._connection)
+            self._connection = None
+            print(f"Conexión a {self.backend_name} cerrada")
+    
+    def execute_query(self, query: str, params: tuple = None, dictionary: bool = True,
+                      prepared: bool = False) -> list:
+        if prepared:
+            context = self.statement(query, dictionary=dictionary)
+        else:
+            context = self.connection(dictionary=dictionary)
+        with context as (connection, cursor):
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                results = cursor.fetchall()
+                return results
+            except self.error_class as e:
+                print(f"Error ejecutando consulta: {e}")
+                raise
+    
+    def execute_update(self, query: str, params: tuple = None, prepared: bool = False) -> bool:
+        context = self.statement(query) if prepared else self.connection()
+        with context as (connection, cursor):
+            try:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+                self.commit(connection)
+                return True
+            except self.error_class as e:
+                print(f"Error ejecutando actualización: {e}")
+                raise
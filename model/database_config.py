@@ -1,76 +1,67 @@
+import re
 import mysql.connector
-from mysql.connector import Error
-from typing import Optional
+from mysql.connector import Error, IntegrityError
+from typing import List, Optional, Tuple
+from .database_backend import DatabaseBackend
 
 
-class DatabaseConfig:
-    def __init__(self, 
+ER_DUP_ENTRY = 1062
+_DUPLICATE_KEY = re.compile(r"for key '(?:[^'.]+\.)?([^']+)'")
+
+
+class DatabaseConfig(DatabaseBackend):
+    backend_name = 'MySQL'
+    error_class = Error
+    row_lock = ' FOR UPDATE'
+    
+    def __init__(self,
                  host: str = 'localhost',
                  database: str = 'citas_medicas',
                  user: str = 'root',
                  password: str = '',
-                 port: int = 3306):
+                 port: int = 3306,
+                 pool_size: int = 0,
+                 pool_timeout: float = 10.0,
+                 pool_idle_timeout: float = 300.0,
+                 pool_health_check_interval: float = 30.0,
+                 prepared_statements: bool = False,
+                 statement_cache_size: int = 32):
+        super().__init__(
+            database,
+            pool_size=pool_size,
+            pool_timeout=pool_timeout,
+            pool_idle_timeout=pool_idle_timeout,
+            pool_health_check_interval=pool_health_check_interval,
+            prepared_statements=prepared_statements,
+            statement_cache_size=statement_cache_size
+        )
         self.host = host
-        self.database = database
         self.user = user
         self.password = password
         self.port = port
-        self._connection: Optional[mysql.connector.MySQLConnection] = None
+        self._id_step: Optional[int] = None
     
-    def get_connection(self) -> mysql.connector.MySQLConnection:
-        if self._connection is None or not self._connection.is_connected():
-            try:
-                self._connection = mysql.connector.connect(
-                    host=self.host,
-                    database=self.database,
-                    user=self.user,
-                    password=self.password,
-                    port=self.port
-                )
-                if self._connection.is_connected():
-                    print(f"✓ Conectado a MySQL: {self.database}")
-            except Error as e:
-                print(f"✗ Error conectando a MySQL: {e}")
-                raise
-        return self._connection
+    def _connect(self) -> mysql.connector.MySQLConnection:
+        return mysql.connector.connect(
+            host=self.host,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            port=self.port,
+            autocommit=True
+        )
     
-    def close_connection(self):
-        if self._connection and self._connection.is_connected():
-            self._connection.close()
-            print("Conexión a MySQL cerrada")
+    def _is_alive(self, connection) -> bool:
+        return connection.is_connected()
     
-    def execute_query(self, query: str, params: tuple = None) -> list:
-        connection = self.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            results = cursor.fetchall()
-            return results
-        except Error as e:
-            print(f"Error ejecutando consulta: {e}")
-            raise
-        finally:
-            cursor.close()
+    def _open_cursor(self, connection, dictionary: bool = False):
+        return connection.cursor(dictionary=dictionary, buffered=False)
     
-    def execute_update(self, query: str, params: tuple = None) -> bool:
-        connection = self.get_connection()
-        cursor = connection.cursor()
-        try:
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            connection.commit()
-            return True
-        except Error as e:
-            connection.rollback()
-            print(f"Error ejecutando actualización: {e}")
-            raise
-        finally:
-            cursor.close()
+    def _open_prepared_cursor(self, connection, dictionary: bool = False):
+        return connection.cursor(prepared=True, dictionary=dictionary)
+    
+    def _begin(self, connection):
+        connection.start_transaction()
     
     def create_database_if_not_exists(self):
         try:
@@ -88,4 +79,59 @@ class DatabaseConfig:
         except Error as e:
             print(f"Error creando base de datos: {e}")
             raise
-
+    
+    def _fetch_tables(self) -> List[str]:
+        with self.connection() as (connection, cursor):
+            cursor.execute("SHOW TABLES")
+            return [row[0] for row in cursor.fetchall()]
+    
+    def _fetch_table_exists(self, table: str) -> bool:
+        with self.connection() as (connection, cursor):
+            cursor.execute("SHOW TABLES LIKE %s", (table,))
+            return cursor.fetchone() is not None
+    
+    def _fetch_columns(self, table: str) -> List[str]:
+        with self.connection() as (connection, cursor):
+            cursor.execute(f"DESCRIBE {table}")
+            return [col[0] for col in cursor.fetchall()]
+    
+    def _fetch_indexes(self, table: str) -> List[str]:
+        with self.connection() as (connection, cursor):
+            cursor.execute(f"SHOW INDEX FROM {table}")
+            return list(dict.fromkeys(row[2] for row in cursor.fetchall()))
+    
+    def unique_violation(self, error: Exception) -> Optional[str]:
+        if not isinstance(error, IntegrityError) or error.errno != ER_DUP_ENTRY:
+            return None
+        match = _DUPLICATE_KEY.search(error.msg or str(error))
+        return match.group(1) if match else None
+    
+    def _paso_ids(self, cursor) -> int:
+        if self._id_step is None:
+            try:
+                cursor.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+                modo, incremento = cursor.fetchall()[0]
+                self._id_step = int(incremento) if int(modo) < 2 else 0
+            except Error:
+                self._id_step = 0
+        return self._id_step
+    
+    def insert_rows(self, cursor, query: str, rows: List[tuple], chunk_size: int = 500) -> List[int]:
+        paso = self._paso_ids(cursor)
+        if not paso:
+            return super().insert_rows(cursor, query, rows, chunk_size)
+        encabezado, _, valores = query.rpartition('VALUES')
+        ids = []
+        for inicio in range(0, len(rows), chunk_size):
+            bloque = rows[inicio:inicio + chunk_size]
+            cursor.execute(f"{encabezado}VALUES {', '.join([valores.strip()] * len(bloque))}",
+                           tuple(valor for fila in bloque for valor in fila))
+            if cursor.rowcount != len(bloque) or not cursor.lastrowid:
+                raise RuntimeError(f"Se insertaron {cursor.rowcount} de {len(bloque)} filas del lote")
+            ids.extend(range(cursor.lastrowid, cursor.lastrowid + len(bloque) * paso, paso))
+        return ids
+    
+    def increment_query(self, table: str, keys: Tuple[str, ...], column: str) -> str:
+        marcadores = ', '.join(['%s'] * (len(keys) + 1))
+        return (f"INSERT INTO {table} ({', '.join(keys)}, {column}) VALUES ({marcadores}) "
+                f"ON DUPLICATE KEY UPDATE {column} = {column} + VALUES({column})")
@@ -0,0 +1,137 @@
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from .database_backend import DatabaseBackend
+from .horario import HORARIO_PREDETERMINADO, HorarioMedico, Hueco, a_minutos, formatear_minutos
+from .horario_repository import IN_CHUNK_SIZE, HorarioRepository
+
+VENTANA_DIAS = 14
+
+
+def a_fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+class PlantillaDia:
+    __slots__ = ('inicios', 'duraciones', 'mascara')
+    
+    def __init__(self, turnos: Dict[int, int]):
+        self.inicios = tuple(sorted(turnos))
+        self.duraciones = tuple(turnos[inicio] for inicio in self.inicios)
+        self.mascara = (1 << len(self.inicios)) - 1
+    
+    def posicion(self, minutos: int) -> Optional[int]:
+        i = bisect_right(self.inicios, minutos) - 1
+        if i >= 0 and minutos < self.inicios[i] + self.duraciones[i]:
+            return i
+        return None
+
+
+def plantilla_semanal(horarios: Iterable[HorarioMedico]) -> Dict[int, PlantillaDia]:
+    turnos: Dict[int, Dict[int, int]] = {}
+    for horario in horarios:
+        dia = turnos.setdefault(horario.dia_semana, {})
+        for inicio in horario.turnos():
+            dia.setdefault(inicio, horario.duracion_minutos)
+    return {dia: PlantillaDia(inicios) for dia, inicios in turnos.items() if inicios}
+
+
+class BuscadorHuecos:
+    def __init__(self, db_config: DatabaseBackend, horario_repo: Optional[HorarioRepository] = None,
+                 ventana_dias: int = VENTANA_DIAS):
+        self.db_config = db_config
+        self.horario_repo = horario_repo if horario_repo else HorarioRepository(db_config)
+        self.ventana_dias = ventana_dias
+    
+    def plantillas(self, ids_medicos: List[int]) -> Dict[int, Dict[int, PlantillaDia]]:
+        horarios = self.horario_repo.get_by_medicos(ids_medicos)
+        return {
+            id_medico: plantilla_semanal(horarios.get(id_medico) or HORARIO_PREDETERMINADO)
+            for id_medico in ids_medicos
+        }
+    
+    def ocupacion(self, plantillas: Dict[int, Dict[int, PlantillaDia]],
+                  desde: date, hasta: date) -> Dict[Tuple[int, int], int]:
+        bitmaps: Dict[Tuple[int, int], int] = {}
+        ids = sorted(plantillas)
+        for inicio in range(0, len(ids), IN_CHUNK_SIZE):
+            chunk = ids[inicio:inicio + IN_CHUNK_SIZE]
+            marcadores = ', '.join(['%s'] * len(chunk))
+            query = f"""
+            SELECT id_medico, fecha, hora
+            FROM citas
+            WHERE fecha >= %s AND fecha <= %s AND estado != 'Cancelada' AND id_medico IN ({marcadores})
+            """
+            params = (desde.isoformat(), hasta.isoformat(), *chunk)
+            for id_medico, fecha, hora in self.db_config.execute_query(query, params, dictionary=False):
+                dia = a_fecha(fecha)
+                plantilla = plantillas[id_medico].get(dia.weekday())
+                if plantilla is None:
+                    continue
+                bit = plantilla.posicion(a_minutos(hora))
+                if bit is None:
+                    continue
+                clave = (id_medico, dia.toordinal())
+                bitmaps[clave] = bitmaps.get(clave, 0) | (1 << bit)
+        return bitmaps
+    
+    @staticmethod
+    def _libres_del_dia(plantillas: Dict[int, Dict[int, PlantillaDia]], ocupacion: Dict[Tuple[int, int], int],
+                        dia: date, minimo: int, limite: int) -> List[Tuple[int, int, int]]:
+        candidatos = []
+        ordinal = dia.toordinal()
+        semana = dia.weekday()
+        for id_medico, semanal in plantillas.items():
+            plantilla = semanal.get(semana)
+            if plantilla is None:
+                continue
+            libres = plantilla.mascara & ~ocupacion.get((id_medico, ordinal), 0)
+            encontrados = 0
+            while libres and encontrados < limite:
+                bit = libres & -libres
+                libres ^= bit
+                i = bit.bit_length() - 1
+                if plantilla.inicios[i] < minimo:
+                    continue
+                candidatos.append((plantilla.inicios[i], id_medico, plantilla.duraciones[i]))
+                encontrados += 1
+        candidatos.sort()
+        return candidatos[:limite]
+    
+    def buscar(self, ids_medicos: Iterable[int], desde, hasta, n: int = 10,
+               despues: Optional[datetime] = None) -> List[Hueco]:
+        ids = sorted(set(ids_medicos))
+        desde, hasta = a_fecha(desde), a_fecha(hasta)
+        if despues is not None and despues.date() > desde:
+            desde = despues.date()
+        huecos: List[Hueco] = []
+        if not ids or n <= 0 or desde > hasta:
+            return huecos
+        
+        plantillas = self.plantillas(ids)
+        plantillas = {id_medico: semanal for id_medico, semanal in plantillas.items() if semanal}
+        if not plantillas:
+            return huecos
+        
+        inicio = desde
+        ventana = self.ventana_dias
+        while inicio <= hasta and len(huecos) < n:
+            fin = min(hasta, inicio + timedelta(days=ventana - 1))
+            ocupacion = self.ocupacion(plantillas, inicio, fin)
+            dia = inicio
+            while dia <= fin and len(huecos) < n:
+                minimo = 0
+                if despues is not None and dia == despues.date():
+                    minimo = despues.hour * 60 + despues.minute + 1
+                fecha = dia.isoformat()
+                for minutos, id_medico, duracion in self._libres_del_dia(plantillas, ocupacion, dia, minimo,
+                                                                         n - len(huecos)):
+                    huecos.append(Hueco(id_medico, fecha, formatear_minutos(minutos), duracion))
+                dia += timedelta(days=1)
+            inicio = fin + timedelta(days=1)
+            ventana *= 2
+        return huecos
@@ -0,0 +1,221 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Hashable, Iterable, List, Optional
+
+
+class Event:
+    __slots__ = ('topic', 'data', 'published')
+    
+    def __init__(self, topic: str, data=None, published: Optional[float] = None):
+        self.topic = topic
+        self.data = data
+        self.published = time.monotonic() if published is None else published
+    
+    def __iter__(self):
+        yield self.topic
+        yield self.data
+    
+    def __repr__(self):
+        return f"<Event {self.topic}>"
+
+
+def coalesce(events: List[Event], key: Callable[[Event], Optional[Hashable]],
+             merge: Optional[Callable[[Event, Event], Optional[Event]]] = None) -> List[Event]:
+    ultimos = {}
+    resultado: List[Optional[Event]] = []
+    for event in events:
+        clave = key(event)
+        if clave is not None:
+            anterior = ultimos.pop(clave, None)
+            if anterior is not None:
+                previo = resultado[anterior]
+                resultado[anterior] = None
+                event = merge(previo, event) if merge is not None else event
+                if event is None:
+                    continue
+            ultimos[clave] = len(resultado)
+        resultado.append(event)
+    return [event for event in resultado if event is not None]
+
+
+class Subscription:
+    __slots__ = ('handler', 'topics', 'prefixes', 'deliver', 'coalesce_key', 'merge', 'pending', 'batches',
+                 'delivered')
+    
+    def __init__(self, handler: Callable[[List[Event]], None], topics: Optional[Iterable[str]] = None,
+                 deliver: Optional[Callable] = None, coalesce_key: Optional[Callable[[Event], Optional[Hashable]]] = None,
+                 merge: Optional[Callable[[Event, Event], Optional[Event]]] = None):
+        self.handler = handler
+        topics = list(topics) if topics is not None else None
+        self.topics = {t for t in topics if not t.endswith('*')} if topics is not None else None
+        self.prefixes = tuple(t[:-1] for t in topics if t.endswith('*')) if topics is not None else ()
+        self.deliver = deliver
+        self.coalesce_key = coalesce_key
+        self.merge = merge
+        self.pending = 0
+        self.batches = 0
+        self.delivered = 0
+    
+    def accepts(self, topic: str) -> bool:
+        if self.topics is None:
+            return True
+        return topic in self.topics or topic.startswith(self.prefixes)
+
+
+class EventBus:
+    def __init__(self, window: float = 0.05, max_batch: int = 1000, latency_samples: int = 1024):
+        self.window = window
+        self.max_batch = max_batch
+        self._cola: Deque[Event] = deque()
+        self._cond = threading.Condition()
+        self._suscripciones: List[Subscription] = []
+        self._hilo: Optional[threading.Thread] = None
+        self._despachando = False
+        self._cerrado = False
+        self._latencias: Deque[float] = deque(maxlen=latency_samples)
+        self._published = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._batches = 0
+        self._max_depth = 0
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+    
+    def subscribe(self, handler: Callable[[List[Event]], None], topics: Optional[Iterable[str]] = None,
+                  deliver: Optional[Callable] = None,
+                  coalesce_key: Optional[Callable[[Event], Optional[Hashable]]] = None,
+                  merge: Optional[Callable[[Event, Event], Optional[Event]]] = None) -> Subscription:
+        subscription = Subscription(handler, topics, deliver, coalesce_key, merge)
+        with self._cond:
+            self._suscripciones.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        with self._cond:
+            if subscription in self._suscripciones:
+                self._suscripciones.remove(subscription)
+    
+    def publish(self, topic: str, data=None):
+        event = Event(topic, data)
+        with self._cond:
+            if self._cerrado:
+                self._dropped += 1
+                return
+            self._cola.append(event)
+            self._published += 1
+            self._max_depth = max(self._max_depth, len(self._cola))
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._despachar, name='citas-eventos', daemon=True)
+                self._hilo.start()
+            self._cond.notify_all()
+    
+    def _siguiente_lote(self) -> Optional[List[Event]]:
+        with self._cond:
+            while not self._cola and not self._cerrado:
+                self._cond.wait()
+            if not self._cola:
+                return None
+            limite = self._cola[0].published + self.window
+            while len(self._cola) < self.max_batch and not self._cerrado:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                self._cond.wait(restante)
+            cantidad = min(len(self._cola), self.max_batch)
+            self._despachando = True
+            return [self._cola.popleft() for _ in range(cantidad)]
+    
+    def _despachar(self):
+        while True:
+            lote = self._siguiente_lote()
+            if lote is None:
+                return
+            with self._cond:
+                suscripciones = list(self._suscripciones)
+                self._batches += 1
+            try:
+                for subscription in suscripciones:
+                    events = [event for event in lote if subscription.accepts(event.topic)]
+                    if subscription.coalesce_key is not None and len(events) > 1:
+                        fusionados = coalesce(events, subscription.coalesce_key, subscription.merge)
+                        with self._cond:
+                            self._coalesced += len(events) - len(fusionados)
+                        events = fusionados
+                    if events:
+                        self._entregar(subscription, events)
+            finally:
+                with self._cond:
+                    self._despachando = False
+                    self._cond.notify_all()
+    
+    def _entregar(self, subscription: Subscription, events: List[Event]):
+        def ejecutar():
+            latencia = time.monotonic() - events[0].published
+            try:
+                subscription.handler(events)
+            except Exception as e:
+                print(f"Error entregando eventos: {e}")
+            finally:
+                with self._cond:
+                    subscription.pending -= 1
+                    subscription.batches += 1
+                    subscription.delivered += len(events)
+                    self._latencias.append(latencia)
+                    self._latency_total += latencia
+                    self._latency_count += 1
+                    self._latency_max = max(self._latency_max, latencia)
+                    self._cond.notify_all()
+        
+        with self._cond:
+            subscription.pending += 1
+        if subscription.deliver is None:
+            ejecutar()
+            return
+        try:
+            subscription.deliver(ejecutar)
+        except Exception as e:
+            print(f"Error programando la entrega de eventos: {e}")
+            with self._cond:
+                subscription.pending -= 1
+                self._dropped += len(events)
+                self._cond.notify_all()
+    
+    def _ocupado(self) -> bool:
+        return bool(self._cola) or self._despachando or any(s.pending for s in self._suscripciones)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._ocupado():
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+        return True
+    
+    def stats(self) -> dict:
+        with self._cond:
+            latencias = sorted(self._latencias)
+            return {
+                'depth': len(self._cola),
+                'max_depth': self._max_depth,
+                'published': self._published,
+                'batches': self._batches,
+                'coalesced': self._coalesced,
+                'dropped': self._dropped,
+                'subscribers': len(self._suscripciones),
+                'pending': sum(s.pending for s in self._suscripciones),
+                'latency_avg_ms': self._latency_total / self._latency_count * 1000 if self._latency_count else 0.0,
+                'latency_p95_ms': latencias[max(0, int(len(latencias) * 0.95) - 1)] * 1000 if latencias else 0.0,
+                'latency_max_ms': self._latency_max * 1000,
+            }
+    
+    def close(self, timeout: float = 2.0):
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+            hilo = self._hilo
+        if hilo is not None and hilo is not threading.current_thread():
+            hilo.join(timeout)
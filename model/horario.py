@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+DIAS_SEMANA = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def a_minutos(hora) -> int:
+    if isinstance(hora, timedelta):
+        return int(hora.total_seconds()) // 60
+    if hasattr(hora, 'hour'):
+        return hora.hour * 60 + hora.minute
+    partes = str(hora).split(':')
+    return int(partes[0]) * 60 + int(partes[1])
+
+
+def formatear_minutos(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+class HorarioMedico:
+    __slots__ = ('id_horario', 'id_medico', 'dia_semana', 'hora_inicio', 'hora_fin', 'duracion_minutos')
+    
+    def __init__(self, id_medico: Optional[int], dia_semana: int, hora_inicio: str, hora_fin: str,
+                 duracion_minutos: int = 20, id_horario: Optional[int] = None):
+        self.id_horario = id_horario
+        self.id_medico = id_medico
+        self.dia_semana = dia_semana
+        self.hora_inicio = formatear_minutos(a_minutos(hora_inicio))
+        self.hora_fin = formatear_minutos(a_minutos(hora_fin))
+        self.duracion_minutos = duracion_minutos
+    
+    def __str__(self):
+        return (f"{DIAS_SEMANA[self.dia_semana]} {self.hora_inicio}-{self.hora_fin} "
+                f"({self.duracion_minutos} min)")
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    def validar(self) -> Optional[str]:
+        if not 0 <= self.dia_semana <= 6:
+            return "Día de la semana inválido"
+        if self.duracion_minutos <= 0:
+            return "La duración del turno debe ser positiva"
+        if a_minutos(self.hora_fin) - a_minutos(self.hora_inicio) < self.duracion_minutos:
+            return "El horario debe abarcar al menos un turno"
+        return None
+    
+    def turnos(self) -> List[int]:
+        inicio, fin = a_minutos(self.hora_inicio), a_minutos(self.hora_fin)
+        return list(range(inicio, fin - self.duracion_minutos + 1, self.duracion_minutos))
+    
+    def to_dict(self):
+        return {
+            'id_horario': self.id_horario,
+            'id_medico': self.id_medico,
+            'dia_semana': self.dia_semana,
+            'hora_inicio': self.hora_inicio,
+            'hora_fin': self.hora_fin,
+            'duracion_minutos': self.duracion_minutos
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            id_medico=data.get('id_medico'),
+            dia_semana=int(data['dia_semana']),
+            hora_inicio=data['hora_inicio'],
+            hora_fin=data['hora_fin'],
+            duracion_minutos=int(data.get('duracion_minutos') or 20),
+            id_horario=data.get('id_horario')
+        )
+
+
+HORARIO_PREDETERMINADO: Tuple[HorarioMedico, ...] = tuple(
+    HorarioMedico(None, dia, '08:00', '14:00', 20) for dia in range(5)
+)
+
+
+class Hueco:
+    __slots__ = ('id_medico', 'fecha', 'hora', 'duracion_minutos', 'nombre_medico', 'especialidad')
+    
+    def __init__(self, id_medico: int, fecha: str, hora: str, duracion_minutos: int,
+                 nombre_medico: Optional[str] = None, especialidad: Optional[str] = None):
+        self.id_medico = id_medico
+        self.fecha = fecha
+        self.hora = hora
+        self.duracion_minutos = duracion_minutos
+        self.nombre_medico = nombre_medico
+        self.especialidad = especialidad
+    
+    def __str__(self):
+        medico = self.nombre_medico or f"Médico {self.id_medico}"
+        return f"{self.fecha} {self.hora} - {medico}"
+    
+    def __repr__(self):
+        return self.__str__()
+    
+    def inicio(self) -> datetime:
+        return datetime.strptime(f"{self.fecha} {self.hora}", "%Y-%m-%d %H:%M")
+    
+    def to_dict(self):
+        return {
+            'id_medico': self.id_medico,
+            'fecha': self.fecha,
+            'hora': self.hora,
+            'duracion_minutos': self.duracion_minutos,
+            'nombre_medico': self.nombre_medico,
+            'especialidad': self.especialidad
+        }
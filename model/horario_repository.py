@@ -0,0 +1,67 @@
+from typing import Dict, Iterable, List
+from .horario import HorarioMedico
+from .database_backend import DatabaseBackend
+
+IN_CHUNK_SIZE = 500
+
+
+class HorarioRepository:
+    def __init__(self, db_config: DatabaseBackend):
+        self.db_config = db_config
+        self.disponible = self.db_config.table_exists('horarios_medicos')
+    
+    def get_by_medico(self, id_medico: int) -> List[HorarioMedico]:
+        return self.get_by_medicos([id_medico]).get(id_medico, [])
+    
+    def get_by_medicos(self, ids_medicos: Iterable[int]) -> Dict[int, List[HorarioMedico]]:
+        horarios: Dict[int, List[HorarioMedico]] = {}
+        if not self.disponible:
+            return horarios
+        ids = sorted(set(ids_medicos))
+        for inicio in range(0, len(ids), IN_CHUNK_SIZE):
+            chunk = ids[inicio:inicio + IN_CHUNK_SIZE]
+            marcadores = ', '.join(['%s'] * len(chunk))
+            query = f"""
+            SELECT id_horario, id_medico, dia_semana, hora_inicio, hora_fin, duracion_minutos
+            FROM horarios_medicos
+            WHERE id_medico IN ({marcadores})
+            ORDER BY id_medico, dia_semana, hora_inicio
+            """
+            for fila in self.db_config.execute_query(query, tuple(chunk)):
+                horario = HorarioMedico.from_dict(fila)
+                horarios.setdefault(horario.id_medico, []).append(horario)
+        return horarios
+    
+    def set_semana(self, id_medico: int, horarios: List[HorarioMedico]) -> tuple[bool, str]:
+        if not self.disponible:
+            return False, "La tabla horarios_medicos no existe"
+        for horario in horarios:
+            error = horario.validar()
+            if error:
+                return False, error
+        query = """
+        INSERT INTO horarios_medicos (id_medico, dia_semana, hora_inicio, hora_fin, duracion_minutos)
+        VALUES (%s, %s, %s, %s, %s)
+        """
+        try:
+            with self.db_config.transaction() as (connection, cursor):
+                cursor.execute("DELETE FROM horarios_medicos WHERE id_medico = %s", (id_medico,))
+                for horario in horarios:
+                    horario.id_medico = id_medico
+                    cursor.execute(query, (id_medico, horario.dia_semana, horario.hora_inicio,
+                                           horario.hora_fin, horario.duracion_minutos))
+                    horario.id_horario = cursor.lastrowid
+            return True, "Horario actualizado exitosamente"
+        except Exception as e:
+            print(f"Error actualizando horario: {e}")
+            return False, f"Error al actualizar horario: {str(e)}"
+    
+    def delete_by_medico(self, id_medico: int) -> bool:
+        if not self.disponible:
+            return False
+        try:
+            self.db_config.execute_update("DELETE FROM horarios_medicos WHERE id_medico = %s", (id_medico,))
+            return True
+        except Exception as e:
+            print(f"Error eliminando horario: {e}")
+            return False
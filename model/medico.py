@@ -2,6 +2,8 @@ from typing import Optional
 
 
 class Medico:
+    __slots__ = ('id_medico', 'nombre_completo', 'especialidad', 'telefono')
+    
     def __init__(self, nombre_completo: str, especialidad: str = "", telefono: str = "", id_medico: Optional[int] = None):
         self.id_medico = id_medico
         self.nombre_completo = nombre_completo
@@ -1,10 +1,10 @@
 from typing import List, Optional
 from .medico import Medico
-from .database_config import DatabaseConfig
+from .database_backend import DatabaseBackend
 
 
 class MedicoRepository:
-    def __init__(self, db_config: DatabaseConfig):
+    def __init__(self, db_config: DatabaseBackend):
         self.db_config = db_config
     
     def get_all(self) -> List[Medico]:
@@ -25,12 +25,10 @@ class MedicoRepository:
         VALUES (%s, %s, %s)
         """
         try:
-            connection = self.db_config.get_connection()
-            cursor = connection.cursor()
-            cursor.execute(query, (medico.nombre_completo, medico.especialidad, medico.telefono))
-            medico.id_medico = cursor.lastrowid
-            connection.commit()
-            cursor.close()
+            with self.db_config.connection() as (connection, cursor):
+                cursor.execute(query, (medico.nombre_completo, medico.especialidad, medico.telefono))
+                medico.id_medico = cursor.lastrowid
+                self.db_config.commit(connection)
             return True
         except Exception as e:
             print(f"Error agregando médico: {e}")
@@ -1,16 +1,22 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, List, Optional, Tuple
+from .event_bus import EventBus
 
 
 class Observer(ABC):
     @abstractmethod
     def update(self, message: str, data=None):
         pass
+    
+    def update_many(self, eventos: List[Tuple[str, Any]]):
+        for message, data in eventos:
+            self.update(message, data)
 
 
 class Subject(ABC):
-    def __init__(self):
+    def __init__(self, event_bus: Optional[EventBus] = None):
         self._observers: List[Observer] = []
+        self.event_bus = event_bus
     
     def attach(self, observer: Observer):
         if observer not in self._observers:
@@ -23,4 +29,5 @@ class Subject(ABC):
     def notify(self, message: str, data=None):
         for observer in self._observers:
             observer.update(message, data)
-
+        if self.event_bus is not None:
+            self.event_bus.publish(message, data)
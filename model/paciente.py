@@ -1,7 +1,16 @@
+import unicodedata
 from typing import Optional
 
 
+def normalizar_nombre(nombre: str) -> str:
+    descompuesto = unicodedata.normalize('NFKD', nombre or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.casefold().split())
+
+
 class Paciente:
+    __slots__ = ('id_paciente', 'nombre_completo', 'telefono', 'email')
+    
     def __init__(self, nombre_completo: str, telefono: str = "", email: str = "", id_paciente: Optional[int] = None):
         self.id_paciente = id_paciente
         self.nombre_completo = nombre_completo
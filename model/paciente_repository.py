@@ -1,11 +1,15 @@
 from typing import List, Optional
-from .paciente import Paciente
-from .database_config import DatabaseConfig
+from .paciente import Paciente, normalizar_nombre
+from .database_backend import DatabaseBackend
+
+UQ_NOMBRE_NORMALIZADO = 'uq_pacientes_nombre_normalizado'
 
 
 class PacienteRepository:
-    def __init__(self, db_config: DatabaseConfig):
+    def __init__(self, db_config: DatabaseBackend):
         self.db_config = db_config
+        columnas = self.db_config.get_columns('pacientes')
+        self.nombre_normalizado = 'nombre_normalizado' in columnas
     
     def get_all(self) -> List[Paciente]:
         query = "SELECT * FROM pacientes ORDER BY nombre_completo"
@@ -19,35 +23,83 @@ class PacienteRepository:
             return Paciente.from_dict(results[0])
         return None
     
+    def find_by_nombre(self, nombre: str) -> Optional[Paciente]:
+        normalizado = normalizar_nombre(nombre)
+        if not normalizado:
+            return None
+        if self.nombre_normalizado:
+            query = "SELECT * FROM pacientes WHERE nombre_normalizado = %s LIMIT 1"
+            results = self.db_config.execute_query(query, (normalizado,))
+            return Paciente.from_dict(results[0]) if results else None
+        query = "SELECT * FROM pacientes WHERE nombre_completo = %s"
+        results = self.db_config.execute_query(query, (' '.join(nombre.split()),))
+        for p in results:
+            if normalizar_nombre(p['nombre_completo']) == normalizado:
+                return Paciente.from_dict(p)
+        return None
+    
+    def _insert(self, paciente: Paciente):
+        if self.nombre_normalizado:
+            query = """
+            INSERT INTO pacientes (nombre_completo, nombre_normalizado, telefono, email)
+            VALUES (%s, %s, %s, %s)
+            """
+            params = (paciente.nombre_completo, normalizar_nombre(paciente.nombre_completo),
+                      paciente.telefono, paciente.email)
+        else:
+            query = """
+            INSERT INTO pacientes (nombre_completo, telefono, email)
+            VALUES (%s, %s, %s)
+            """
+            params = (paciente.nombre_completo, paciente.telefono, paciente.email)
+        with self.db_config.connection() as (connection, cursor):
+            cursor.execute(query, params)
+            paciente.id_paciente = cursor.lastrowid
+            self.db_config.commit(connection)
+    
     def add(self, paciente: Paciente) -> bool:
-        query = """
-        INSERT INTO pacientes (nombre_completo, telefono, email)
-        VALUES (%s, %s, %s)
-        """
         try:
-            connection = self.db_config.get_connection()
-            cursor = connection.cursor()
-            cursor.execute(query, (paciente.nombre_completo, paciente.telefono, paciente.email))
-            paciente.id_paciente = cursor.lastrowid
-            connection.commit()
-            cursor.close()
+            self._insert(paciente)
             return True
         except Exception as e:
             print(f"Error agregando paciente: {e}")
             return False
     
+    def get_or_create(self, nombre: str, telefono: str = "", email: str = "") -> Optional[Paciente]:
+        existente = self.find_by_nombre(nombre)
+        if existente:
+            return existente
+        nombre = ' '.join(nombre.split())
+        if not nombre:
+            return None
+        paciente = Paciente(nombre, telefono, email)
+        try:
+            self._insert(paciente)
+            return paciente
+        except Exception as e:
+            if self.db_config.unique_violation(e) == UQ_NOMBRE_NORMALIZADO:
+                return self.find_by_nombre(nombre)
+            print(f"Error agregando paciente: {e}")
+            return None
+    
     def update(self, id_paciente: int, paciente: Paciente) -> bool:
-        query = """
-        UPDATE pacientes 
-        SET nombre_completo = %s, telefono = %s, email = %s
-        WHERE id_paciente = %s
-        """
+        if self.nombre_normalizado:
+            query = """
+            UPDATE pacientes 
+            SET nombre_completo = %s, nombre_normalizado = %s, telefono = %s, email = %s
+            WHERE id_paciente = %s
+            """
+            params = (paciente.nombre_completo, normalizar_nombre(paciente.nombre_completo),
+                      paciente.telefono, paciente.email, id_paciente)
+        else:
+            query = """
+            UPDATE pacientes 
+            SET nombre_completo = %s, telefono = %s, email = %s
+            WHERE id_paciente = %s
+            """
+            params = (paciente.nombre_completo, paciente.telefono, paciente.email, id_paciente)
         try:
-            self.db_config.execute_update(
-                query,
-                (paciente.nombre_completo, paciente.telefono, 
-                 paciente.email, id_paciente)
-            )
+            self.db_config.execute_update(query, params)
             return True
         except Exception as e:
             print(f"Error actualizando paciente: {e}")
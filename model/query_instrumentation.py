@@ -0,0 +1,236 @@
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ESPACIOS = re.compile(r"\s+")
+_ARCHIVOS_INTERNOS = {
+    os.path.normcase(os.path.join(os.path.dirname(__file__), nombre))
+    for nombre in ('database_backend.py', 'database_config.py', 'sqlite_config.py', 'query_instrumentation.py',
+                   'cita_decoder.py')
+}
+
+_ambitos: ContextVar[Tuple['RoundTripScope', ...]] = ContextVar('ambitos_consultas', default=())
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    normalizada = _LITERALES.sub('?', query)
+    normalizada = _LISTAS.sub('(...)', normalizada)
+    return _ESPACIOS.sub(' ', normalizada).strip()
+
+
+def caller() -> str:
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = os.path.normcase(frame.f_code.co_filename)
+        if archivo not in _ARCHIVOS_INTERNOS and not archivo.endswith('contextlib.py'):
+            codigo = frame.f_code
+            return getattr(codigo, 'co_qualname', codigo.co_name)
+        frame = frame.f_back
+    return '?'
+
+
+class QueryEvent:
+    __slots__ = ('backend', 'kind', 'query', 'fingerprint', 'latency', 'rows', 'caller', 'error')
+    
+    def __init__(self, backend: str, kind: str, query: str, latency: float, rows: Optional[int],
+                 caller: str, error: Optional[BaseException] = None):
+        self.backend = backend
+        self.kind = kind
+        self.query = query
+        self.fingerprint = fingerprint(query)
+        self.latency = latency
+        self.rows = rows
+        self.caller = caller
+        self.error = error
+    
+    def __repr__(self):
+        filas = '?' if self.rows is None else self.rows
+        return f"<{self.kind} {self.latency * 1000:.2f} ms, {filas} filas, {self.caller}: {self.fingerprint}>"
+
+
+def active_scopes() -> Tuple['RoundTripScope', ...]:
+    return _ambitos.get()
+
+
+class RoundTripScope:
+    def __init__(self, name: str = ''):
+        self.name = name
+        self.events: List[QueryEvent] = []
+    
+    def record(self, event: QueryEvent):
+        self.events.append(event)
+    
+    @property
+    def round_trips(self) -> int:
+        return len(self.events)
+    
+    @property
+    def latency(self) -> float:
+        return sum(event.latency for event in self.events)
+    
+    def by_fingerprint(self) -> Dict[str, int]:
+        conteo: Dict[str, int] = defaultdict(int)
+        for event in self.events:
+            conteo[event.fingerprint] += 1
+        return dict(conteo)
+    
+    def by_caller(self) -> Dict[str, int]:
+        conteo: Dict[str, int] = defaultdict(int)
+        for event in self.events:
+            conteo[event.caller] += 1
+        return dict(conteo)
+    
+    def repeated(self, minimum: int = 2) -> Dict[str, int]:
+        return {huella: n for huella, n in self.by_fingerprint().items() if n >= minimum}
+    
+    def report(self) -> str:
+        lineas = [f"{self.name or 'Operación'}: {self.round_trips} viajes a la base de datos, "
+                  f"{self.latency * 1000:.2f} ms"]
+        for event in self.events:
+            filas = '?' if event.rows is None else event.rows
+            lineas.append(f"  {event.latency * 1000:8.2f} ms  {filas:>5} filas  {event.caller}: {event.fingerprint}")
+        return '\n'.join(lineas)
+    
+    def assert_at_most(self, round_trips: int):
+        if self.round_trips > round_trips:
+            raise AssertionError(f"Se esperaban como máximo {round_trips} viajes a la base de datos\n{self.report()}")
+
+
+@contextmanager
+def query_scope(name: str = '') -> Iterator[RoundTripScope]:
+    ambito = RoundTripScope(name)
+    token = _ambitos.set(_ambitos.get() + (ambito,))
+    try:
+        yield ambito
+    finally:
+        _ambitos.reset(token)
+
+
+class QueryStats:
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        self._por_huella: Dict[str, dict] = {}
+    
+    def __call__(self, event: QueryEvent):
+        datos = self._por_huella.get(event.fingerprint)
+        if datos is None:
+            datos = self._por_huella[event.fingerprint] = {
+                'fingerprint': event.fingerprint,
+                'count': 0,
+                'errors': 0,
+                'rows': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'callers': defaultdict(int),
+            }
+        latencia = event.latency * 1000
+        datos['count'] += 1
+        datos['errors'] += event.error is not None
+        datos['rows'] += event.rows or 0
+        datos['total_ms'] += latencia
+        datos['max_ms'] = max(datos['max_ms'], latencia)
+        datos['callers'][event.caller] += 1
+    
+    def summary(self, limit: Optional[int] = None) -> List[dict]:
+        filas = []
+        for datos in sorted(self._por_huella.values(), key=lambda d: d['total_ms'], reverse=True):
+            fila = dict(datos, callers=dict(datos['callers']))
+            fila['avg_ms'] = fila['total_ms'] / fila['count']
+            filas.append(fila)
+        return filas[:limit] if limit else filas
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 100.0, output: Callable[[str], None] = print):
+        self.threshold_ms = threshold_ms
+        self.output = output
+        self.count = 0
+    
+    def __call__(self, event: QueryEvent):
+        latencia = event.latency * 1000
+        if latencia < self.threshold_ms:
+            return
+        self.count += 1
+        filas = '?' if event.rows is None else event.rows
+        self.output(f"⚠ Consulta lenta ({latencia:.1f} ms, {filas} filas) en {event.caller}: {event.fingerprint}")
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, emit: Callable):
+        self._cursor = cursor
+        self._emit = emit
+        self._pendiente: Optional[list] = None
+    
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+    
+    def __iter__(self):
+        for fila in self._cursor:
+            self._contar(1)
+            yield fila
+    
+    def _contar(self, filas: int, latencia: float = 0.0):
+        if self._pendiente is not None:
+            self._pendiente[2] += latencia
+            self._pendiente[5] = (self._pendiente[5] or 0) + filas
+    
+    def _ejecutar(self, kind: str, metodo: Callable, query: str, *args):
+        self.flush()
+        llamador = caller()
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(query, *args)
+        except Exception as e:
+            self._emit(kind, query, time.perf_counter() - inicio, None, llamador, e)
+            raise
+        self._pendiente = [kind, query, time.perf_counter() - inicio, self._cursor.rowcount, llamador, None]
+        return resultado
+    
+    def execute(self, query: str, params=None):
+        if params is None:
+            return self._ejecutar('execute', self._cursor.execute, query)
+        return self._ejecutar('execute', self._cursor.execute, query, params)
+    
+    def executemany(self, query: str, seq_params):
+        return self._ejecutar('executemany', self._cursor.executemany, query, seq_params)
+    
+    def _leer(self, metodo: Callable, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        if isinstance(resultado, list):
+            filas = len(resultado)
+        else:
+            filas = 0 if resultado is None else 1
+        self._contar(filas, time.perf_counter() - inicio)
+        return resultado
+    
+    def fetchone(self):
+        return self._leer(self._cursor.fetchone)
+    
+    def fetchmany(self, *args):
+        return self._leer(self._cursor.fetchmany, *args)
+    
+    def fetchall(self):
+        return self._leer(self._cursor.fetchall)
+    
+    def flush(self):
+        if self._pendiente is not None:
+            kind, query, latencia, rowcount, llamador, leidas = self._pendiente
+            self._pendiente = None
+            filas = leidas if leidas is not None else (rowcount if rowcount >= 0 else None)
+            self._emit(kind, query, latencia, filas, llamador, None)
+    
+    def close(self):
+        self.flush()
+        self._cursor.close()
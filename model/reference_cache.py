@@ -0,0 +1,259 @@
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+from .database_backend import DatabaseBackend
+from .medico_repository import MedicoRepository
+from .paciente import Paciente, normalizar_nombre
+from .paciente_repository import PacienteRepository
+
+MAX_PROPIOS = 500
+
+
+class ReferenceCache:
+    table = ''
+    id_field = ''
+    
+    def _init_cache(self, probe_interval: float = 5.0, preload: bool = True):
+        self.probe_interval = probe_interval
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.probes = 0
+        self.reloads = 0
+        self._por_id: Dict[int, object] = {}
+        self._ordenados: Optional[list] = None
+        self._firma = None
+        self._firma_estable = False
+        self._propios: Set[int] = set()
+        self._ultimo_sondeo = 0.0
+        self._cargado = False
+        self._lock = threading.RLock()
+        if preload:
+            self.preload()
+    
+    def _id(self, entidad) -> int:
+        return getattr(entidad, self.id_field)
+    
+    def _firma_actual(self) -> Tuple[tuple, bool]:
+        query = f"""
+        SELECT MAX(updated_at) AS ultima, COUNT(*) AS total, MAX({self.id_field}) AS ultimo_id,
+               CURRENT_TIMESTAMP AS ahora
+        FROM {self.table}
+        """
+        fila = self.db_config.execute_query(query)[0]
+        self.probes += 1
+        estable = fila['ultima'] is None or fila['ultima'] < fila['ahora']
+        return (fila['ultima'], fila['total'], fila['ultimo_id']), estable
+    
+    def _firma_tras_escritura(self, propios: Set[int]) -> Tuple[tuple, bool, int]:
+        comparacion = '>' if self._firma_estable else '>='
+        marcadores = ', '.join(['%s'] * len(propios))
+        query = f"""
+        SELECT MAX(updated_at) AS ultima, COUNT(*) AS total, MAX({self.id_field}) AS ultimo_id,
+               CURRENT_TIMESTAMP AS ahora,
+               COALESCE(SUM(CASE WHEN (%s IS NULL OR updated_at {comparacion} %s)
+                                      AND {self.id_field} NOT IN ({marcadores})
+                                 THEN 1 ELSE 0 END), 0) AS ajenas
+        FROM {self.table}
+        """
+        desde = self._firma[0]
+        fila = self.db_config.execute_query(query, (desde, desde, *sorted(propios)))[0]
+        self.probes += 1
+        estable = fila['ultima'] is None or fila['ultima'] < fila['ahora']
+        return (fila['ultima'], fila['total'], fila['ultimo_id']), estable, int(fila['ajenas'])
+    
+    def _recargar(self):
+        firma, estable = self._firma_actual()
+        entidades = super().get_all()
+        self._por_id = {}
+        self._limpiar_indices()
+        for entidad in entidades:
+            self._por_id[self._id(entidad)] = entidad
+            self._indexar(entidad)
+        self._ordenados = entidades
+        self._firma = firma
+        self._firma_estable = estable
+        self._propios = set()
+        self._ultimo_sondeo = time.monotonic()
+        self._cargado = True
+        self.version += 1
+        self.reloads += 1
+    
+    def _limpiar_indices(self):
+        pass
+    
+    def _indexar(self, entidad):
+        pass
+    
+    def _desindexar(self, entidad):
+        pass
+    
+    def _vigente(self) -> bool:
+        if not self._cargado:
+            self._recargar()
+            return False
+        ahora = time.monotonic()
+        if ahora - self._ultimo_sondeo >= self.probe_interval:
+            self._ultimo_sondeo = ahora
+            firma, estable = self._firma_actual()
+            if firma != self._firma or not self._firma_estable:
+                self._recargar()
+                return False
+        return True
+    
+    def _contar(self, acierto: bool):
+        if acierto:
+            self.hits += 1
+        else:
+            self.misses += 1
+    
+    def _registrar(self, entidad):
+        anterior = self._por_id.get(self._id(entidad))
+        if anterior is not None:
+            self._desindexar(anterior)
+        self._por_id[self._id(entidad)] = entidad
+        self._indexar(entidad)
+        self._ordenados = None
+    
+    def _quitar(self, id_entidad: int):
+        anterior = self._por_id.pop(id_entidad, None)
+        if anterior is not None:
+            self._desindexar(anterior)
+            self._ordenados = None
+    
+    def _escritura_propia(self, entidad=None, id_eliminado: Optional[int] = None, delta: int = 0):
+        with self._lock:
+            if not self._cargado:
+                return
+            if entidad is not None:
+                self._registrar(entidad)
+            if id_eliminado is not None:
+                self._quitar(id_eliminado)
+            propio = self._id(entidad) if entidad is not None else id_eliminado
+            propios = {propio} if self._firma_estable else self._propios | {propio}
+            if len(propios) > MAX_PROPIOS:
+                self._recargar()
+                return
+            anterior = self._firma
+            firma, estable, ajenas = self._firma_tras_escritura(propios)
+            if ajenas or firma[1] != anterior[1] + delta:
+                self._recargar()
+                return
+            self._propios = propios if firma[0] == anterior[0] else {propio}
+            self._firma, self._firma_estable = firma, estable
+            self._ultimo_sondeo = time.monotonic()
+            self.version += 1
+    
+    def preload(self):
+        with self._lock:
+            self._recargar()
+    
+    def invalidate(self):
+        with self._lock:
+            self._cargado = False
+            self._ordenados = None
+            self.version += 1
+    
+    def get_all(self) -> list:
+        with self._lock:
+            self._contar(self._vigente())
+            if self._ordenados is None:
+                self._ordenados = sorted(self._por_id.values(),
+                                         key=lambda e: normalizar_nombre(e.nombre_completo))
+            return list(self._ordenados)
+    
+    def get_by_id(self, id_entidad: int):
+        with self._lock:
+            vigente = self._vigente()
+            entidad = self._por_id.get(id_entidad)
+            if entidad is not None or not vigente:
+                self._contar(vigente)
+                return entidad
+            self.misses += 1
+        entidad = super().get_by_id(id_entidad)
+        if entidad is not None:
+            with self._lock:
+                self._registrar(entidad)
+        return entidad
+    
+    def add(self, entidad) -> bool:
+        if not super().add(entidad):
+            return False
+        self._escritura_propia(entidad=entidad, delta=1)
+        return True
+    
+    def update(self, id_entidad: int, entidad) -> bool:
+        if not super().update(id_entidad, entidad):
+            return False
+        setattr(entidad, self.id_field, id_entidad)
+        self._escritura_propia(entidad=entidad)
+        return True
+    
+    def delete(self, id_entidad: int) -> bool:
+        if not super().delete(id_entidad):
+            return False
+        self._escritura_propia(id_eliminado=id_entidad, delta=-1)
+        return True
+    
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._por_id),
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'probes': self.probes,
+                'reloads': self.reloads,
+            }
+
+
+class CachedMedicoRepository(ReferenceCache, MedicoRepository):
+    table = 'medicos'
+    id_field = 'id_medico'
+    
+    def __init__(self, db_config: DatabaseBackend, probe_interval: float = 5.0, preload: bool = True):
+        MedicoRepository.__init__(self, db_config)
+        self._init_cache(probe_interval, preload)
+
+
+class CachedPacienteRepository(ReferenceCache, PacienteRepository):
+    table = 'pacientes'
+    id_field = 'id_paciente'
+    
+    def __init__(self, db_config: DatabaseBackend, probe_interval: float = 5.0, preload: bool = True):
+        PacienteRepository.__init__(self, db_config)
+        self._por_nombre: Dict[str, Paciente] = {}
+        self._init_cache(probe_interval, preload)
+    
+    def _limpiar_indices(self):
+        self._por_nombre.clear()
+    
+    def _indexar(self, entidad: Paciente):
+        self._por_nombre.setdefault(normalizar_nombre(entidad.nombre_completo), entidad)
+    
+    def _desindexar(self, entidad: Paciente):
+        normalizado = normalizar_nombre(entidad.nombre_completo)
+        if self._por_nombre.get(normalizado) is entidad:
+            del self._por_nombre[normalizado]
+    
+    def find_by_nombre(self, nombre: str) -> Optional[Paciente]:
+        with self._lock:
+            vigente = self._vigente()
+            paciente = self._por_nombre.get(normalizar_nombre(nombre))
+            if paciente is not None or not vigente:
+                self._contar(vigente)
+                return paciente
+            self.misses += 1
+        paciente = super().find_by_nombre(nombre)
+        if paciente is not None:
+            with self._lock:
+                self._registrar(paciente)
+        return paciente
+    
+    def get_or_create(self, nombre: str, telefono: str = "", email: str = "") -> Optional[Paciente]:
+        paciente = super().get_or_create(nombre, telefono, email)
+        if paciente is not None and paciente.id_paciente not in self._por_id:
+            self._escritura_propia(entidad=paciente, delta=1)
+        return paciente
@@ -0,0 +1,250 @@
+from array import array
+from datetime import date
+from functools import lru_cache
+from typing import Dict, List, Optional
+from .cita import Cita
+from .cita_batch import fecha_a_ordinal, hora_a_minutos
+from .database_backend import DatabaseBackend
+from .disponibilidad import PlantillaDia
+from .horario import DIAS_SEMANA
+
+np = None
+
+PROGRAMADA = Cita.ESTADOS.index('Programada')
+COMPLETADA = Cita.ESTADOS.index('Completada')
+CANCELADA = Cita.ESTADOS.index('Cancelada')
+SIN_ESPECIALIDAD = 'Sin especialidad'
+AGRUPACIONES = ('medico', 'especialidad')
+
+_codigos_estado = {estado: codigo for codigo, estado in enumerate(Cita.ESTADOS)}
+_ordinal = lru_cache(maxsize=8192)(fecha_a_ordinal)
+_minutos = lru_cache(maxsize=2048)(hora_a_minutos)
+
+
+def requiere_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Los reportes requieren NumPy. Instálelo con: pip install numpy")
+        np = numpy
+
+
+def validar_agrupacion(por: str):
+    if por not in AGRUPACIONES:
+        raise ValueError(f"Agrupación inválida '{por}'. Use {' o '.join(AGRUPACIONES)}")
+
+
+def _tasa(parte, total):
+    return np.divide(parte, total, out=np.zeros(len(parte)), where=total > 0)
+
+
+class Tabla:
+    __slots__ = ('titulo', 'columnas', 'filas')
+    
+    def __init__(self, titulo: str, columnas: List[str], filas: List[tuple]):
+        self.titulo = titulo
+        self.columnas = columnas
+        self.filas = filas
+    
+    def __len__(self):
+        return len(self.filas)
+    
+    def to_dicts(self) -> List[dict]:
+        return [dict(zip(self.columnas, fila)) for fila in self.filas]
+    
+    @staticmethod
+    def _celda(valor) -> str:
+        if isinstance(valor, float):
+            return f"{valor:.1%}"
+        return str(valor)
+    
+    def formatear(self) -> str:
+        celdas = [[self._celda(valor) for valor in fila] for fila in self.filas]
+        anchos = [max([len(columna)] + [len(fila[i]) for fila in celdas]) for i, columna in enumerate(self.columnas)]
+        lineas = [self.titulo, '  '.join(columna.ljust(ancho) for columna, ancho in zip(self.columnas, anchos))]
+        lineas.append('  '.join('-' * ancho for ancho in anchos))
+        for fila in celdas:
+            lineas.append('  '.join(valor.rjust(ancho) if i else valor.ljust(ancho)
+                                    for i, (valor, ancho) in enumerate(zip(fila, anchos))))
+        return '\n'.join(lineas)
+
+
+class HistorialCitas:
+    __slots__ = ('ids', 'medicos', 'fechas', 'minutos', 'estados', 'especialidades',
+                 'nombres_medico', 'nombres_especialidad', 'especialidad_medico', 'desde', 'hasta')
+    
+    def __init__(self, ids, medicos, fechas, minutos, estados, nombres_medico: Dict[int, str],
+                 especialidad_medico: Dict[int, str], desde: Optional[int] = None, hasta: Optional[int] = None):
+        requiere_numpy()
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.medicos = np.asarray(medicos, dtype=np.int32)
+        self.fechas = np.asarray(fechas, dtype=np.int32)
+        self.minutos = np.asarray(minutos, dtype=np.int16)
+        self.estados = np.asarray(estados, dtype=np.int8)
+        self.nombres_medico = nombres_medico
+        self.nombres_especialidad = sorted(set(especialidad_medico.values()) | {SIN_ESPECIALIDAD})
+        codigos = {nombre: codigo for codigo, nombre in enumerate(self.nombres_especialidad)}
+        self.especialidad_medico = {id_medico: codigos[nombre] for id_medico, nombre in especialidad_medico.items()}
+        tope = max([0, *self.especialidad_medico, int(self.medicos.max()) if len(self.medicos) else 0])
+        por_medico = np.full(tope + 1, codigos[SIN_ESPECIALIDAD], dtype=np.int16)
+        for id_medico, codigo in self.especialidad_medico.items():
+            por_medico[id_medico] = codigo
+        self.especialidades = por_medico[self.medicos]
+        if desde is None:
+            desde = int(self.fechas.min()) if len(self.fechas) else date.today().toordinal()
+        if hasta is None:
+            hasta = int(self.fechas.max()) if len(self.fechas) else desde
+        self.desde = desde
+        self.hasta = hasta
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    @classmethod
+    def cargar(cls, db_config: DatabaseBackend, desde: Optional[str] = None, hasta: Optional[str] = None,
+               batch_size: int = 5000) -> 'HistorialCitas':
+        requiere_numpy()
+        condiciones = []
+        params = []
+        if desde is not None:
+            condiciones.append("fecha >= %s")
+            params.append(str(desde))
+        if hasta is not None:
+            condiciones.append("fecha <= %s")
+            params.append(str(hasta))
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        query = f"SELECT id_cita, id_medico, fecha, hora, estado FROM citas {where}"
+        
+        ids, medicos, fechas, minutos, estados = array('q'), array('i'), array('i'), array('h'), array('b')
+        codigo_estado = _codigos_estado.get
+        for id_cita, id_medico, fecha, hora, estado in db_config.stream_query(query, tuple(params), batch_size,
+                                                                              dictionary=False):
+            ids.append(id_cita)
+            medicos.append(id_medico)
+            fechas.append(_ordinal(fecha))
+            minutos.append(_minutos(hora))
+            estados.append(codigo_estado(estado, PROGRAMADA))
+        
+        nombres = {}
+        especialidades = {}
+        for id_medico, nombre, especialidad in db_config.execute_query(
+                "SELECT id_medico, nombre_completo, especialidad FROM medicos", dictionary=False):
+            nombres[id_medico] = nombre
+            especialidades[id_medico] = (especialidad or '').strip() or SIN_ESPECIALIDAD
+        
+        return cls(
+            np.frombuffer(ids, dtype=np.int64), np.frombuffer(medicos, dtype=np.int32),
+            np.frombuffer(fechas, dtype=np.int32), np.frombuffer(minutos, dtype=np.int16),
+            np.frombuffer(estados, dtype=np.int8), nombres, especialidades,
+            fecha_a_ordinal(desde) if desde is not None else None,
+            fecha_a_ordinal(hasta) if hasta is not None else None
+        )
+    
+    def claves(self, por: str):
+        validar_agrupacion(por)
+        return self.medicos if por == 'medico' else self.especialidades
+    
+    def etiqueta(self, por: str, clave: int) -> str:
+        if por == 'medico':
+            return self.nombres_medico.get(clave, f"Médico {clave}")
+        return self.nombres_especialidad[clave]
+    
+    def dias_semana(self):
+        ordinales = np.arange(self.desde, self.hasta + 1)
+        return np.bincount((ordinales - 1) % 7, minlength=7)
+
+
+def tasas(historial: HistorialCitas, por: str = 'medico', hoy: Optional[date] = None) -> Tabla:
+    claves = historial.claves(por)
+    grupos, inverso = np.unique(claves, return_inverse=True)
+    n = len(grupos)
+    hoy = (hoy or date.today()).toordinal()
+    pasadas = historial.fechas < hoy
+    canceladas = historial.estados == CANCELADA
+    
+    total = np.bincount(inverso, minlength=n)
+    completadas = np.bincount(inverso[historial.estados == COMPLETADA], minlength=n)
+    cancelaciones = np.bincount(inverso[canceladas], minlength=n)
+    atendibles = np.bincount(inverso[pasadas & ~canceladas], minlength=n)
+    inasistencias = np.bincount(inverso[pasadas & (historial.estados == PROGRAMADA)], minlength=n)
+    tasa_cancelacion = _tasa(cancelaciones, total)
+    tasa_inasistencia = _tasa(inasistencias, atendibles)
+    
+    filas = [
+        (historial.etiqueta(por, int(grupos[i])), int(total[i]), int(completadas[i]), int(cancelaciones[i]),
+         int(inasistencias[i]), float(tasa_cancelacion[i]), float(tasa_inasistencia[i]))
+        for i in np.argsort(-tasa_cancelacion, kind='stable')
+    ]
+    columnas = ['Médico' if por == 'medico' else 'Especialidad', 'Citas', 'Completadas', 'Canceladas',
+                'Inasistencias', 'Cancelación', 'Inasistencia']
+    return Tabla(f"Cancelaciones e inasistencias por {por}", columnas, filas)
+
+
+def utilizacion(historial: HistorialCitas, plantillas: Dict[int, Dict[int, PlantillaDia]],
+                por: str = 'medico') -> Tabla:
+    validar_agrupacion(por)
+    ids_medicos = sorted(set(plantillas) | set(int(m) for m in np.unique(historial.medicos)))
+    posicion = {id_medico: i for i, id_medico in enumerate(ids_medicos)}
+    turnos = np.zeros((len(ids_medicos), 7), dtype=np.int64)
+    for id_medico, semanal in plantillas.items():
+        for dia, plantilla in semanal.items():
+            turnos[posicion[id_medico], dia] = len(plantilla.inicios)
+    capacidad = turnos @ historial.dias_semana()
+    
+    activas = historial.estados != CANCELADA
+    lookup = np.zeros(max(ids_medicos, default=0) + 1, dtype=np.int64)
+    lookup[ids_medicos] = np.arange(len(ids_medicos))
+    ocupadas = np.bincount(lookup[historial.medicos[activas]], minlength=len(ids_medicos))
+    
+    if por == 'especialidad':
+        codigo_sin = historial.nombres_especialidad.index(SIN_ESPECIALIDAD)
+        codigos = np.array([historial.especialidad_medico.get(m, codigo_sin) for m in ids_medicos], dtype=np.int64)
+        n = len(historial.nombres_especialidad)
+        capacidad = np.bincount(codigos, weights=capacidad, minlength=n).astype(np.int64)
+        ocupadas = np.bincount(codigos, weights=ocupadas, minlength=n).astype(np.int64)
+        grupos = range(n)
+    else:
+        grupos = ids_medicos
+    
+    tasa = _tasa(ocupadas, capacidad)
+    filas = [
+        (historial.etiqueta(por, int(grupo)), int(ocupadas[i]), int(capacidad[i]), float(tasa[i]))
+        for i, grupo in enumerate(grupos) if capacidad[i] or ocupadas[i]
+    ]
+    filas.sort(key=lambda fila: fila[3], reverse=True)
+    columnas = ['Médico' if por == 'medico' else 'Especialidad', 'Ocupados', 'Disponibles', 'Utilización']
+    return Tabla(f"Utilización de la agenda por {por}", columnas, filas)
+
+
+def mapa_horas(historial: HistorialCitas, especialidad: Optional[str] = None) -> Tabla:
+    activas = historial.estados != CANCELADA
+    if especialidad is not None:
+        if especialidad not in historial.nombres_especialidad:
+            raise ValueError(f"Especialidad desconocida '{especialidad}'")
+        activas &= historial.especialidades == historial.nombres_especialidad.index(especialidad)
+    dias = (historial.fechas[activas] - 1) % 7
+    horas = historial.minutos[activas] // 60
+    mapa = np.bincount(dias * 24 + horas, minlength=7 * 24).reshape(7, 24)
+    
+    ocupadas = np.flatnonzero(mapa.sum(axis=0))
+    if len(ocupadas):
+        rango = range(int(ocupadas[0]), int(ocupadas[-1]) + 1)
+    else:
+        rango = range(0)
+    filas = [
+        (DIAS_SEMANA[dia],) + tuple(int(mapa[dia, hora]) for hora in rango) + (int(mapa[dia].sum()),)
+        for dia in range(7)
+    ]
+    titulo = "Citas por día y hora" + (f" ({especialidad})" if especialidad else "")
+    return Tabla(titulo, ['Día'] + [f"{hora:02d}h" for hora in rango] + ['Total'], filas)
+
+
+def resumen_periodo(historial: HistorialCitas, plantillas: Dict[int, Dict[int, PlantillaDia]],
+                    por: str = 'especialidad', hoy: Optional[date] = None) -> Dict[str, Tabla]:
+    return {
+        'tasas': tasas(historial, por, hoy),
+        'utilizacion': utilizacion(historial, plantillas, por),
+        'horas': mapa_horas(historial),
+    }
@@ -0,0 +1,127 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from .cita import Cita
+from .database_backend import DatabaseBackend
+
+ClaveResumen = Tuple[int, str, str]
+
+COLUMNAS_RESUMEN = ('id_medico', 'fecha', 'estado')
+
+RECONSTRUIR_RESUMEN = """
+        INSERT INTO resumen_citas (id_medico, fecha, estado, total)
+        SELECT id_medico, fecha, estado, COUNT(*)
+        FROM citas
+        GROUP BY id_medico, fecha, estado
+        """
+
+
+def clave_resumen(cita: Cita) -> ClaveResumen:
+    return int(cita.id_medico), str(cita.fecha)[:10], cita.estado
+
+
+def cambios(anteriores: Iterable[Optional[ClaveResumen]] = (),
+            nuevas: Iterable[Optional[ClaveResumen]] = ()) -> Dict[ClaveResumen, int]:
+    deltas: Dict[ClaveResumen, int] = defaultdict(int)
+    for clave in anteriores:
+        if clave is not None:
+            deltas[clave] -= 1
+    for clave in nuevas:
+        if clave is not None:
+            deltas[clave] += 1
+    return {clave: delta for clave, delta in deltas.items() if delta}
+
+
+class ResumenCitas:
+    def __init__(self, db_config: DatabaseBackend):
+        self.db_config = db_config
+        self.disponible = self.db_config.table_exists('resumen_citas')
+        self._incrementar = self.db_config.increment_query('resumen_citas', COLUMNAS_RESUMEN, 'total')
+    
+    def inicializar(self) -> bool:
+        if not self.disponible:
+            return False
+        if self.db_config.execute_query("SELECT 1 FROM resumen_citas LIMIT 1", dictionary=False):
+            return False
+        if not self.db_config.execute_query("SELECT 1 FROM citas LIMIT 1", dictionary=False):
+            return False
+        self.reconstruir()
+        return True
+    
+    def leer(self, cursor, id_cita: int) -> Optional[ClaveResumen]:
+        cursor.execute(
+            f"SELECT id_medico, fecha, estado FROM citas WHERE id_cita = %s{self.db_config.row_lock}",
+            (id_cita,)
+        )
+        filas = cursor.fetchall()
+        if not filas:
+            return None
+        return int(filas[0][0]), str(filas[0][1])[:10], filas[0][2]
+    
+    def aplicar(self, cursor, deltas: Dict[ClaveResumen, int]):
+        if not deltas:
+            return
+        claves = sorted(deltas)
+        cursor.executemany(self._incrementar, [clave + (deltas[clave],) for clave in claves])
+        vaciadas = [clave for clave in claves if deltas[clave] < 0]
+        if vaciadas:
+            cursor.executemany(
+                "DELETE FROM resumen_citas WHERE id_medico = %s AND fecha = %s AND estado = %s AND total <= 0",
+                vaciadas
+            )
+    
+    def reconstruir(self) -> int:
+        with self.db_config.transaction() as (connection, cursor):
+            cursor.execute("DELETE FROM resumen_citas")
+            cursor.execute(RECONSTRUIR_RESUMEN)
+            cursor.execute("SELECT COUNT(*) FROM resumen_citas")
+            return cursor.fetchall()[0][0]
+    
+    def verificar(self) -> List[dict]:
+        with self.db_config.transaction() as (connection, cursor):
+            cursor.execute(
+                "SELECT id_medico, fecha, estado, COUNT(*) FROM citas GROUP BY id_medico, fecha, estado"
+            )
+            esperado = {(int(f[0]), str(f[1])[:10], f[2]): int(f[3]) for f in cursor.fetchall()}
+            cursor.execute("SELECT id_medico, fecha, estado, total FROM resumen_citas")
+            registrado = {(int(f[0]), str(f[1])[:10], f[2]): int(f[3]) for f in cursor.fetchall()}
+        diferencias = []
+        for clave in sorted(esperado.keys() | registrado.keys()):
+            if esperado.get(clave, 0) != registrado.get(clave, 0):
+                id_medico, fecha, estado = clave
+                diferencias.append({
+                    'id_medico': id_medico,
+                    'fecha': fecha,
+                    'estado': estado,
+                    'esperado': esperado.get(clave, 0),
+                    'registrado': registrado.get(clave, 0),
+                })
+        return diferencias
+    
+    def totales(self, agrupar: Tuple[str, ...] = COLUMNAS_RESUMEN, desde: Optional[str] = None,
+                hasta: Optional[str] = None, id_medico: Optional[int] = None) -> List[dict]:
+        columnas = [columna for columna in agrupar if columna in COLUMNAS_RESUMEN]
+        condiciones = []
+        params = []
+        if desde is not None:
+            condiciones.append("fecha >= %s")
+            params.append(str(desde))
+        if hasta is not None:
+            condiciones.append("fecha <= %s")
+            params.append(str(hasta))
+        if id_medico is not None:
+            condiciones.append("id_medico = %s")
+            params.append(id_medico)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        tabla, total = ('resumen_citas', 'SUM(total)') if self.disponible else ('citas', 'COUNT(*)')
+        seleccion = ', '.join(columnas + [f"{total} AS total"])
+        agrupacion = f"GROUP BY {', '.join(columnas)} ORDER BY {', '.join(columnas)}" if columnas else ""
+        query = f"SELECT {seleccion} FROM {tabla} {where} {agrupacion}"
+        filas = []
+        for fila in self.db_config.execute_query(query, tuple(params)):
+            if fila['total'] is None:
+                continue
+            fila['total'] = int(fila['total'])
+            if 'fecha' in fila:
+                fila['fecha'] = str(fila['fecha'])[:10]
+            filas.append(fila)
+        return filas
@@ -0,0 +1,209 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .cita import Cita
+from .cita_repository import CitaRepository
+from .observer import Observer
+from .slot_index import normalizar_hora
+
+FORMATO_MARCA = '%Y-%m-%d %H:%M:%S'
+
+SELECT_CAMBIOS = """
+        SELECT c.id_cita, c.id_paciente, c.id_medico, c.fecha, c.hora, c.estado,
+               p.nombre_completo AS nombre_paciente, m.nombre_completo AS nombre_medico,
+               c.created_at, c.updated_at
+        FROM citas c
+        INNER JOIN pacientes p ON c.id_paciente = p.id_paciente
+        INNER JOIN medicos m ON c.id_medico = m.id_medico
+        WHERE c.updated_at >= %s
+        ORDER BY c.updated_at, c.id_cita
+        """
+
+SELECT_ELIMINADAS = """
+        SELECT id_cita, id_paciente, id_medico, fecha, hora, estado, eliminado_en
+        FROM citas_eliminadas
+        WHERE eliminado_en >= %s
+        ORDER BY eliminado_en, id_cita
+        """
+
+
+def a_marca(valor) -> datetime:
+    if isinstance(valor, datetime):
+        return valor.replace(microsecond=0)
+    return datetime.fromisoformat(str(valor)[:19])
+
+
+def firma(cita: Cita) -> tuple:
+    return (int(cita.id_paciente), int(cita.id_medico), str(cita.fecha)[:10],
+            normalizar_hora(cita.hora), cita.estado)
+
+
+class SincronizadorCitas(Observer):
+    def __init__(self, repository: CitaRepository, intervalo: float = 2.0, margen: float = 5.0,
+                 retencion_dias: int = 7):
+        self.repository = repository
+        self.db_config = repository.db_config
+        self.intervalo = intervalo
+        self.margen = timedelta(seconds=margen)
+        self.retencion = timedelta(days=retencion_dias)
+        self.disponible = 'updated_at' in self.db_config.get_columns('citas')
+        self._marca: Optional[datetime] = None
+        self._vistos: Dict[int, Tuple[tuple, datetime]] = {}
+        self._eliminados: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._ultima_purga = 0.0
+        self._sondeos = 0
+        self._filas = 0
+        self._remotos = 0
+        self._recargas = 0
+        self._ultimo_ms = 0.0
+    
+    def _ahora(self) -> datetime:
+        return a_marca(self.db_config.execute_query("SELECT CURRENT_TIMESTAMP", dictionary=False)[0][0])
+    
+    def marcar(self) -> datetime:
+        ahora = self._ahora()
+        with self._lock:
+            self._marca = ahora
+        return ahora
+    
+    def iniciar(self) -> bool:
+        if not self.disponible:
+            print("⚠ La tabla 'citas' no tiene la columna updated_at; sincronización desactivada")
+            return False
+        if self._hilo is not None:
+            return True
+        if not self.repository.tombstones:
+            print("⚠ La tabla 'citas_eliminadas' no existe; las eliminaciones de otros equipos no se verán")
+        with self._lock:
+            marcado = self._marca is not None
+        if not marcado:
+            self.marcar()
+        self.sincronizar(notificar=marcado)
+        self.repository.attach(self)
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name='citas-sincronizacion', daemon=True)
+        self._hilo.start()
+        return True
+    
+    def detener(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join(self.intervalo + 5)
+            self._hilo = None
+        self.repository.detach(self)
+    
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                if time.monotonic() - self._ultima_purga > 3600:
+                    self.purgar()
+                self.sincronizar()
+            except Exception as e:
+                print(f"Error sincronizando citas: {e}")
+    
+    def update(self, message: str, data=None):
+        citas = data if message == 'citas_importadas' else [data]
+        with self._lock:
+            marca = self._marca or datetime.min
+            for cita in citas or ():
+                if not isinstance(cita, Cita) or cita.id_cita is None:
+                    continue
+                if message == 'cita_eliminada':
+                    self._vistos.pop(cita.id_cita, None)
+                    self._eliminados[cita.id_cita] = marca
+                else:
+                    self._vistos[cita.id_cita] = (firma(cita), marca)
+    
+    def sincronizar(self, notificar: bool = True) -> int:
+        inicio = time.perf_counter()
+        ahora = self._ahora()
+        with self._lock:
+            anterior = self._marca or ahora
+        if ahora - anterior > self.retencion:
+            self._recargar(ahora)
+            return 0
+        desde = anterior - self.margen
+        params = (desde.strftime(FORMATO_MARCA),)
+        filas = self.db_config.execute_query(SELECT_CAMBIOS, params, dictionary=False)
+        eliminadas = []
+        if self.repository.tombstones:
+            eliminadas = self.db_config.execute_query(SELECT_ELIMINADAS, params, dictionary=False)
+        
+        eventos: List[Tuple[str, Cita]] = []
+        decoder = self.repository.decoder
+        with self._lock:
+            for fila in eliminadas:
+                id_cita = fila[0]
+                conocida = id_cita in self._eliminados
+                self._eliminados[id_cita] = a_marca(fila[6])
+                if conocida:
+                    continue
+                self._vistos.pop(id_cita, None)
+                eventos.append(('cita_eliminada', decoder.decode(tuple(fila[:6]) + (None, None))))
+            for fila in filas:
+                cita = decoder.decode(fila[:8])
+                if cita.id_cita in self._eliminados:
+                    continue
+                creada, marca = a_marca(fila[8]), a_marca(fila[9])
+                actual = firma(cita)
+                visto = self._vistos.get(cita.id_cita)
+                self._vistos[cita.id_cita] = (actual, marca)
+                if visto is not None and visto[0] == actual:
+                    continue
+                if visto is None and creada >= desde:
+                    eventos.append(('cita_agregada', cita))
+                elif cita.estado == 'Cancelada' and (visto is None or visto[0][4] != 'Cancelada'):
+                    eventos.append(('cita_cancelada', cita))
+                else:
+                    eventos.append(('cita_actualizada', cita))
+            self._vistos = {id_cita: visto for id_cita, visto in self._vistos.items() if visto[1] >= desde}
+            self._eliminados = {id_cita: marca for id_cita, marca in self._eliminados.items() if marca >= desde}
+            self._marca = ahora
+            self._sondeos += 1
+            self._filas += len(filas) + len(eliminadas)
+            self._remotos += len(eventos) if notificar else 0
+            self._ultimo_ms = (time.perf_counter() - inicio) * 1000
+        
+        if not notificar:
+            return 0
+        for message, cita in eventos:
+            self.repository.notify(message, cita)
+        return len(eventos)
+    
+    def _recargar(self, ahora: datetime):
+        with self._lock:
+            self._vistos.clear()
+            self._eliminados.clear()
+            self._marca = ahora
+            self._recargas += 1
+        if self.repository.slot_index is not None:
+            self.repository.disable_slot_index()
+            self.repository.enable_slot_index()
+        self.repository.notify('citas_sincronizadas')
+    
+    def purgar(self) -> int:
+        self._ultima_purga = time.monotonic()
+        if not self.repository.tombstones:
+            return 0
+        limite = (self._ahora() - self.retencion).strftime(FORMATO_MARCA)
+        with self.db_config.connection() as (connection, cursor):
+            cursor.execute("DELETE FROM citas_eliminadas WHERE eliminado_en < %s", (limite,))
+            eliminadas = cursor.rowcount
+            self.db_config.commit(connection)
+        return eliminadas
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'sondeos': self._sondeos,
+                'filas_leidas': self._filas,
+                'cambios_remotos': self._remotos,
+                'recargas': self._recargas,
+                'marca': self._marca.strftime(FORMATO_MARCA) if self._marca else None,
+                'seguimiento': len(self._vistos) + len(self._eliminados),
+                'ultimo_ms': self._ultimo_ms,
+            }
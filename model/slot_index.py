@@ -0,0 +1,108 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from .cita import Cita
+from .observer import Observer
+
+
+def normalizar_hora(hora: str) -> str:
+    partes = str(hora).split(':')
+    if len(partes) < 2:
+        return str(hora)
+    try:
+        return f"{int(partes[0]):02d}:{int(partes[1]):02d}"
+    except ValueError:
+        return str(hora)
+
+
+class SlotOccupancyIndex(Observer):
+    def __init__(self):
+        self._medicos: Dict[Tuple[str, str, int], int] = {}
+        self._pacientes: Dict[Tuple[str, str, int], int] = {}
+        self._citas: Dict[int, Tuple[Tuple[str, str, int], Tuple[str, str, int]]] = {}
+        self._pendientes: List[Tuple[str, object]] = []
+        self._lock = threading.Lock()
+        self.loaded = False
+    
+    @staticmethod
+    def _claves(cita: Cita):
+        fecha = str(cita.fecha)
+        hora = normalizar_hora(cita.hora)
+        return (fecha, hora, cita.id_medico), (fecha, hora, cita.id_paciente)
+    
+    def load(self, citas: Iterable[Cita]):
+        with self._lock:
+            self._medicos.clear()
+            self._pacientes.clear()
+            self._citas.clear()
+            for cita in citas:
+                self._agregar(cita)
+            pendientes, self._pendientes = self._pendientes, []
+            for message, data in pendientes:
+                self._aplicar(message, data)
+            self.loaded = True
+    
+    def _agregar(self, cita: Cita):
+        if cita.estado == 'Cancelada' or cita.id_cita is None:
+            return
+        clave_medico, clave_paciente = self._claves(cita)
+        self._medicos[clave_medico] = cita.id_cita
+        self._pacientes[clave_paciente] = cita.id_cita
+        self._citas[cita.id_cita] = (clave_medico, clave_paciente)
+    
+    def _quitar(self, id_cita: int):
+        claves = self._citas.pop(id_cita, None)
+        if not claves:
+            return
+        clave_medico, clave_paciente = claves
+        if self._medicos.get(clave_medico) == id_cita:
+            del self._medicos[clave_medico]
+        if self._pacientes.get(clave_paciente) == id_cita:
+            del self._pacientes[clave_paciente]
+    
+    def registrar(self, cita: Cita):
+        with self._lock:
+            if cita.id_cita is not None:
+                self._quitar(cita.id_cita)
+            self._agregar(cita)
+    
+    def quitar(self, id_cita: int):
+        with self._lock:
+            self._quitar(id_cita)
+    
+    def conflicto(self, cita: Cita, excluir_id: Optional[int] = None) -> Optional[str]:
+        if cita.estado == 'Cancelada':
+            return None
+        clave_medico, clave_paciente = self._claves(cita)
+        with self._lock:
+            ocupante = self._medicos.get(clave_medico)
+            if ocupante is not None and ocupante != excluir_id:
+                return "medico_ocupado"
+            ocupante = self._pacientes.get(clave_paciente)
+            if ocupante is not None and ocupante != excluir_id:
+                return "paciente_ocupado"
+        return None
+    
+    def __len__(self):
+        return len(self._citas)
+    
+    def _aplicar(self, message: str, data):
+        if message == 'citas_importadas':
+            for cita in data or ():
+                if cita.id_cita is not None:
+                    self._quitar(cita.id_cita)
+                self._agregar(cita)
+            return
+        if not isinstance(data, Cita) or data.id_cita is None:
+            return
+        if message in ('cita_agregada', 'cita_actualizada'):
+            self._quitar(data.id_cita)
+            self._agregar(data)
+        elif message in ('cita_eliminada', 'cita_cancelada'):
+            self._quitar(data.id_cita)
+    
+    def update(self, message: str, data=None):
+        with self._lock:
+            if not self.loaded:
+                self._pendientes.append((message, data))
+                return
+            self._aplicar(message, data)
@@ -0,0 +1,435 @@
+import itertools
+import os
+import re
+import sqlite3
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+from .database_backend import DatabaseBackend
+from .paciente import normalizar_nombre
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pacientes (
+    id_paciente INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre_completo TEXT NOT NULL COLLATE NOCASE,
+    nombre_normalizado TEXT DEFAULT NULL,
+    telefono TEXT DEFAULT NULL,
+    email TEXT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_pacientes_nombre ON pacientes (nombre_completo);
+
+CREATE TABLE IF NOT EXISTS medicos (
+    id_medico INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre_completo TEXT NOT NULL COLLATE NOCASE,
+    especialidad TEXT DEFAULT NULL,
+    telefono TEXT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_medicos_nombre ON medicos (nombre_completo);
+CREATE INDEX IF NOT EXISTS idx_medicos_especialidad ON medicos (especialidad);
+
+CREATE TABLE IF NOT EXISTS citas (
+    id_cita INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_paciente INTEGER NOT NULL,
+    id_medico INTEGER NOT NULL,
+    fecha DATE NOT NULL,
+    hora TIME NOT NULL,
+    estado TEXT NOT NULL DEFAULT 'Programada',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (id_paciente) REFERENCES pacientes(id_paciente)
+        ON DELETE RESTRICT ON UPDATE RESTRICT,
+    FOREIGN KEY (id_medico) REFERENCES medicos(id_medico)
+        ON DELETE RESTRICT ON UPDATE RESTRICT
+);
+CREATE INDEX IF NOT EXISTS idx_fecha_hora_medico ON citas (fecha, hora, id_medico);
+CREATE INDEX IF NOT EXISTS idx_fecha_hora_paciente ON citas (fecha, hora, id_paciente);
+CREATE INDEX IF NOT EXISTS idx_fecha_hora ON citas (fecha, hora, id_cita);
+CREATE INDEX IF NOT EXISTS idx_estado ON citas (estado);
+CREATE INDEX IF NOT EXISTS idx_fecha ON citas (fecha);
+CREATE INDEX IF NOT EXISTS idx_updated_at ON citas (updated_at);
+
+CREATE TABLE IF NOT EXISTS horarios_medicos (
+    id_horario INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_medico INTEGER NOT NULL,
+    dia_semana INTEGER NOT NULL CHECK (dia_semana BETWEEN 0 AND 6),
+    hora_inicio TIME NOT NULL,
+    hora_fin TIME NOT NULL,
+    duracion_minutos INTEGER NOT NULL DEFAULT 20 CHECK (duracion_minutos > 0),
+    FOREIGN KEY (id_medico) REFERENCES medicos(id_medico)
+        ON DELETE CASCADE ON UPDATE RESTRICT
+);
+CREATE INDEX IF NOT EXISTS idx_horarios_medico_dia ON horarios_medicos (id_medico, dia_semana);
+
+CREATE TABLE IF NOT EXISTS resumen_citas (
+    id_medico INTEGER NOT NULL,
+    fecha DATE NOT NULL,
+    estado TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (id_medico, fecha, estado)
+);
+CREATE INDEX IF NOT EXISTS idx_resumen_fecha ON resumen_citas (fecha, id_medico);
+
+CREATE TABLE IF NOT EXISTS citas_eliminadas (
+    id_cita INTEGER PRIMARY KEY,
+    id_paciente INTEGER NOT NULL,
+    id_medico INTEGER NOT NULL,
+    fecha DATE NOT NULL,
+    hora TIME NOT NULL,
+    estado TEXT NOT NULL,
+    eliminado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_eliminado_en ON citas_eliminadas (eliminado_en);
+
+CREATE TABLE IF NOT EXISTS metadatos (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL,
+    actualizado_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_pacientes_updated_at AFTER UPDATE ON pacientes
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE pacientes SET updated_at = CURRENT_TIMESTAMP WHERE id_paciente = NEW.id_paciente;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_medicos_updated_at AFTER UPDATE ON medicos
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE medicos SET updated_at = CURRENT_TIMESTAMP WHERE id_medico = NEW.id_medico;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_citas_updated_at AFTER UPDATE ON citas
+FOR EACH ROW WHEN NEW.updated_at = OLD.updated_at
+BEGIN
+    UPDATE citas SET updated_at = CURRENT_TIMESTAMP WHERE id_cita = NEW.id_cita;
+END;
+"""
+
+SLOT_CONSTRAINTS = """
+CREATE UNIQUE INDEX IF NOT EXISTS uq_slot_paciente ON citas (fecha, hora, id_paciente)
+    WHERE estado <> 'Cancelada';
+CREATE UNIQUE INDEX IF NOT EXISTS uq_slot_medico ON citas (fecha, hora, id_medico)
+    WHERE estado <> 'Cancelada';
+"""
+
+PACIENTES_NOMBRE_NORMALIZADO = """
+UPDATE pacientes SET nombre_normalizado = normalizar_nombre(nombre_completo)
+    WHERE nombre_normalizado IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pacientes_nombre_normalizado ON pacientes (nombre_normalizado);
+"""
+
+SEED_DATA = """
+INSERT INTO pacientes (nombre_completo, telefono, email) VALUES
+('María López García', '555-1234', 'maria.lopez@email.com'),
+('Juan Pérez Martínez', '555-5678', 'juan.perez@email.com'),
+('Ana Rodríguez Sánchez', '555-9012', 'ana.rodriguez@email.com'),
+('Carlos González Torres', '555-3456', 'carlos.gonzalez@email.com'),
+('Laura Fernández Díaz', '555-7890', 'laura.fernandez@email.com');
+
+INSERT INTO medicos (nombre_completo, especialidad, telefono) VALUES
+('Dr. Roberto Martínez', 'Cardiología', '555-1001'),
+('Dra. Carmen Sánchez', 'Pediatría', '555-1002'),
+('Dr. Luis Fernández', 'Medicina General', '555-1003'),
+('Dra. Patricia Gómez', 'Ginecología', '555-1004'),
+('Dr. Miguel Torres', 'Dermatología', '555-1005');
+
+INSERT INTO citas (id_paciente, id_medico, fecha, hora, estado) VALUES
+(1, 1, '2024-12-20', '10:00', 'Programada'),
+(2, 2, '2024-12-20', '11:00', 'Programada'),
+(3, 3, '2024-12-21', '09:00', 'Programada'),
+(1, 4, '2024-12-22', '14:00', 'Programada'),
+(4, 5, '2024-12-20', '15:00', 'Completada');
+"""
+
+_PLACEHOLDER = re.compile(r"%s")
+_UNIQUE_FAILED = 'UNIQUE constraint failed: '
+_memory_ids = itertools.count(1)
+
+
+def _format_time(value) -> str:
+    if isinstance(value, timedelta):
+        total = int(value.total_seconds())
+        value = time(total // 3600 % 24, total // 60 % 60, total % 60)
+    return value.strftime('%H:%M:%S' if value.second else '%H:%M')
+
+
+def _format_datetime(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+@lru_cache(maxsize=4096)
+def _convert_date(raw: str) -> date:
+    return date.fromisoformat(raw[:10])
+
+
+@lru_cache(maxsize=4096)
+def _convert_time(raw: str) -> timedelta:
+    partes = raw.split(':')
+    horas, minutos = int(partes[0]), int(partes[1])
+    segundos = int(float(partes[2])) if len(partes) > 2 else 0
+    return timedelta(hours=horas, minutes=minutos, seconds=segundos)
+
+
+def _convert_timestamp(raw: str) -> datetime:
+    return datetime.fromisoformat(raw)
+
+
+ADAPTERS = {
+    date: date.isoformat,
+    datetime: _format_datetime,
+    time: _format_time,
+    timedelta: _format_time,
+}
+
+CONVERTERS = {
+    'fecha': _convert_date,
+    'hora': _convert_time,
+    'hora_inicio': _convert_time,
+    'hora_fin': _convert_time,
+    'created_at': _convert_timestamp,
+    'updated_at': _convert_timestamp,
+    'eliminado_en': _convert_timestamp,
+    'actualizado_en': _convert_timestamp,
+}
+
+
+def adapt_params(params) -> tuple:
+    if not params:
+        return ()
+    adapter = ADAPTERS.get
+    return tuple(value if (convert := adapter(value.__class__)) is None else convert(value) for value in params)
+
+
+@lru_cache(maxsize=256)
+def row_converter(columns: Tuple[str, ...]) -> Optional[Callable]:
+    conversions = tuple((i, CONVERTERS[name]) for i, name in enumerate(columns) if name in CONVERTERS)
+    if not conversions:
+        return None
+    
+    def convert_row(cursor, row):
+        row = list(row)
+        for i, convert in conversions:
+            value = row[i]
+            if value.__class__ is str:
+                row[i] = convert(value)
+        return tuple(row)
+    
+    return convert_row
+
+
+@lru_cache(maxsize=256)
+def translate_query(query: str) -> str:
+    return _PLACEHOLDER.sub('?', query)
+
+
+class SQLiteCursor:
+    def __init__(self, cursor: sqlite3.Cursor, dictionary: bool = False):
+        self._cursor = cursor
+        self.dictionary = dictionary
+    
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+    
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+    
+    @property
+    def description(self):
+        return self._cursor.description
+    
+    @property
+    def column_names(self):
+        return tuple(col[0] for col in self._cursor.description or ())
+    
+    def execute(self, query: str, params=None):
+        cursor = self._cursor
+        cursor.execute(translate_query(query), adapt_params(params))
+        cursor.row_factory = row_converter(self.column_names) if cursor.description else None
+        return self
+    
+    def executemany(self, query: str, seq_params):
+        self._cursor.executemany(translate_query(query), (adapt_params(params) for params in seq_params))
+        return self
+    
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+    
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+    
+    def fetchmany(self, size: int = 1):
+        rows = self._cursor.fetchmany(size)
+        if not self.dictionary:
+            return rows
+        columnas = self.column_names
+        return [dict(zip(columnas, row)) for row in rows]
+    
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if not self.dictionary:
+            return rows
+        columnas = self.column_names
+        return [dict(zip(columnas, row)) for row in rows]
+    
+    def __iter__(self):
+        for row in self._cursor:
+            yield self._row(row)
+    
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConfig(DatabaseBackend):
+    backend_name = 'SQLite'
+    error_class = sqlite3.Error
+    
+    def __init__(self,
+                 database: str = 'citas_medicas.db',
+                 pool_size: int = 0,
+                 pool_timeout: float = 10.0,
+                 pool_idle_timeout: float = 300.0,
+                 pool_health_check_interval: float = 30.0,
+                 seed: bool = True,
+                 busy_timeout: float = 5.0,
+                 prepared_statements: bool = False,
+                 statement_cache_size: int = 32):
+        self.in_memory = database == ':memory:'
+        if self.in_memory:
+            pool_size = 0
+        super().__init__(
+            database,
+            pool_size=pool_size,
+            pool_timeout=pool_timeout,
+            pool_idle_timeout=pool_idle_timeout,
+            pool_health_check_interval=pool_health_check_interval,
+            prepared_statements=prepared_statements,
+            statement_cache_size=statement_cache_size
+        )
+        self.hold_connection = self.in_memory
+        self.seed = seed
+        self.busy_timeout = busy_timeout
+        self._unique_indexes = {}
+        self._uri = f"file:citas_medicas_{next(_memory_ids)}?mode=memory&cache=shared" if self.in_memory else None
+    
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._uri or self.database,
+            uri=self._uri is not None,
+            timeout=self.busy_timeout,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=max(self.statement_cache_size, 128)
+        )
+        connection.execute("PRAGMA foreign_keys = ON")
+        if not self.in_memory:
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+    
+    def _is_alive(self, connection) -> bool:
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except sqlite3.ProgrammingError:
+            return False
+    
+    def _open_cursor(self, connection, dictionary: bool = False) -> SQLiteCursor:
+        return SQLiteCursor(connection.cursor(), dictionary=dictionary)
+    
+    def _begin(self, connection):
+        connection.execute("BEGIN IMMEDIATE")
+    
+    def create_database_if_not_exists(self):
+        try:
+            if not self.in_memory:
+                directorio = os.path.dirname(os.path.abspath(self.database))
+                os.makedirs(directorio, exist_ok=True)
+            connection = self.acquire_connection()
+            try:
+                nueva = not self._table_exists(connection, 'citas')
+                connection.executescript(SCHEMA)
+                try:
+                    connection.executescript(SLOT_CONSTRAINTS)
+                except sqlite3.IntegrityError as e:
+                    print(f"⚠ No se pudieron crear las restricciones de horario: {e}")
+                if nueva and self.seed:
+                    connection.executescript(f"BEGIN;{SEED_DATA}COMMIT;")
+                columnas = [col[1] for col in connection.execute("PRAGMA table_info(pacientes)")]
+                if 'nombre_normalizado' not in columnas:
+                    connection.execute("ALTER TABLE pacientes ADD COLUMN nombre_normalizado TEXT DEFAULT NULL")
+                connection.create_function('normalizar_nombre', 1, normalizar_nombre, deterministic=True)
+                try:
+                    connection.executescript(PACIENTES_NOMBRE_NORMALIZADO)
+                except sqlite3.IntegrityError as e:
+                    print(f"⚠ Hay pacientes con nombres duplicados; no se creó el índice único: {e}")
+            finally:
+                self.release_connection(connection)
+            print(f"✓ Base de datos '{self.database}' verificada/creada")
+        except sqlite3.Error as e:
+            print(f"Error creando base de datos: {e}")
+            raise
+    
+    @staticmethod
+    def _table_exists(connection, table: str) -> bool:
+        row = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        return row is not None
+    
+    def _fetch_tables(self) -> List[str]:
+        with self.connection() as (connection, cursor):
+            return [row[0] for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+    
+    def _fetch_table_exists(self, table: str) -> bool:
+        with self.connection() as (connection, cursor):
+            return self._table_exists(connection, table)
+    
+    def _fetch_columns(self, table: str) -> List[str]:
+        with self.connection() as (connection, cursor):
+            return [col[1] for col in connection.execute(f"PRAGMA table_info({table})")]
+    
+    def _fetch_indexes(self, table: str) -> List[str]:
+        with self.connection() as (connection, cursor):
+            return [row[1] for row in connection.execute(f"PRAGMA index_list({table})")]
+    
+    def _load_unique_indexes(self, table: str) -> dict:
+        indexes = {}
+        with self.connection() as (connection, cursor):
+            for row in connection.execute(f"PRAGMA index_list({table})").fetchall():
+                nombre, unico = row[1], row[2]
+                if not unico:
+                    continue
+                columnas = tuple(
+                    f"{table}.{info[2]}"
+                    for info in connection.execute(f"PRAGMA index_info({nombre})")
+                )
+                indexes[columnas] = nombre
+        return indexes
+    
+    def unique_violation(self, error: Exception) -> Optional[str]:
+        if not isinstance(error, sqlite3.IntegrityError):
+            return None
+        mensaje = str(error)
+        if not mensaje.startswith(_UNIQUE_FAILED):
+            return None
+        columnas = tuple(col.strip() for col in mensaje[len(_UNIQUE_FAILED):].split(','))
+        table = columnas[0].split('.')[0]
+        if table not in self._unique_indexes:
+            self._unique_indexes[table] = self._load_unique_indexes(table)
+        return self._unique_indexes[table].get(columnas)
+    
+    def increment_query(self, table: str, keys: Tuple[str, ...], column: str) -> str:
+        marcadores = ', '.join(['%s'] * (len(keys) + 1))
+        return (f"INSERT INTO {table} ({', '.join(keys)}, {column}) VALUES ({marcadores}) "
+                f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {column} = {column} + excluded.{column}")
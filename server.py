@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from cli import crear_db_config
+from model.cita import Cita
+from model.cita_repository import CitaRepository
+from model.config import (API_HOST, API_PORT, API_CONCURRENCIA, API_TIMEOUT, DB_SLOT_INDEX,
+                          DB_CACHE_REFERENCIAS, DB_CACHE_SONDEO, DB_SYNC_SEGUNDOS, DB_SYNC_MARGEN)
+from model.medico_repository import MedicoRepository
+from model.paciente_repository import PacienteRepository
+from model.reference_cache import CachedMedicoRepository, CachedPacienteRepository
+from model.sincronizacion import SincronizadorCitas
+from viewmodel.cita_viewmodel import CitaViewModel, ResultadoCita
+
+MAX_CABECERAS = 16 * 1024
+MAX_CUERPO = 1024 * 1024
+LIMITE_PAGINA = 500
+RAZONES = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    409: 'Conflict', 411: 'Length Required', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+ESTADOS_RESULTADO = {
+    'invalida': 400,
+    'no_encontrada': 404,
+    'medico_ocupado': 409,
+    'paciente_ocupado': 409,
+    'error': 500,
+}
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+class Solicitud:
+    __slots__ = ('metodo', 'ruta', 'consulta', 'version', 'cabeceras', 'cuerpo')
+    
+    def __init__(self, metodo: str, destino: str, version: str, cabeceras: Dict[str, str], cuerpo: bytes = b''):
+        partes = urlsplit(destino)
+        self.metodo = metodo
+        self.ruta = partes.path.rstrip('/') or '/'
+        self.consulta = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        self.version = version
+        self.cabeceras = cabeceras
+        self.cuerpo = cuerpo
+    
+    def mantener_conexion(self) -> bool:
+        conexion = self.cabeceras.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return conexion == 'keep-alive'
+        return conexion != 'close'
+    
+    def json(self) -> dict:
+        try:
+            datos = json.loads(self.cuerpo or b'{}')
+        except (UnicodeDecodeError, ValueError):
+            raise ErrorHTTP(400, "El cuerpo no es JSON válido")
+        if not isinstance(datos, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+        return datos
+    
+    def entero(self, clave: str, defecto: Optional[int] = None, minimo: int = 0,
+               maximo: Optional[int] = None) -> Optional[int]:
+        valor = self.consulta.get(clave)
+        if valor is None:
+            return defecto
+        try:
+            numero = int(valor)
+        except ValueError:
+            raise ErrorHTTP(400, f"El parámetro '{clave}' debe ser un número entero")
+        if numero < minimo:
+            raise ErrorHTTP(400, f"El parámetro '{clave}' debe ser mayor o igual a {minimo}")
+        return min(numero, maximo) if maximo is not None else numero
+
+
+class MetricasServidor:
+    def __init__(self, muestras: int = 2048):
+        self.inicio = time.monotonic()
+        self._solicitudes: Dict[str, int] = defaultdict(int)
+        self._estados: Dict[int, int] = defaultdict(int)
+        self._latencias: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=muestras))
+        self.en_curso = 0
+        self.rechazadas = 0
+    
+    def registrar(self, ruta: str, estado: int, duracion: float):
+        self._solicitudes[ruta] += 1
+        self._estados[estado] += 1
+        self._latencias[ruta].append(duracion)
+    
+    def stats(self) -> dict:
+        rutas = {}
+        for ruta, latencias in self._latencias.items():
+            ordenadas = sorted(latencias)
+            n = len(ordenadas)
+            rutas[ruta] = {
+                'solicitudes': self._solicitudes[ruta],
+                'p50_ms': ordenadas[(n - 1) // 2] * 1000,
+                'p95_ms': ordenadas[max(0, int(n * 0.95) - 1)] * 1000,
+                'max_ms': ordenadas[-1] * 1000,
+            }
+        return {
+            'activo_s': time.monotonic() - self.inicio,
+            'solicitudes': sum(self._solicitudes.values()),
+            'en_curso': self.en_curso,
+            'rechazadas': self.rechazadas,
+            'estados': {str(estado): total for estado, total in sorted(self._estados.items())},
+            'rutas': rutas,
+        }
+
+
+def _resultado(resultado: ResultadoCita, exito: int = 200) -> Tuple[int, dict]:
+    if resultado.exito:
+        return exito, {'mensaje': resultado.mensaje, 'cita': resultado.cita.to_dict() if resultado.cita else None}
+    return ESTADOS_RESULTADO.get(resultado.codigo, 400), {'error': resultado.mensaje, 'codigo': resultado.codigo}
+
+
+def _cursor(cita: Cita) -> str:
+    return f"{cita.fecha},{cita.hora},{cita.id_cita}"
+
+
+def _leer_cursor(texto: str) -> Tuple[str, str, int]:
+    try:
+        fecha, hora, id_cita = texto.split(',')
+        return fecha, hora, int(id_cita)
+    except ValueError:
+        raise ErrorHTTP(400, "Cursor 'despues' inválido. Use FECHA,HORA,ID")
+
+
+def _entero_cuerpo(datos: dict, clave: str) -> Optional[int]:
+    valor = datos.get(clave)
+    if valor is None:
+        return None
+    if isinstance(valor, (bool, float)) or not isinstance(valor, (int, str)):
+        raise ErrorHTTP(400, f"El campo '{clave}' debe ser un número entero")
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorHTTP(400, f"El campo '{clave}' debe ser un número entero")
+
+
+class ServidorCitas:
+    def __init__(self, viewmodel: CitaViewModel, concurrencia: int = 8, max_pendientes: int = 256,
+                 timeout: float = 10.0):
+        self.viewmodel = viewmodel
+        self.db_config = viewmodel.repository.db_config
+        self.concurrencia = concurrencia
+        self.max_pendientes = max_pendientes
+        self.timeout = timeout
+        self.metricas = MetricasServidor()
+        self._pool = ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix='api')
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._pendientes = 0
+        self._rutas: List[Tuple[str, re.Pattern, Callable, str]] = [
+            ('GET', re.compile(r'^/citas$'), self.listar_citas, 'GET /citas'),
+            ('POST', re.compile(r'^/citas$'), self.crear_cita, 'POST /citas'),
+            ('GET', re.compile(r'^/citas/(\d+)$'), self.obtener_cita, 'GET /citas/{id}'),
+            ('PUT', re.compile(r'^/citas/(\d+)$'), self.actualizar_cita, 'PUT /citas/{id}'),
+            ('DELETE', re.compile(r'^/citas/(\d+)$'), self.eliminar_cita, 'DELETE /citas/{id}'),
+            ('POST', re.compile(r'^/citas/(\d+)/cancelar$'), self.cancelar_cita, 'POST /citas/{id}/cancelar'),
+            ('GET', re.compile(r'^/medicos$'), self.listar_medicos, 'GET /medicos'),
+            ('GET', re.compile(r'^/salud$'), self.salud, 'GET /salud'),
+            ('GET', re.compile(r'^/metricas$'), self.estadisticas, 'GET /metricas'),
+        ]
+    
+    async def _ejecutar(self, fn: Callable, *args, escritura: bool = False):
+        if self._pendientes >= self.max_pendientes:
+            self.metricas.rechazadas += 1
+            raise ErrorHTTP(503, "Servidor saturado, intente nuevamente")
+        self._pendientes += 1
+        try:
+            async with self._semaforo:
+                loop = asyncio.get_running_loop()
+                futuro = loop.run_in_executor(self._pool, fn, *args)
+                if escritura:
+                    return await futuro
+                return await asyncio.wait_for(futuro, self.timeout)
+        except asyncio.TimeoutError:
+            raise ErrorHTTP(504, "La operación tardó demasiado")
+        finally:
+            self._pendientes -= 1
+    
+    async def listar_citas(self, solicitud: Solicitud) -> Tuple[int, dict]:
+        limite = solicitud.entero('limit', 50, minimo=1, maximo=LIMITE_PAGINA)
+        offset = solicitud.entero('offset', 0)
+        despues = solicitud.consulta.get('despues')
+        filtros = {
+            'desde': solicitud.consulta.get('desde'),
+            'hasta': solicitud.consulta.get('hasta'),
+            'id_medico': solicitud.entero('id_medico'),
+            'estado': solicitud.consulta.get('estado'),
+        }
+        if filtros['estado'] is not None and filtros['estado'] not in Cita.ESTADOS:
+            raise ErrorHTTP(400, f"Estado inválido. Use {', '.join(Cita.ESTADOS)}")
+        after = _leer_cursor(despues) if despues else None
+        
+        def consultar():
+            citas = self.viewmodel.get_citas_pagina(offset, limite + 1, after, **filtros)
+            total = self.viewmodel.contar_citas(**filtros) if solicitud.consulta.get('total') == '1' else None
+            return citas, total
+        
+        citas, total = await self._ejecutar(consultar)
+        siguiente = _cursor(citas[limite - 1]) if len(citas) > limite else None
+        respuesta = {'citas': [cita.to_dict() for cita in citas[:limite]], 'siguiente': siguiente}
+        if total is not None:
+            respuesta['total'] = total
+        return 200, respuesta
+    
+    async def obtener_cita(self, solicitud: Solicitud, id_cita: str) -> Tuple[int, dict]:
+        cita = await self._ejecutar(self.viewmodel.get_cita_by_id, int(id_cita))
+        if cita is None:
+            return 404, {'error': "La cita no existe", 'codigo': 'no_encontrada'}
+        return 200, {'cita': cita.to_dict()}
+    
+    @staticmethod
+    def _nombre_paciente(datos: dict) -> Optional[str]:
+        if datos.get('id_paciente') is None and datos.get('nombre_paciente'):
+            return str(datos['nombre_paciente'])
+        return None
+    
+    async def crear_cita(self, solicitud: Solicitud) -> Tuple[int, dict]:
+        datos = solicitud.json()
+        estado = datos.get('estado') or 'Programada'
+        if estado not in Cita.ESTADOS:
+            raise ErrorHTTP(400, f"Estado inválido. Use {', '.join(Cita.ESTADOS)}")
+        id_paciente, id_medico = _entero_cuerpo(datos, 'id_paciente'), _entero_cuerpo(datos, 'id_medico')
+        
+        def crear():
+            return self.viewmodel.crear_cita(id_paciente, id_medico,
+                                             datos.get('fecha'), datos.get('hora'), estado,
+                                             nombre_paciente=self._nombre_paciente(datos))
+        
+        return _resultado(await self._ejecutar(crear, escritura=True), exito=201)
+    
+    async def actualizar_cita(self, solicitud: Solicitud, id_cita: str) -> Tuple[int, dict]:
+        datos = solicitud.json()
+        faltantes = [campo for campo in ('id_medico', 'fecha', 'hora', 'estado') if datos.get(campo) is None]
+        if faltantes:
+            raise ErrorHTTP(400, f"Faltan campos: {', '.join(faltantes)}")
+        if datos['estado'] not in Cita.ESTADOS:
+            raise ErrorHTTP(400, f"Estado inválido. Use {', '.join(Cita.ESTADOS)}")
+        id_paciente, id_medico = _entero_cuerpo(datos, 'id_paciente'), _entero_cuerpo(datos, 'id_medico')
+        
+        def actualizar():
+            return self.viewmodel.modificar_cita(int(id_cita), id_paciente, id_medico,
+                                                 datos['fecha'], datos['hora'], datos['estado'],
+                                                 nombre_paciente=self._nombre_paciente(datos))
+        
+        return _resultado(await self._ejecutar(actualizar, escritura=True))
+    
+    async def eliminar_cita(self, solicitud: Solicitud, id_cita: str) -> Tuple[int, dict]:
+        exito, mensaje = await self._ejecutar(self.viewmodel.eliminar_cita, int(id_cita), escritura=True)
+        if exito:
+            return 200, {'mensaje': mensaje}
+        return 404, {'error': mensaje, 'codigo': 'no_encontrada'}
+    
+    async def cancelar_cita(self, solicitud: Solicitud, id_cita: str) -> Tuple[int, dict]:
+        def cancelar():
+            exito, mensaje = self.viewmodel.cancelar_cita(int(id_cita))
+            return exito, mensaje, exito or self.viewmodel.get_cita_by_id(int(id_cita)) is not None
+        
+        exito, mensaje, existe = await self._ejecutar(cancelar, escritura=True)
+        if exito:
+            return 200, {'mensaje': mensaje}
+        if existe:
+            return 409, {'error': "La cita ya está cancelada", 'codigo': 'cancelada'}
+        return 404, {'error': mensaje, 'codigo': 'no_encontrada'}
+    
+    async def listar_medicos(self, solicitud: Solicitud) -> Tuple[int, dict]:
+        medicos = await self._ejecutar(self.viewmodel.get_all_medicos)
+        return 200, {'medicos': [medico.to_dict() for medico in medicos]}
+    
+    async def salud(self, solicitud: Solicitud) -> Tuple[int, dict]:
+        await self._ejecutar(self.db_config.execute_query, "SELECT 1", None, False)
+        return 200, {'estado': 'ok'}
+    
+    async def estadisticas(self, solicitud: Solicitud) -> Tuple[int, dict]:
+        return 200, {
+            'servidor': self.metricas.stats(),
+            'concurrencia': self.concurrencia,
+            'pendientes': self._pendientes,
+            'pool': self.db_config.pool_stats(),
+            'sentencias': self.db_config.statement_stats(),
+        }
+    
+    async def _despachar(self, solicitud: Solicitud) -> Tuple[int, dict, str]:
+        metodos = []
+        for metodo, patron, manejador, nombre in self._rutas:
+            coincidencia = patron.match(solicitud.ruta)
+            if coincidencia is None:
+                continue
+            if metodo != solicitud.metodo:
+                metodos.append(metodo)
+                continue
+            try:
+                estado, cuerpo = await manejador(solicitud, *coincidencia.groups())
+            except ErrorHTTP as e:
+                estado, cuerpo = e.estado, {'error': e.mensaje}
+            except Exception as e:
+                print(f"Error atendiendo {nombre}: {e}", file=sys.stderr)
+                estado, cuerpo = 500, {'error': "Error interno del servidor"}
+            return estado, cuerpo, nombre
+        if metodos:
+            return 405, {'error': f"Método no permitido. Use {', '.join(metodos)}"}, 'otros'
+        return 404, {'error': "Recurso no encontrado"}, 'otros'
+    
+    async def _leer(self, reader: asyncio.StreamReader) -> Optional[Solicitud]:
+        try:
+            encabezado = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise ErrorHTTP(400, "Solicitud incompleta")
+            return None
+        except asyncio.LimitOverrunError:
+            raise ErrorHTTP(431, "Cabeceras demasiado grandes")
+        lineas = encabezado.decode('latin-1').split('\r\n')
+        try:
+            metodo, destino, version = lineas[0].split(' ')
+        except ValueError:
+            raise ErrorHTTP(400, "Línea de solicitud inválida")
+        cabeceras = {}
+        for linea in lineas[1:]:
+            if not linea:
+                continue
+            nombre, _, valor = linea.partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        if 'chunked' in cabeceras.get('transfer-encoding', '').lower():
+            raise ErrorHTTP(411, "Envíe el cuerpo con Content-Length")
+        try:
+            longitud = int(cabeceras.get('content-length', '0'))
+        except ValueError:
+            raise ErrorHTTP(400, "Content-Length inválido")
+        if longitud > MAX_CUERPO:
+            raise ErrorHTTP(413, "Cuerpo demasiado grande")
+        cuerpo = await reader.readexactly(longitud) if longitud else b''
+        return Solicitud(metodo.upper(), destino, version, cabeceras, cuerpo)
+    
+    @staticmethod
+    async def _responder(writer: asyncio.StreamWriter, estado: int, cuerpo: dict,
+                         duracion: float = 0.0, cerrar: bool = False):
+        datos = json.dumps(cuerpo, ensure_ascii=False, default=str).encode('utf-8')
+        cabeceras = (
+            f"HTTP/1.1 {estado} {RAZONES.get(estado, 'OK')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Server-Timing: app;dur={duracion * 1000:.2f}\r\n"
+            f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(cabeceras.encode('latin-1') + datos)
+        await writer.drain()
+    
+    async def atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    solicitud = await self._leer(reader)
+                except ErrorHTTP as e:
+                    await self._responder(writer, e.estado, {'error': e.mensaje}, cerrar=True)
+                    break
+                if solicitud is None:
+                    break
+                inicio = time.perf_counter()
+                self.metricas.en_curso += 1
+                try:
+                    estado, cuerpo, nombre = await self._despachar(solicitud)
+                finally:
+                    self.metricas.en_curso -= 1
+                duracion = time.perf_counter() - inicio
+                self.metricas.registrar(nombre, estado, duracion)
+                mantener = solicitud.mantener_conexion()
+                await self._responder(writer, estado, cuerpo, duracion, cerrar=not mantener)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+    
+    async def iniciar(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.atender, host, port, limit=MAX_CABECERAS)
+    
+    def cerrar(self):
+        self._pool.shutdown(wait=True)
+
+
+def crear_viewmodel(db_config, slot_index: bool = DB_SLOT_INDEX) -> Tuple[CitaViewModel, Optional[SincronizadorCitas]]:
+    repository = CitaRepository(db_config)
+    sincronizador = None
+    if DB_SYNC_SEGUNDOS > 0:
+        sincronizador = SincronizadorCitas(repository, intervalo=DB_SYNC_SEGUNDOS, margen=DB_SYNC_MARGEN)
+        if not sincronizador.iniciar():
+            sincronizador = None
+    if slot_index:
+        repository.enable_slot_index()
+    if DB_CACHE_REFERENCIAS:
+        paciente_repo = CachedPacienteRepository(db_config, probe_interval=DB_CACHE_SONDEO)
+        medico_repo = CachedMedicoRepository(db_config, probe_interval=DB_CACHE_SONDEO)
+    else:
+        paciente_repo = PacienteRepository(db_config)
+        medico_repo = MedicoRepository(db_config)
+    return CitaViewModel(repository, paciente_repo, medico_repo), sincronizador
+
+
+async def servir(servidor: ServidorCitas, host: str, port: int):
+    servidor_tcp = await servidor.iniciar(host, port)
+    direcciones = ', '.join(f"http://{s.getsockname()[0]}:{s.getsockname()[1]}" for s in servidor_tcp.sockets)
+    print(f"✓ Servidor de citas escuchando en {direcciones} (concurrencia {servidor.concurrencia})", flush=True)
+    async with servidor_tcp:
+        await servidor_tcp.serve_forever()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON de citas médicas sin interfaz gráfica")
+    parser.add_argument('--host', default=API_HOST, help="Dirección en la que escuchar (por defecto API_HOST)")
+    parser.add_argument('--port', type=int, default=API_PORT, help="Puerto (por defecto API_PORT)")
+    parser.add_argument('--concurrencia', type=int, default=API_CONCURRENCIA,
+                        help="Operaciones de base de datos simultáneas y tamaño del pool de conexiones")
+    parser.add_argument('--timeout', type=float, default=API_TIMEOUT, help="Segundos máximos por lectura; las escrituras no se cortan")
+    parser.add_argument('--backend', choices=['mysql', 'sqlite'], help="Motor de base de datos (por defecto DB_BACKEND)")
+    parser.add_argument('--sqlite', help="Ruta de la base SQLite (por defecto DB_SQLITE_PATH)")
+    args = parser.parse_args(argv)
+    
+    db_config = crear_db_config(args.backend, args.sqlite, pool_size=args.concurrencia)
+    viewmodel, sincronizador = crear_viewmodel(db_config)
+    servidor = ServidorCitas(viewmodel, concurrencia=args.concurrencia, timeout=args.timeout)
+    try:
+        asyncio.run(servir(servidor, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nDeteniendo el servidor...")
+    finally:
+        if sincronizador is not None:
+            sincronizador.detener()
+        servidor.cerrar()
+        viewmodel.repository.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
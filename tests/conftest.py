@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.cita_repository import CitaRepository
+from model.sqlite_config import SQLiteConfig
+
+
+@pytest.fixture
+def db_config():
+    config = SQLiteConfig(':memory:')
+    yield config
+    config.close_connection()
+
+
+@pytest.fixture
+def repository(db_config):
+    repository = CitaRepository(db_config)
+    yield repository
+    repository.close()
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from model.async_repository import AsyncCitaRepository
+from model.cita_repository import CitaRepository
+from model.sqlite_config import SQLiteConfig
+
+
+def test_lecturas_concurrentes_con_pool(tmp_path):
+    repository = CitaRepository(SQLiteConfig(str(tmp_path / 'citas.db'), pool_size=3))
+    citas = AsyncCitaRepository(repository)
+    barrera = threading.Barrier(3, timeout=5)
+    
+    def contar():
+        barrera.wait()
+        return repository.count()
+    
+    async def ejecutar():
+        try:
+            return await asyncio.gather(*(citas._run(contar) for _ in range(3)))
+        finally:
+            await citas.close()
+    
+    assert citas.max_workers == 3
+    assert asyncio.run(ejecutar()) == [5, 5, 5]
+    repository.close()
+
+
+def test_sin_pool_avisa_que_serializa(repository, capsys):
+    citas = AsyncCitaRepository(repository)
+    assert citas.max_workers == 1
+    assert "Sin pool de conexiones" in capsys.readouterr().out
+    assert AsyncCitaRepository(repository, max_workers=4).max_workers == 4
+    asyncio.run(citas.close())
+
+
+def test_con_pool_usa_su_tamano_sin_avisar(tmp_path, capsys):
+    repository = CitaRepository(SQLiteConfig(str(tmp_path / 'citas.db'), pool_size=4))
+    capsys.readouterr()
+    citas = AsyncCitaRepository(repository)
+    try:
+        assert citas.max_workers == 4
+        assert "Sin pool de conexiones" not in capsys.readouterr().out
+        assert AsyncCitaRepository(repository, max_workers=2).max_workers == 2
+    finally:
+        asyncio.run(citas.close())
+        repository.close()
@@ -0,0 +1,30 @@
+import time
+
+from model.cita import Cita
+from model.cita_batch import CitaBatch
+
+
+def filas(ids):
+    return [(id_cita, 1, 2, '2031-01-01', '09:00', 'Programada', 'Ana', 'Dr. Luis') for id_cita in ids]
+
+
+def test_posicion_por_id():
+    lote = CitaBatch.from_tuples(filas([40, 7, 300, 12]))
+    assert [lote.posicion(id_cita) for id_cita in (40, 7, 300, 12)] == [0, 1, 2, 3]
+    assert lote.posicion(8) is None
+    assert lote.posicion(1000) is None
+    assert lote.get(300).id_cita == 300
+    assert lote.get(5) is None
+    
+    lote.append(Cita(1, 2, '2031-01-02', '10:00', id_cita=9))
+    assert lote.posicion(9) == 4
+    assert lote.get(9).fecha == '2031-01-02'
+    assert CitaBatch().posicion(1) is None
+
+
+def test_busqueda_por_id_no_recorre_el_lote():
+    lote = CitaBatch.from_tuples(filas(range(50000, 0, -1)))
+    inicio = time.perf_counter()
+    for id_cita in range(1, 50001, 50):
+        assert lote.id_cita(lote.posicion(id_cita)) == id_cita
+    assert time.perf_counter() - inicio < 0.05
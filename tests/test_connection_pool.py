@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from model.connection_pool import ConnectionPool, PoolClosedError, PoolTimeoutError
+
+
+class Conexion:
+    def __init__(self, numero):
+        self.numero = numero
+        self.sana = True
+        self.cerrada = False
+    
+    def close(self):
+        self.cerrada = True
+
+
+def crear_pool(**kwargs):
+    creadas = []
+    
+    def factory():
+        conexion = Conexion(len(creadas) + 1)
+        creadas.append(conexion)
+        return conexion
+    
+    kwargs.setdefault('validate', lambda conexion: conexion.sana)
+    return ConnectionPool(factory, **kwargs), creadas
+
+
+def test_reutiliza_conexiones_devueltas():
+    pool, creadas = crear_pool(max_size=2)
+    primera = pool.acquire()
+    pool.release(primera)
+    assert pool.acquire() is primera
+    assert len(creadas) == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_timeout_cuando_el_pool_esta_agotado():
+    pool, _ = crear_pool(max_size=1)
+    pool.acquire()
+    inicio = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire(timeout=0.05)
+    assert time.monotonic() - inicio >= 0.05
+    assert pool.stats()['in_use'] == 1
+
+
+def test_espera_hasta_que_se_devuelve_una_conexion():
+    pool, creadas = crear_pool(max_size=1)
+    conexion = pool.acquire()
+    threading.Timer(0.05, pool.release, args=(conexion,)).start()
+    assert pool.acquire(timeout=2) is conexion
+    stats = pool.stats()
+    assert stats['waits'] == 1
+    assert stats['wait_time_max'] > 0
+    assert len(creadas) == 1
+
+
+def test_reemplaza_conexiones_que_fallan_la_verificacion():
+    pool, creadas = crear_pool(max_size=1, health_check_interval=0)
+    conexion = pool.acquire()
+    pool.release(conexion)
+    conexion.sana = False
+    nueva = pool.acquire()
+    assert nueva is not conexion
+    assert conexion.cerrada
+    assert len(creadas) == 2
+    assert pool.stats()['health_check_failures'] == 1
+
+
+def test_descarta_conexion_danada_tras_un_error():
+    pool, creadas = crear_pool(max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conexion:
+            conexion.sana = False
+            raise RuntimeError("fallo")
+    assert conexion.cerrada
+    assert pool.stats()['size'] == 0
+    assert pool.acquire() is not conexion
+
+
+def test_conserva_conexion_sana_tras_un_error():
+    pool, _ = crear_pool(max_size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conexion:
+            raise RuntimeError("fallo")
+    assert not conexion.cerrada
+    assert pool.acquire() is conexion
+
+
+def test_expulsa_conexiones_inactivas():
+    pool, creadas = crear_pool(max_size=2, idle_timeout=0.01)
+    conexion = pool.acquire()
+    pool.release(conexion)
+    time.sleep(0.02)
+    assert pool.evict_idle() == 1
+    assert conexion.cerrada
+    assert pool.stats()['size'] == 0
+
+
+def test_error_de_fabrica_libera_el_cupo():
+    def factory():
+        raise OSError("sin servidor")
+    
+    pool = ConnectionPool(factory, max_size=1)
+    with pytest.raises(OSError):
+        pool.acquire()
+    stats = pool.stats()
+    assert stats['size'] == 0
+    assert stats['in_use'] == 0
+
+
+def test_pool_cerrado_lanza_error_propio():
+    pool, _ = crear_pool(max_size=1)
+    conexion = pool.acquire()
+    pool.close_all()
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+    pool.release(conexion)
+    assert conexion.cerrada
+    assert pool.stats()['size'] == 0
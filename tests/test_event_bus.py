@@ -0,0 +1,122 @@
+import threading
+
+from model.cita import Cita
+from model.cita_repository import CitaRepository
+from model.event_bus import Event, EventBus, coalesce
+from model.observer import Observer
+from viewmodel.cita_viewmodel import CitaViewModel
+
+
+class VistaRegistro(Observer):
+    def __init__(self):
+        self.lotes = []
+    
+    def update(self, message, data=None):
+        self.lotes.append([(message, data)])
+    
+    def update_many(self, eventos):
+        self.lotes.append(list(eventos))
+
+
+def clave(event):
+    return event.data
+
+
+def test_coalesce_conserva_el_ultimo_evento_de_cada_clave():
+    eventos = [Event('a', 1), Event('b', 2), Event('c', None), Event('d', 1)]
+    fusionados = coalesce(eventos, clave)
+    assert [(e.topic, e.data) for e in fusionados] == [('b', 2), ('c', None), ('d', 1)]
+
+
+def test_coalesce_descarta_cuando_la_fusion_devuelve_none():
+    eventos = [Event('alta', 1), Event('baja', 1), Event('alta', 2)]
+    fusionados = coalesce(eventos, clave, lambda anterior, nuevo: None)
+    assert [(e.topic, e.data) for e in fusionados] == [('alta', 2)]
+
+
+def test_rafaga_se_entrega_en_un_solo_lote_fusionado():
+    bus = EventBus(window=0.2)
+    lotes = []
+    bus.subscribe(lotes.append, coalesce_key=clave)
+    for indice in range(10):
+        bus.publish('cita_actualizada', indice % 3)
+    assert bus.flush(2)
+    assert len(lotes) == 1
+    assert [e.data for e in lotes[0]] == [1, 2, 0]
+    stats = bus.stats()
+    assert stats['published'] == 10
+    assert stats['coalesced'] == 7
+    assert stats['pending'] == 0
+    bus.close()
+
+
+def test_filtra_por_tema_y_prefijo():
+    bus = EventBus(window=0.01)
+    exactos, prefijo = [], []
+    bus.subscribe(exactos.extend, topics=['cita_agregada'])
+    bus.subscribe(prefijo.extend, topics=['citas_*'])
+    for topic in ('cita_agregada', 'cita_eliminada', 'citas_importadas', 'otro'):
+        bus.publish(topic)
+    assert bus.flush(2)
+    assert [e.topic for e in exactos] == ['cita_agregada']
+    assert [e.topic for e in prefijo] == ['citas_importadas']
+    bus.close()
+
+
+def test_entrega_por_funcion_propia_y_errores_del_manejador():
+    bus = EventBus(window=0.01)
+    hilos = []
+    
+    def deliver(fn):
+        hilos.append(threading.current_thread().name)
+        fn()
+    
+    def falla(eventos):
+        raise RuntimeError("manejador roto")
+    
+    recibidos = []
+    bus.subscribe(falla, deliver=deliver)
+    bus.subscribe(recibidos.extend)
+    bus.publish('cita_agregada', 1)
+    assert bus.flush(2)
+    bus.publish('cita_agregada', 2)
+    assert bus.flush(2)
+    assert [e.data for e in recibidos] == [1, 2]
+    assert hilos == ['citas-eventos', 'citas-eventos']
+    bus.close()
+
+
+def test_publicar_tras_cerrar_cuenta_eventos_descartados():
+    bus = EventBus(window=0.01)
+    bus.close()
+    bus.publish('cita_agregada', 1)
+    assert bus.stats()['dropped'] == 1
+    assert bus.stats()['published'] == 0
+
+
+def test_viewmodel_fusiona_cambios_de_la_misma_cita(db_config):
+    bus = EventBus(window=0.5)
+    repository = CitaRepository(db_config, event_bus=bus)
+    viewmodel = CitaViewModel(repository)
+    vista = VistaRegistro()
+    viewmodel.attach_view(vista)
+    
+    nueva = Cita(1, 2, '2031-01-01', '10:00')
+    assert repository.add(nueva) is True
+    assert repository.update(nueva.id_cita, Cita(1, 2, '2031-01-01', '11:00', id_cita=nueva.id_cita)) is True
+    assert repository.cancel(2) is True
+    assert repository.update(1, Cita(1, 1, '2024-12-20', '12:00', id_cita=1)) is True
+    temporal = Cita(3, 3, '2031-01-02', '10:00')
+    assert repository.add(temporal) is True
+    assert repository.delete(temporal.id_cita) is True
+    assert bus.flush(3)
+    
+    assert len(vista.lotes) == 1
+    eventos = {data.id_cita: (message, data) for message, data in vista.lotes[0]}
+    assert set(eventos) == {nueva.id_cita, 2, 1}
+    assert eventos[nueva.id_cita][0] == 'cita_agregada'
+    assert eventos[nueva.id_cita][1].hora == '11:00'
+    assert eventos[nueva.id_cita][1].nombre_paciente
+    assert eventos[2][0] == 'cita_cancelada'
+    assert eventos[1][0] == 'cita_actualizada'
+    bus.close()
@@ -0,0 +1,73 @@
+import pytest
+
+from model.cita import Cita
+from model.cita_repository import INSERT_CITA
+from model.database_config import DatabaseConfig
+
+
+def citas_lote():
+    return [Cita(paciente, medico, '2031-03-0%d' % dia, '09:00')
+            for dia in range(1, 4) for paciente, medico in ((1, 1), (2, 2), (3, 3))]
+
+
+def test_add_many_asigna_los_ids_insertados(repository):
+    repository.enable_slot_index()
+    citas = citas_lote()
+    reporte = repository.add_many(citas, chunk_size=4)
+    assert all(fila['aceptada'] for fila in reporte)
+    for fila, cita in zip(reporte, citas):
+        assert fila['id_cita'] == cita.id_cita
+        guardada = repository.get_by_id(cita.id_cita)
+        assert (guardada.id_medico, guardada.fecha, guardada.hora) == (cita.id_medico, cita.fecha, cita.hora)
+    assert repository.slot_index.conflicto(Cita(4, 1, '2031-03-01', '09:00')) == "medico_ocupado"
+
+
+def test_add_many_revierte_si_faltan_ids(repository, monkeypatch):
+    db_config = repository.db_config
+    insertar = db_config.insert_rows
+    monkeypatch.setattr(db_config, 'insert_rows', lambda *args: insertar(*args)[:-1])
+    reporte = repository.add_many(citas_lote())
+    assert [fila['motivo'] for fila in reporte] == ['error'] * 9
+    assert all(fila['id_cita'] is None for fila in reporte)
+    assert repository.count() == 5
+    assert repository.resumen.verificar() == []
+
+
+class CursorMySQL:
+    def __init__(self, modo, incremento, siguiente=11):
+        self.variables = (modo, incremento)
+        self.siguiente = siguiente
+        self.consultas = []
+        self.rowcount = 0
+        self.lastrowid = None
+        self._filas = []
+    
+    def execute(self, query, params=None):
+        self.consultas.append(query)
+        if query.startswith('SELECT @@'):
+            self._filas = [self.variables]
+            return
+        filas = query.count('(%s')
+        self.rowcount = filas
+        self.lastrowid = self.siguiente
+        self.siguiente += filas * self.variables[1]
+    
+    def fetchall(self):
+        return self._filas
+
+
+@pytest.mark.parametrize('modo, incremento', [(1, 1), (1, 3)])
+def test_insert_rows_mysql_respeta_el_incremento(modo, incremento):
+    db_config = DatabaseConfig()
+    cursor = CursorMySQL(modo, incremento)
+    ids = db_config.insert_rows(cursor, INSERT_CITA, [(1, 1, '2031-01-01', '09:00', 'Programada')] * 5, 3)
+    assert ids == [11 + i * incremento for i in range(5)]
+    assert len(cursor.consultas) == 3
+
+
+def test_insert_rows_mysql_intercalado_usa_lastrowid_por_fila():
+    db_config = DatabaseConfig()
+    cursor = CursorMySQL(2, 2)
+    ids = db_config.insert_rows(cursor, INSERT_CITA, [(1, 1, '2031-01-01', '09:00', 'Programada')] * 3)
+    assert ids == [11, 13, 15]
+    assert len(cursor.consultas) == 4
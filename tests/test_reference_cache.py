@@ -0,0 +1,56 @@
+import pytest
+
+from model.cita_repository import CitaRepository
+from model.medico import Medico
+from model.paciente import Paciente
+from model.reference_cache import CachedMedicoRepository, CachedPacienteRepository
+from model.sqlite_config import SQLiteConfig
+
+
+@pytest.fixture
+def instancias(tmp_path):
+    ruta = str(tmp_path / 'citas.db')
+    CitaRepository(SQLiteConfig(ruta)).close()
+    configs = [SQLiteConfig(ruta), SQLiteConfig(ruta)]
+    configs[0].execute_update("UPDATE pacientes SET updated_at = '2000-01-01 00:00:00'")
+    configs[0].execute_update("UPDATE medicos SET updated_at = '2000-01-01 00:00:00'")
+    yield configs
+    for config in configs:
+        config.close_connection()
+
+
+def nombres(repo):
+    return {entidad.nombre_completo for entidad in repo.get_all()}
+
+
+def test_escrituras_propias_no_recargan(instancias):
+    pacientes = CachedPacienteRepository(instancias[0], probe_interval=3600)
+    for nombre in ('Ana Uno', 'Ana Dos', 'Ana Tres'):
+        assert pacientes.get_or_create(nombre) is not None
+    assert pacientes.update(1, Paciente('María López', '555-0000'))
+    assert pacientes.delete(5)
+    assert pacientes.stats()['reloads'] == 1
+    assert nombres(pacientes) == nombres(CachedPacienteRepository(instancias[1]))
+
+
+def test_escritura_propia_no_absorbe_altas_ajenas(instancias):
+    local = CachedPacienteRepository(instancias[0], probe_interval=3600)
+    remota = CachedPacienteRepository(instancias[1], probe_interval=3600)
+    assert remota.get_or_create('Paciente Remoto') is not None
+    assert local.get_or_create('Paciente Local') is not None
+    assert {'Paciente Remoto', 'Paciente Local'} <= nombres(local)
+
+
+def test_escritura_propia_no_absorbe_cambios_ajenos(instancias):
+    local = CachedMedicoRepository(instancias[0], probe_interval=3600)
+    remota = CachedMedicoRepository(instancias[1], probe_interval=3600)
+    primero = Medico('Dra. Local', 'Neurología')
+    segundo = Medico('Dr. Local Dos', 'Neurología')
+    assert local.add(primero)
+    assert remota.update(2, Medico('Dra. Carmen Sánchez Ruiz', 'Pediatría'))
+    assert local.add(segundo)
+    assert 'Dra. Carmen Sánchez Ruiz' in nombres(local)
+    
+    assert remota.delete(primero.id_medico)
+    assert local.delete(segundo.id_medico)
+    assert local.get_by_id(primero.id_medico) is None
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from model.cita import Cita
+from model.cita_repository import CitaRepository
+from model.medico_repository import MedicoRepository
+from model.paciente_repository import PacienteRepository
+from model.reference_cache import CachedMedicoRepository, CachedPacienteRepository
+from model.sqlite_config import SQLiteConfig
+from server import ServidorCitas
+from viewmodel.cita_viewmodel import CitaViewModel
+
+
+@pytest.fixture
+def viewmodel(repository, db_config):
+    return CitaViewModel(repository, PacienteRepository(db_config), MedicoRepository(db_config))
+
+
+async def _pedir(puerto, metodo, ruta, cuerpo=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', puerto)
+    datos = json.dumps(cuerpo).encode('utf-8') if cuerpo is not None else b''
+    writer.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(datos)}\r\n"
+                 f"Connection: close\r\n\r\n".encode('latin-1') + datos)
+    await writer.drain()
+    respuesta = await reader.read()
+    writer.close()
+    encabezado, _, contenido = respuesta.partition(b'\r\n\r\n')
+    return int(encabezado.split(b' ')[1]), json.loads(contenido)
+
+
+def _servir(viewmodel, solicitudes, timeout=10.0):
+    async def ejecutar():
+        servidor = ServidorCitas(viewmodel, concurrencia=2, timeout=timeout)
+        servidor_tcp = await servidor.iniciar('127.0.0.1', 0)
+        puerto = servidor_tcp.sockets[0].getsockname()[1]
+        try:
+            return [await _pedir(puerto, *solicitud) for solicitud in solicitudes]
+        finally:
+            servidor_tcp.close()
+            await servidor_tcp.wait_closed()
+            servidor.cerrar()
+    
+    return asyncio.run(ejecutar())
+
+
+def test_viewmodel_rechaza_estado_desconocido(viewmodel):
+    total = len(viewmodel.get_all_citas())
+    assert viewmodel.agregar_cita(1, 1, '2030-01-01', '10:00', 'Borrada')[0] is False
+    resultado = viewmodel.modificar_cita(1, 1, 1, '2030-01-01', '10:00', 'Borrada')
+    assert (resultado.exito, resultado.codigo) == (False, 'invalida')
+    assert len(viewmodel.get_all_citas()) == total
+    assert viewmodel.get_cita_by_id(1).estado == 'Programada'
+
+
+def test_codigos_de_estado(viewmodel):
+    alta = {'id_paciente': 2, 'id_medico': 3, 'fecha': '2030-01-01', 'hora': '10:00'}
+    respuestas = _servir(viewmodel, [
+        ('POST', '/citas', alta),
+        ('POST', '/citas', alta),
+        ('POST', '/citas', dict(alta, estado='Borrada')),
+        ('POST', '/citas', dict(alta, id_medico=99)),
+        ('GET', '/citas/999'),
+        ('PUT', '/citas/1', {'id_medico': 1}),
+        ('PUT', '/citas/999', dict(alta, estado='Programada')),
+        ('POST', '/citas/1/cancelar'),
+        ('POST', '/citas/1/cancelar'),
+        ('DELETE', '/citas/999'),
+        ('PATCH', '/citas/1'),
+        ('GET', '/nada'),
+        ('GET', '/citas?estado=Borrada'),
+        ('GET', '/salud'),
+    ])
+    assert [estado for estado, _ in respuestas] == [201, 409, 400, 400, 404, 400, 404, 200, 409, 404, 405, 404, 400, 200]
+    assert respuestas[1][1]['codigo'] == 'medico_ocupado'
+
+
+def test_paciente_se_crea_solo_con_datos_validos(viewmodel):
+    pacientes = len(viewmodel.paciente_repo.get_all())
+    alta = {'nombre_paciente': 'Paciente Nuevo', 'id_medico': 3, 'hora': '10:00'}
+    respuestas = _servir(viewmodel, [
+        ('POST', '/citas', dict(alta, fecha='2030-13-01')),
+        ('POST', '/citas', dict(alta, fecha='2030-01-01', id_medico=99)),
+        ('PUT', '/citas/1', dict(alta, fecha='ayer', estado='Programada')),
+    ])
+    assert [estado for estado, _ in respuestas] == [400, 400, 400]
+    assert len(viewmodel.paciente_repo.get_all()) == pacientes
+    
+    estado, cuerpo = _servir(viewmodel, [('POST', '/citas', dict(alta, fecha='2030-01-01'))])[0]
+    assert estado == 201
+    assert len(viewmodel.paciente_repo.get_all()) == pacientes + 1
+    assert cuerpo['cita']['nombre_paciente'] == 'Paciente Nuevo'
+
+
+def test_timeout_solo_corta_lecturas(viewmodel, monkeypatch):
+    crear_cita = viewmodel.crear_cita
+    get_cita_by_id = viewmodel.get_cita_by_id
+    
+    def lento(fn):
+        def envoltura(*args, **kwargs):
+            time.sleep(0.2)
+            return fn(*args, **kwargs)
+        return envoltura
+    
+    monkeypatch.setattr(viewmodel, 'crear_cita', lento(crear_cita))
+    monkeypatch.setattr(viewmodel, 'get_cita_by_id', lento(get_cita_by_id))
+    respuestas = _servir(viewmodel, [
+        ('POST', '/citas', {'id_paciente': 2, 'id_medico': 3, 'fecha': '2030-01-01', 'hora': '10:00'}),
+        ('GET', '/citas/1'),
+    ], timeout=0.05)
+    assert [estado for estado, _ in respuestas] == [201, 504]
+
+
+def test_listado_con_cursor_recorre_todo(viewmodel):
+    for hora in ('08:00', '08:00', '08:00'):
+        for medico in (1, 2):
+            viewmodel.repository.add(Cita(3, medico, '2024-12-20', hora))
+    esperadas = [c.id_cita for c in viewmodel.repository.get_page(limit=1000)]
+    
+    vistas, ruta = [], '/citas?limit=2'
+    while ruta:
+        estado, cuerpo = _servir(viewmodel, [('GET', ruta)])[0]
+        assert estado == 200
+        vistas.extend(cita['id_cita'] for cita in cuerpo['citas'])
+        ruta = f"/citas?limit=2&despues={cuerpo['siguiente']}" if cuerpo['siguiente'] else None
+    assert vistas == esperadas
+
+
+def test_paginacion_por_clave_en_los_limites(repository):
+    for medico in (1, 2, 3, 5):
+        repository.add(Cita(5, medico, '2024-12-20', '10:00'))
+    todas = repository.get_page(limit=1000)
+    claves = [(str(c.fecha), str(c.hora), c.id_cita) for c in todas]
+    assert claves == sorted(claves)
+    
+    for limite in (1, 2, 3, len(todas), len(todas) + 1):
+        vistas, after = [], None
+        while True:
+            pagina = repository.get_page(after=after, limit=limite)
+            assert len(pagina) <= limite
+            vistas.extend(c.id_cita for c in pagina)
+            if len(pagina) < limite:
+                break
+            ultima = pagina[-1]
+            after = (str(ultima.fecha), str(ultima.hora), ultima.id_cita)
+        assert vistas == [c.id_cita for c in todas]
+    
+    assert repository.get_page(after=claves[-1], limit=10) == []
+    assert [c.id_cita for c in repository.get_page(after=claves[0], limit=2)] == [c.id_cita for c in todas[1:3]]
+    assert [c.id_cita for c in repository.get_page(limit=10, id_medico=1)] == [c.id_cita for c in todas if c.id_medico == 1]
+
+
+def test_get_or_create_concurrente_crea_un_solo_paciente(tmp_path):
+    ruta = str(tmp_path / 'pacientes.db')
+    CitaRepository(SQLiteConfig(ruta)).close()
+    configs = [SQLiteConfig(ruta) for _ in range(4)]
+    repos = [PacienteRepository(config) for config in configs]
+    barrera = threading.Barrier(8)
+    ids = []
+    
+    def crear(repo):
+        barrera.wait()
+        paciente = repo.get_or_create('  Elena   Ruiz ')
+        ids.append(paciente.id_paciente if paciente else None)
+    
+    hilos = [threading.Thread(target=crear, args=(repos[i % 4],)) for i in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    try:
+        assert len(set(ids)) == 1 and ids[0] is not None
+        assert [p.nombre_completo for p in repos[0].get_all()].count('Elena Ruiz') == 1
+    finally:
+        for config in configs:
+            config.close_connection()
+
+
+def test_ids_del_cuerpo_deben_ser_enteros(repository, db_config):
+    viewmodel = CitaViewModel(repository, CachedPacienteRepository(db_config), CachedMedicoRepository(db_config))
+    alta = {'id_paciente': 2, 'id_medico': 3, 'fecha': '2030-01-01', 'hora': '10:00'}
+    respuestas = _servir(viewmodel, [
+        ('POST', '/citas', dict(alta, id_medico=[3])),
+        ('POST', '/citas', dict(alta, id_paciente={'id': 2})),
+        ('POST', '/citas', dict(alta, id_medico=True)),
+        ('POST', '/citas', dict(alta, id_medico=3.5)),
+        ('PUT', '/citas/1', dict(alta, id_medico='tres', estado='Programada')),
+        ('POST', '/citas', dict(alta, id_medico='3')),
+    ])
+    assert [estado for estado, _ in respuestas] == [400, 400, 400, 400, 400, 201]
+    assert "id_medico" in respuestas[0][1]['error']
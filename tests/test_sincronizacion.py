@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from model.cita import Cita
+from model.cita_repository import CitaRepository
+from model.observer import Observer
+from model.sincronizacion import SincronizadorCitas
+from model.sqlite_config import SQLiteConfig
+
+
+class Registro(Observer):
+    def __init__(self):
+        self.eventos = []
+    
+    def update(self, message, data=None):
+        self.eventos.append((message, getattr(data, 'id_cita', None)))
+
+
+@pytest.fixture
+def instancias(tmp_path):
+    ruta = str(tmp_path / 'citas.db')
+    local = CitaRepository(SQLiteConfig(ruta))
+    remota = CitaRepository(SQLiteConfig(ruta))
+    sincronizador = SincronizadorCitas(local, intervalo=3600)
+    registro = Registro()
+    local.attach(registro)
+    assert sincronizador.iniciar()
+    yield local, remota, sincronizador, registro
+    sincronizador.detener()
+    remota.close()
+    local.close()
+
+
+def test_publica_cambios_remotos_una_sola_vez(instancias):
+    local, remota, sincronizador, registro = instancias
+    nueva = Cita(1, 2, '2031-01-01', '10:00')
+    assert remota.add(nueva) is True
+    assert sincronizador.sincronizar() == 1
+    assert registro.eventos == [('cita_agregada', nueva.id_cita)]
+    assert sincronizador.sincronizar() == 0
+    
+    assert remota.update(1, Cita(1, 1, '2024-12-20', '12:00', id_cita=1)) is True
+    assert remota.cancel(2) is True
+    assert sincronizador.sincronizar() == 2
+    assert registro.eventos[1:] == [('cita_actualizada', 1), ('cita_cancelada', 2)]
+
+
+def test_no_repite_cambios_locales(instancias):
+    local, remota, sincronizador, registro = instancias
+    assert local.add(Cita(1, 2, '2031-01-01', '10:00')) is True
+    assert local.cancel(3) is True
+    registro.eventos.clear()
+    assert sincronizador.sincronizar() == 0
+    assert registro.eventos == []
+
+
+def test_eliminaciones_remotas_por_lapidas(instancias):
+    local, remota, sincronizador, registro = instancias
+    assert remota.delete(4) is True
+    assert sincronizador.sincronizar() == 1
+    assert registro.eventos == [('cita_eliminada', 4)]
+    assert local.get_by_id(4) is None
+    assert sincronizador.sincronizar() == 0
+    
+    local.db_config.execute_update("UPDATE citas_eliminadas SET eliminado_en = '2000-01-01 00:00:00'")
+    assert sincronizador.purgar() == 1
+    assert local.db_config.execute_query("SELECT COUNT(*) AS total FROM citas_eliminadas")[0]['total'] == 0
+
+
+def test_solo_lee_filas_posteriores_a_la_marca(instancias):
+    local, remota, sincronizador, registro = instancias
+    local.db_config.execute_update("UPDATE citas SET updated_at = '2000-01-01 00:00:00'")
+    antes = sincronizador.stats()['filas_leidas']
+    assert sincronizador.sincronizar() == 0
+    assert sincronizador.stats()['filas_leidas'] == antes
+    
+    assert remota.update(5, Cita(4, 5, '2024-12-20', '15:00', 'Cancelada', id_cita=5)) is True
+    assert sincronizador.sincronizar() == 1
+    assert sincronizador.stats()['filas_leidas'] == antes + 1
+    assert registro.eventos == [('cita_cancelada', 5)]
+
+
+def test_recarga_si_la_marca_supera_la_retencion(instancias):
+    local, remota, sincronizador, registro = instancias
+    sincronizador._marca = datetime(2000, 1, 1)
+    assert sincronizador.sincronizar() == 0
+    assert registro.eventos == [('citas_sincronizadas', None)]
+    assert sincronizador.stats()['recargas'] == 1
+    assert sincronizador.stats()['marca'] > '2000-01-01'
+
+
+def test_cambios_entre_marca_e_inicio_se_notifican(tmp_path):
+    ruta = str(tmp_path / 'citas.db')
+    local = CitaRepository(SQLiteConfig(ruta), defer_summary=True)
+    remota = CitaRepository(SQLiteConfig(ruta))
+    sincronizador = SincronizadorCitas(local, intervalo=3600)
+    registro = Registro()
+    local.attach(registro)
+    try:
+        local.db_config.execute_update("UPDATE citas SET updated_at = '2000-01-01 00:00:00'")
+        sincronizador.marcar()
+        nueva = Cita(1, 2, '2031-01-01', '10:00')
+        assert remota.add(nueva) is True
+        assert sincronizador.iniciar()
+        assert registro.eventos == [('cita_agregada', nueva.id_cita)]
+    finally:
+        sincronizador.detener()
+        remota.close()
+        local.close()
+
+
+def test_resumen_diferido_se_completa_antes_de_escribir(tmp_path):
+    ruta = str(tmp_path / 'citas.db')
+    CitaRepository(SQLiteConfig(ruta)).close()
+    diferido = CitaRepository(SQLiteConfig(ruta), defer_summary=True)
+    try:
+        diferido.db_config.execute_update("DELETE FROM resumen_citas")
+        assert diferido.add(Cita(5, 1, '2031-01-01', '10:00')) is True
+        assert diferido.resumen.verificar() == []
+        assert diferido.initialize_summary() is False
+    finally:
+        diferido.close()
+
+
+def test_importacion_confirmada_despues_del_margen(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'citas.db')
+    local = CitaRepository(SQLiteConfig(ruta))
+    remota = CitaRepository(SQLiteConfig(ruta))
+    sincronizador = SincronizadorCitas(local, intervalo=3600, margen=0)
+    registro = Registro()
+    local.attach(registro)
+    insert_rows = remota.db_config.insert_rows
+    insertadas = threading.Event()
+    
+    def insertar_lento(*args, **kwargs):
+        ids = insert_rows(*args, **kwargs)
+        insertadas.set()
+        time.sleep(2.2)
+        return ids
+    
+    monkeypatch.setattr(remota.db_config, 'insert_rows', insertar_lento)
+    try:
+        assert sincronizador.iniciar()
+        importacion = threading.Thread(target=remota.add_many, args=([Cita(5, 1, '2031-01-01', '10:00')],))
+        importacion.start()
+        assert insertadas.wait(5)
+        time.sleep(1.2)
+        assert sincronizador.sincronizar() == 0
+        importacion.join()
+        assert sincronizador.sincronizar() == 1
+        assert registro.eventos[-1][0] == 'cita_agregada'
+    finally:
+        sincronizador.detener()
+        remota.close()
+        local.close()
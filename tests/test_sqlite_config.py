@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from model.cita import Cita
+from model.cita_repository import CitaRepository
+from model.sqlite_config import SQLiteConfig
+
+
+def test_no_modifica_la_conversion_global_de_sqlite(db_config):
+    db_config.execute_query("SELECT 1")
+    assert (timedelta, sqlite3.PrepareProtocol) not in sqlite3.adapters
+    assert 'TIME' not in sqlite3.converters
+    conexion = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES)
+    conexion.execute("CREATE TABLE t (hora TIME)")
+    conexion.execute("INSERT INTO t VALUES ('08:00')")
+    assert conexion.execute("SELECT hora FROM t").fetchone()[0] == '08:00'
+    conexion.close()
+
+
+def test_convierte_fechas_y_horas_por_conexion(repository):
+    db_config = repository.db_config
+    db_config.execute_update(
+        "INSERT INTO citas (id_paciente, id_medico, fecha, hora, estado) VALUES (%s, %s, %s, %s, %s)",
+        (1, 1, date(2031, 5, 6), timedelta(hours=9, minutes=30), 'Programada')
+    )
+    fila = db_config.execute_query("SELECT * FROM citas ORDER BY id_cita DESC LIMIT 1")[0]
+    assert fila['fecha'] == date(2031, 5, 6)
+    assert fila['hora'] == timedelta(hours=9, minutes=30)
+    assert isinstance(fila['created_at'], datetime)
+    assert db_config.execute_query("SELECT MAX(fecha) AS ultima FROM citas")[0]['ultima'] == '2031-05-06'
+
+
+def test_base_en_memoria_sobrevive_a_una_conexion_descartada(repository):
+    db_config = repository.db_config
+    conexion = db_config.acquire_connection()
+    db_config.release_connection(conexion, discard=True)
+    assert repository.count() == 5
+    assert db_config.pool_stats()['size'] == 1
+
+
+def test_lectura_en_streaming_no_bloquea_escrituras_en_memoria(repository):
+    filas = repository.db_config.stream_query("SELECT id_cita FROM citas ORDER BY id_cita", batch_size=1)
+    assert next(filas)['id_cita'] == 1
+    assert repository.add(Cita(2, 3, '2031-01-01', '10:00')) is True
+    assert [fila['id_cita'] for fila in filas] == [2, 3, 4, 5]
+    assert repository.count() == 6
+
+
+def test_reconexion_descarta_sentencias_de_la_conexion_caida(tmp_path, monkeypatch):
+    ruta = str(tmp_path / 'citas.db')
+    CitaRepository(SQLiteConfig(ruta)).close()
+    config = SQLiteConfig(ruta, prepared_statements=True)
+    try:
+        config.execute_query("SELECT COUNT(*) AS total FROM citas WHERE id_medico = %s", (1,), prepared=True)
+        anterior = config.get_connection()
+        assert config.statement_stats()['open'] == 1
+        
+        monkeypatch.setattr(config, '_is_alive', lambda connection: False)
+        nueva = config.get_connection()
+        assert nueva is not anterior
+        assert config.statement_stats()['open'] == 0
+        with pytest.raises(sqlite3.ProgrammingError):
+            anterior.execute("SELECT 1")
+    finally:
+        config.close_connection()
+
+
+def test_estadisticas_de_sentencias_con_pool(tmp_path):
+    ruta = str(tmp_path / 'citas.db')
+    CitaRepository(SQLiteConfig(ruta)).close()
+    config = SQLiteConfig(ruta, pool_size=5, prepared_statements=True, statement_cache_size=2)
+    consultas = [f"SELECT COUNT(*) AS total FROM citas WHERE id_medico = %s AND {n} = {n}" for n in range(3)]
+    
+    def consultar(hilo):
+        for vuelta in range(200):
+            config.execute_query(consultas[(hilo + vuelta) % 3], (1,), prepared=True)
+    
+    try:
+        hilos = [threading.Thread(target=consultar, args=(hilo,)) for hilo in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        stats = config.statement_stats()
+        assert stats['hits'] + stats['misses'] == 8 * 200
+        assert stats['misses'] - stats['evictions'] == stats['open']
+    finally:
+        config.close_connection()
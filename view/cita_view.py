@@ -1,22 +1,32 @@
 import tkinter as tk
+from bisect import bisect_left
 from tkinter import ttk, messagebox
-from typing import Optional
+from typing import Callable, Optional
 from datetime import datetime, date
 from model.cita import Cita
+from model.cita_batch import CitaBatch, clave_orden
 from model.observer import Observer
 from viewmodel.cita_viewmodel import CitaViewModel
+from view.virtual_list import VirtualCitaList
 
 
 class CitaView(Observer):
-    def __init__(self, root: tk.Tk, viewmodel: CitaViewModel):
+    def __init__(self, root: tk.Tk, viewmodel: CitaViewModel, lista_virtual: bool = False,
+                 al_cargar: Optional[Callable[[], None]] = None):
         self.root = root
         self.viewmodel = viewmodel
         self.viewmodel.attach_view(self)
         self.cita_seleccionada: Optional[Cita] = None
-        self._cita_map: dict[int, Cita] = {}
+        self.lista_virtual = lista_virtual
+        self._lista_virtual: Optional[VirtualCitaList] = None
+        self._lote = CitaBatch()
+        self._cambios: dict[int, Optional[Cita]] = {}
+        self._orden: list[int] = []
+        self._cargando = False
         self._medicos_dict: dict[str, int] = {}
+        self._al_cargar = al_cargar
         self._setup_ui()
-        self._cargar_citas()
+        self.root.after(0, self._cargar_citas)
     
     def _setup_ui(self):
         self.root.title("Sistema de Gestión de Citas Médicas - Salud Integral")
@@ -85,7 +95,19 @@ class CitaView(Observer):
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
         columns = ('Fecha', 'Hora', 'Paciente', 'Médico', 'Estado', 'ID')
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
+        if self.lista_virtual:
+            self._lista_virtual = VirtualCitaList(
+                list_frame, columns,
+                contar=self.viewmodel.contar_citas,
+                cargar_pagina=self.viewmodel.get_citas_pagina,
+                formatear=self._valores_fila,
+                on_select=self._seleccionar_cita,
+                ejecutar=self.viewmodel.ejecutar,
+                on_error=self._on_error_tarea
+            )
+            self.tree = self._lista_virtual.tree
+        else:
+            self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', height=15)
         self.tree.heading('Fecha', text='Fecha')
         self.tree.heading('Hora', text='Hora')
         self.tree.heading('Paciente', text='Paciente')
@@ -98,12 +120,15 @@ class CitaView(Observer):
         self.tree.column('Médico', width=200)
         self.tree.column('Estado', width=100)
         self.tree.column('ID', width=50)
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        self.tree.bind('<<TreeviewSelect>>', self._on_select)
-        
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.tag_configure('Cancelada', foreground='red')
+        self.tree.tag_configure('Completada', foreground='green')
+        if not self.lista_virtual:
+            self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            self.tree.bind('<<TreeviewSelect>>', self._on_select)
+            
+            scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            self.tree.configure(yscrollcommand=scrollbar.set)
         
         action_frame = ttk.Frame(main_frame)
         action_frame.pack(fill=tk.X)
@@ -123,7 +148,9 @@ class CitaView(Observer):
         self._cargar_comboboxes()
     
     def _cargar_comboboxes(self):
-        medicos = self.viewmodel.get_all_medicos()
+        self.viewmodel.get_all_medicos_async(self._mostrar_medicos, on_error=self._on_error_tarea)
+    
+    def _mostrar_medicos(self, medicos: list):
         nombres_medicos = [m.nombre_completo for m in medicos]
         self.medico_combo['values'] = nombres_medicos
         self._medicos_dict = {m.nombre_completo: m.id_medico for m in medicos}
@@ -165,19 +192,6 @@ class CitaView(Observer):
         
         return True
     
-    def _obtener_o_crear_paciente(self, nombre: str) -> Optional[int]:
-        if not self.viewmodel.paciente_repo:
-            return None
-        from model.paciente import Paciente
-        pacientes = self.viewmodel.paciente_repo.get_all()
-        for p in pacientes:
-            if p.nombre_completo.lower() == nombre.lower():
-                return p.id_paciente
-        nueva_paciente = Paciente(nombre)
-        if self.viewmodel.paciente_repo.add(nueva_paciente):
-            return nueva_paciente.id_paciente
-        return None
-    
     def _guardar_cita(self):
         self.btn_guardar.config(state='disabled')
         self.root.after(500, lambda: self.btn_guardar.config(state='normal'))
@@ -201,21 +215,15 @@ class CitaView(Observer):
             self._mostrar_mensaje("Médico no válido. Por favor seleccione uno de la lista", "error")
             return
         
-        id_paciente = self._obtener_o_crear_paciente(nombre_paciente)
-        if not id_paciente:
-            self._mostrar_mensaje("No se pudo crear el paciente", "error")
-            return
-        
         if not self._validar_fecha_hora(fecha, hora):
             return
         
-        exito, mensaje = self.viewmodel.agregar_cita(id_paciente, id_medico, fecha, hora, estado)
-        
-        if exito:
-            self._mostrar_mensaje(f"✓ {mensaje}", "info")
-            self.root.after(1500, self._limpiar_formulario)
-        else:
-            self._mostrar_mensaje(f"✗ {mensaje}", "error")
+        self._mostrar_mensaje("Guardando cita...", "")
+        self.viewmodel.agendar_cita_async(
+            nombre_paciente, id_medico, fecha, hora, estado,
+            callback=lambda resultado: self._on_resultado(resultado, demora=1500),
+            on_error=self._on_error_tarea
+        )
     
     def _actualizar_cita(self):
         if not self.cita_seleccionada:
@@ -244,24 +252,16 @@ class CitaView(Observer):
             self._mostrar_mensaje("Médico no válido. Por favor seleccione uno de la lista", "error")
             return
         
-        id_paciente = self._obtener_o_crear_paciente(nombre_paciente)
-        if not id_paciente:
-            self._mostrar_mensaje("No se pudo crear el paciente", "error")
-            return
-        
         if not self._validar_fecha_hora(fecha, hora):
             return
         
-        exito, mensaje = self.viewmodel.actualizar_cita(
+        self._mostrar_mensaje("Actualizando cita...", "")
+        self.viewmodel.reprogramar_cita_async(
             self.cita_seleccionada.id_cita,
-            id_paciente, id_medico, fecha, hora, estado
+            nombre_paciente, id_medico, fecha, hora, estado,
+            callback=lambda resultado: self._on_resultado(resultado, demora=1500),
+            on_error=self._on_error_tarea
         )
-        
-        if exito:
-            self._mostrar_mensaje(f"✓ {mensaje}", "info")
-            self.root.after(1500, self._limpiar_formulario)
-        else:
-            self._mostrar_mensaje(f"✗ {mensaje}", "error")
     
     def _editar_cita_seleccionada(self):
         if not self.cita_seleccionada:
@@ -283,12 +283,11 @@ class CitaView(Observer):
         )
         
         if confirmar:
-            exito, mensaje = self.viewmodel.eliminar_cita(self.cita_seleccionada.id_cita)
-            if exito:
-                self._mostrar_mensaje(f"✓ {mensaje}", "info")
-                self._limpiar_formulario()
-            else:
-                self._mostrar_mensaje(f"✗ {mensaje}", "error")
+            self.viewmodel.eliminar_cita_async(
+                self.cita_seleccionada.id_cita,
+                callback=self._on_resultado,
+                on_error=self._on_error_tarea
+            )
     
     def _marcar_cancelada(self):
         if not self.cita_seleccionada:
@@ -304,19 +303,16 @@ class CitaView(Observer):
             f"¿Desea marcar la cita {self.cita_seleccionada.id_cita} como Cancelada?"
         )
         if confirmar:
-            exito, mensaje = self.viewmodel.actualizar_cita(
+            self.viewmodel.actualizar_cita_async(
                 self.cita_seleccionada.id_cita,
                 self.cita_seleccionada.id_paciente,
                 self.cita_seleccionada.id_medico,
                 self.cita_seleccionada.fecha,
                 self.cita_seleccionada.hora,
-                'Cancelada'
+                'Cancelada',
+                callback=self._on_resultado,
+                on_error=self._on_error_tarea
             )
-            if exito:
-                self._mostrar_mensaje(f"✓ {mensaje}", "info")
-                self._limpiar_formulario()
-            else:
-                self._mostrar_mensaje(f"✗ {mensaje}", "error")
     
     def _marcar_completada(self):
         if not self.cita_seleccionada:
@@ -332,36 +328,44 @@ class CitaView(Observer):
             f"¿Desea marcar la cita {self.cita_seleccionada.id_cita} como Completada?"
         )
         if confirmar:
-            exito, mensaje = self.viewmodel.actualizar_cita(
+            self.viewmodel.actualizar_cita_async(
                 self.cita_seleccionada.id_cita,
                 self.cita_seleccionada.id_paciente,
                 self.cita_seleccionada.id_medico,
                 self.cita_seleccionada.fecha,
                 self.cita_seleccionada.hora,
-                'Completada'
+                'Completada',
+                callback=self._on_resultado,
+                on_error=self._on_error_tarea
             )
-            if exito:
-                self._mostrar_mensaje(f"✓ {mensaje}", "info")
-                self._limpiar_formulario()
-            else:
-                self._mostrar_mensaje(f"✗ {mensaje}", "error")
     
     def _on_select(self, event):
         selection = self.tree.selection()
         if selection:
             item = self.tree.item(selection[0])
             id_cita = item['values'][5]
-            cita = self._cita_map.get(id_cita)
-            if not cita:
-                cita = self.viewmodel.get_cita_by_id(id_cita)
-                if cita:
-                    self._cita_map[id_cita] = cita
+            cita = self._cita(id_cita)
             if cita:
-                self.cita_seleccionada = cita
-                self.btn_editar.config(state='normal')
-                self.btn_eliminar.config(state='normal')
-                self.btn_cancelar_estado.config(state='normal')
-                self.btn_completar.config(state='normal')
+                self.viewmodel.cancelar_tareas('seleccion_cita')
+                self._seleccionar_cita(cita)
+            else:
+                self.viewmodel.get_cita_by_id_async(id_cita, self._on_cita_obtenida,
+                                                    on_error=self._on_error_tarea)
+        else:
+            self.viewmodel.cancelar_tareas('seleccion_cita')
+            self._seleccionar_cita(None)
+    
+    def _on_cita_obtenida(self, cita: Optional[Cita]):
+        if cita:
+            self._seleccionar_cita(cita)
+    
+    def _seleccionar_cita(self, cita: Optional[Cita]):
+        if cita:
+            self.cita_seleccionada = cita
+            self.btn_editar.config(state='normal')
+            self.btn_eliminar.config(state='normal')
+            self.btn_cancelar_estado.config(state='normal')
+            self.btn_completar.config(state='normal')
         else:
             self.cita_seleccionada = None
             self.btn_editar.config(state='disabled')
@@ -393,26 +397,127 @@ class CitaView(Observer):
         self.hora_entry.insert(0, cita.hora)
         self.estado_combo.set(cita.estado)
     
+    @staticmethod
+    def _valores_fila(cita: Cita) -> tuple:
+        nombre_paciente = cita.nombre_paciente or f"Paciente {cita.id_paciente}"
+        nombre_medico = cita.nombre_medico or f"Médico {cita.id_medico}"
+        return (
+            cita.fecha,
+            cita.hora,
+            nombre_paciente,
+            nombre_medico,
+            cita.estado,
+            cita.id_cita
+        )
+    
+    def _carga_completa(self):
+        if self._al_cargar is not None:
+            al_cargar, self._al_cargar = self._al_cargar, None
+            al_cargar()
+    
     def _cargar_citas(self):
+        if self._lista_virtual is not None:
+            self._lista_virtual.refrescar(self._carga_completa)
+            return
+        self._cargando = True
+        self.viewmodel.get_lote_citas_async(self._mostrar_citas, on_error=self._on_error_tarea)
+    
+    def _mostrar_citas(self, lote: CitaBatch):
+        self._cargando = False
         for item in self.tree.get_children():
             self.tree.delete(item)
-        self._cita_map.clear()
-        citas = self.viewmodel.get_all_citas()
-        citas.sort(key=lambda c: (c.fecha, c.hora))
-        for cita in citas:
-            self._cita_map[cita.id_cita] = cita
-            nombre_paciente = cita.nombre_paciente or f"Paciente {cita.id_paciente}"
-            nombre_medico = cita.nombre_medico or f"Médico {cita.id_medico}"
-            self.tree.insert('', tk.END, values=(
-                cita.fecha,
-                cita.hora,
-                nombre_paciente,
-                nombre_medico,
-                cita.estado,
-                cita.id_cita
-            ), tags=(cita.estado,))
-        self.tree.tag_configure('Cancelada', foreground='red')
-        self.tree.tag_configure('Completada', foreground='green')
+        self._lote = lote
+        self._cambios.clear()
+        self._orden = [lote.clave_orden(posicion) for posicion in range(len(lote))]
+        for cita in lote:
+            self.tree.insert('', tk.END, iid=str(cita.id_cita),
+                             values=self._valores_fila(cita), tags=(cita.estado,))
+        self._orden.sort()
+        self._carga_completa()
+    
+    def _cita(self, id_cita: int) -> Optional[Cita]:
+        if id_cita in self._cambios:
+            return self._cambios[id_cita]
+        return self._lote.get(id_cita)
+    
+    @staticmethod
+    def _clave_orden(cita: Cita) -> int:
+        return clave_orden(cita.fecha, cita.hora, cita.id_cita)
+    
+    def _insertar_fila(self, cita: Cita):
+        clave = self._clave_orden(cita)
+        indice = bisect_left(self._orden, clave)
+        self._orden.insert(indice, clave)
+        self._cambios[cita.id_cita] = cita
+        self.tree.insert('', indice, iid=str(cita.id_cita),
+                         values=self._valores_fila(cita), tags=(cita.estado,))
+    
+    def _quitar_fila(self, id_cita: int):
+        anterior = self._cita(id_cita)
+        indice = bisect_left(self._orden, self._clave_orden(anterior))
+        del self._orden[indice]
+        self._cambios[id_cita] = None
+        self.tree.delete(str(id_cita))
+    
+    def _aplicar_evento(self, message: str, data) -> bool:
+        if self._cargando or not isinstance(data, Cita) or data.id_cita is None:
+            return False
+        if self._lista_virtual is not None:
+            if not self._lista_virtual.aplicar_evento(message, data):
+                return False
+        elif not self._aplicar_evento_tabla(message, data):
+            return False
+        self._actualizar_seleccion(message, data)
+        return True
+    
+    def _actualizar_seleccion(self, message: str, data: Cita):
+        if self.cita_seleccionada and self.cita_seleccionada.id_cita == data.id_cita:
+            if message == 'cita_eliminada':
+                self._seleccionar_cita(None)
+            else:
+                self.cita_seleccionada = data
+                if self._lista_virtual is None and str(data.id_cita) not in self.tree.selection():
+                    self.tree.selection_set(str(data.id_cita))
+    
+    def _aplicar_evento_tabla(self, message: str, data: Cita) -> bool:
+        id_cita = data.id_cita
+        if message in ('cita_agregada', 'cita_actualizada', 'cita_cancelada'):
+            if not (data.nombre_paciente and data.nombre_medico):
+                return False
+            try:
+                clave = self._clave_orden(data)
+            except (TypeError, ValueError):
+                return False
+            anterior = self._cita(id_cita)
+            if anterior is None:
+                self._insertar_fila(data)
+            elif self._clave_orden(anterior) == clave:
+                self._cambios[id_cita] = data
+                self.tree.item(str(id_cita), values=self._valores_fila(data), tags=(data.estado,))
+            else:
+                self._quitar_fila(id_cita)
+                self._insertar_fila(data)
+        elif message == 'cita_eliminada':
+            if self._cita(id_cita) is not None:
+                self._quitar_fila(id_cita)
+        else:
+            return False
+        return True
+    
+    def _on_resultado(self, resultado: tuple, demora: int = 0):
+        exito, mensaje = resultado
+        if exito:
+            self._mostrar_mensaje(f"✓ {mensaje}", "info")
+            if demora:
+                self.root.after(demora, self._limpiar_formulario)
+            else:
+                self._limpiar_formulario()
+        else:
+            self._mostrar_mensaje(f"✗ {mensaje}", "error")
+    
+    def _on_error_tarea(self, error: BaseException):
+        self._mostrar_mensaje(f"✗ Error de base de datos: {error}", "error")
+        print(f"Error en operación de base de datos: {error}")
     
     def _mostrar_mensaje(self, mensaje: str, tipo: str = "info"):
         self.mensaje_label.config(text=mensaje)
@@ -426,7 +531,26 @@ class CitaView(Observer):
             self.mensaje_label.config(foreground='black')
     
     def update(self, message: str, data=None):
-        self._cargar_citas()
-        self._cargar_comboboxes()
+        if not self._aplicar_evento(message, data):
+            self._cargar_citas()
+            self._cargar_comboboxes()
         print(f"Vista notificada: {message}")
+    
+    def _aplicar_eventos(self, eventos) -> bool:
+        if self._lista_virtual is None:
+            return all(self._aplicar_evento(message, data) for message, data in eventos)
+        if self._cargando or not all(isinstance(data, Cita) and data.id_cita is not None for _, data in eventos):
+            return False
+        if not self._lista_virtual.aplicar_eventos(eventos):
+            return False
+        for message, data in eventos:
+            self._actualizar_seleccion(message, data)
+        return True
+    
+    def update_many(self, eventos):
+        recargar = not self._aplicar_eventos(eventos)
+        if recargar:
+            self._cargar_citas()
+            self._cargar_comboboxes()
+        print(f"Vista notificada: {len(eventos)} eventos")
 
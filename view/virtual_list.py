@@ -0,0 +1,337 @@
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from model.cita import Cita
+
+CARGANDO = 'cargando'
+
+
+class VirtualCitaList:
+    def __init__(self, parent, columns: Sequence[str],
+                 contar: Callable[[], int],
+                 cargar_pagina: Callable[[int, int, Optional[Tuple[str, str, int]]], List[Cita]],
+                 formatear: Callable[[Cita], tuple],
+                 on_select: Callable[[Optional[Cita]], None],
+                 ejecutar: Callable[..., Any],
+                 on_error: Optional[Callable[[BaseException], None]] = None,
+                 page_size: int = 100,
+                 max_pages: int = 8,
+                 height: int = 15):
+        self.contar = contar
+        self.cargar_pagina = cargar_pagina
+        self.formatear = formatear
+        self.on_select = on_select
+        self.ejecutar = ejecutar
+        self.on_error = on_error
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.total = 0
+        self.first = 0
+        self.visible = height
+        self.seleccionado_id: Optional[int] = None
+        self._paginas: OrderedDict[int, List[Cita]] = OrderedDict()
+        self._filas: List[Optional[Cita]] = []
+        self._seleccion_esperada: tuple = ()
+        self._seleccion_pendiente: Optional[int] = None
+        self._version = 0
+        self._solicitadas: Optional[Tuple[int, Tuple[int, ...]]] = None
+        self._contando = False
+        self._al_refrescar: Optional[Callable[[], None]] = None
+        self._clave_total = ('lista_virtual', id(self), 'total')
+        self._clave_paginas = ('lista_virtual', id(self), 'paginas')
+        self._marcador = ('Cargando...',) + ('',) * (len(columns) - 1)
+        
+        self.tree = ttk.Treeview(parent, columns=tuple(columns), show='headings', height=height)
+        self.tree.tag_configure(CARGANDO, foreground='gray')
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(parent, orient=tk.VERTICAL, command=self._yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind('<<TreeviewSelect>>', self._on_tree_select)
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self._scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self._scroll(3))
+        self.tree.bind('<Up>', lambda event: self._mover_seleccion(-1))
+        self.tree.bind('<Down>', lambda event: self._mover_seleccion(1))
+        self.tree.bind('<Prior>', lambda event: self._mover_seleccion(-self.visible))
+        self.tree.bind('<Next>', lambda event: self._mover_seleccion(self.visible))
+    
+    def refrescar(self, al_terminar: Optional[Callable[[], None]] = None):
+        self._al_refrescar = al_terminar
+        self.invalidar()
+        self._recontar()
+        self._render()
+    
+    def invalidar(self):
+        self._paginas.clear()
+        self._version += 1
+    
+    def _recontar(self):
+        self._contando = True
+        self.ejecutar(self.contar, clave=self._clave_total, descartar_anteriores=True,
+                      callback=self._on_total, on_error=self._on_error_carga)
+    
+    def _on_total(self, total: int):
+        self._contando = False
+        self.total = total
+        self._render()
+    
+    def _on_error_carga(self, error: BaseException):
+        self._contando = False
+        self._solicitadas = None
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"Error cargando la lista de citas: {error}")
+    
+    @staticmethod
+    def _clave(cita: Cita) -> Tuple[str, str, int]:
+        return (cita.fecha, cita.hora, cita.id_cita)
+    
+    def _ubicar(self, id_cita: int) -> Optional[Tuple[int, int]]:
+        for numero, pagina in self._paginas.items():
+            for indice, cita in enumerate(pagina):
+                if cita.id_cita == id_cita:
+                    return numero, indice
+        return None
+    
+    def _aplicar(self, message: str, cita: Cita) -> bool:
+        if message not in ('cita_agregada', 'cita_actualizada', 'cita_cancelada', 'cita_eliminada'):
+            return False
+        ubicacion = self._ubicar(cita.id_cita)
+        if message == 'cita_eliminada':
+            afectadas = [self._paginas[ubicacion[0]][ubicacion[1]]] if ubicacion else None
+            self.total = max(self.total - 1, 0)
+            if self.seleccionado_id == cita.id_cita:
+                self.seleccionado_id = None
+        else:
+            if not (cita.nombre_paciente and cita.nombre_medico):
+                return False
+            if ubicacion:
+                numero, indice = ubicacion
+                anterior = self._paginas[numero][indice]
+                if self._clave(anterior) == self._clave(cita):
+                    self._paginas[numero][indice] = cita
+                    return True
+                afectadas = [anterior, cita]
+            elif message == 'cita_agregada':
+                afectadas = [cita]
+                self.total += 1
+            elif message == 'cita_cancelada':
+                return True
+            else:
+                afectadas = None
+        if afectadas is None:
+            self._paginas.clear()
+        else:
+            minima = min(self._clave(afectada) for afectada in afectadas)
+            for numero in [numero for numero, pagina in self._paginas.items()
+                           if len(pagina) < self.page_size or self._clave(pagina[-1]) >= minima]:
+                del self._paginas[numero]
+        return True
+    
+    def aplicar_evento(self, message: str, cita: Cita) -> bool:
+        return self.aplicar_eventos([(message, cita)])
+    
+    def aplicar_eventos(self, eventos: List[Tuple[str, Cita]]) -> bool:
+        self._version += 1
+        for message, cita in eventos:
+            if not self._aplicar(message, cita):
+                return False
+        if any(message in ('cita_agregada', 'cita_eliminada') for message, cita in eventos):
+            self._recontar()
+        self._render()
+        return True
+    
+    def get_cita(self, id_cita: int) -> Optional[Cita]:
+        for pagina in self._paginas.values():
+            for cita in pagina:
+                if cita.id_cita == id_cita:
+                    return cita
+        return None
+    
+    def _leer_paginas(self, solicitudes: List[Tuple[int, Optional[Tuple[str, str, int]]]]) -> Dict[int, List[Cita]]:
+        paginas: Dict[int, List[Cita]] = {}
+        for numero, despues in solicitudes:
+            anterior = paginas.get(numero - 1)
+            if despues is None and anterior and len(anterior) == self.page_size:
+                despues = self._clave(anterior[-1])
+            if despues is not None:
+                paginas[numero] = self.cargar_pagina(0, self.page_size, despues)
+            else:
+                paginas[numero] = self.cargar_pagina(numero * self.page_size, self.page_size, None)
+        return paginas
+    
+    def _solicitar(self, numeros: List[int]):
+        solicitud = (self._version, tuple(numeros))
+        if solicitud == self._solicitadas:
+            return
+        self._solicitadas = solicitud
+        solicitudes = []
+        for numero in numeros:
+            anterior = self._paginas.get(numero - 1)
+            despues = self._clave(anterior[-1]) if anterior and len(anterior) == self.page_size else None
+            solicitudes.append((numero, despues))
+        version = self._version
+        self.ejecutar(self._leer_paginas, solicitudes, clave=self._clave_paginas, descartar_anteriores=True,
+                      callback=lambda paginas: self._on_paginas(version, paginas),
+                      on_error=self._on_error_carga)
+    
+    def _on_paginas(self, version: int, paginas: Dict[int, List[Cita]]):
+        self._solicitadas = None
+        if version == self._version:
+            for numero, pagina in paginas.items():
+                self._paginas[numero] = pagina
+                self._paginas.move_to_end(numero)
+            while len(self._paginas) > self.max_pages:
+                self._paginas.popitem(last=False)
+        self._render()
+    
+    def _faltantes(self, inicio: int, cantidad: int) -> List[int]:
+        fin = min(inicio + cantidad, self.total)
+        if inicio >= fin:
+            return []
+        return [numero for numero in range(inicio // self.page_size, (fin - 1) // self.page_size + 1)
+                if numero not in self._paginas]
+    
+    def filas(self, inicio: int, cantidad: int) -> List[Optional[Cita]]:
+        fin = min(inicio + cantidad, self.total)
+        if inicio >= fin:
+            return []
+        resultado: List[Optional[Cita]] = []
+        for numero in range(inicio // self.page_size, (fin - 1) // self.page_size + 1):
+            base = numero * self.page_size
+            desde = max(inicio - base, 0)
+            hasta = min(fin - base, self.page_size)
+            pagina = self._paginas.get(numero)
+            if pagina is None:
+                resultado.extend([None] * (hasta - desde))
+            else:
+                self._paginas.move_to_end(numero)
+                resultado.extend(pagina[desde:min(hasta, len(pagina))])
+        return resultado
+    
+    def _max_first(self) -> int:
+        return max(self.total - self.visible, 0)
+    
+    def _render(self):
+        self.first = min(max(self.first, 0), self._max_first())
+        faltantes = self._faltantes(self.first, self.visible)
+        if faltantes:
+            self._solicitar(faltantes)
+        self._filas = self.filas(self.first, self.visible)
+        items = self.tree.get_children()
+        for indice in range(len(items), len(self._filas)):
+            self.tree.insert('', tk.END, iid=f"fila{indice}")
+        items = self.tree.get_children()
+        seleccion = ()
+        for indice, iid in enumerate(items):
+            if indice < len(self._filas):
+                cita = self._filas[indice]
+                if cita is None:
+                    self.tree.item(iid, values=self._marcador, tags=(CARGANDO,))
+                    continue
+                self.tree.item(iid, values=self.formatear(cita), tags=(cita.estado,))
+                if cita.id_cita == self.seleccionado_id:
+                    seleccion = (iid,)
+            else:
+                self.tree.delete(iid)
+        if self.tree.selection() != seleccion:
+            self._seleccion_esperada = seleccion
+            self.tree.selection_set(seleccion)
+        if self.total:
+            self.scrollbar.set(self.first / self.total,
+                               min(self.first + self.visible, self.total) / self.total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self._resolver_seleccion()
+        if self._al_refrescar is not None and not self._contando and None not in self._filas:
+            al_refrescar, self._al_refrescar = self._al_refrescar, None
+            al_refrescar()
+    
+    def _yview(self, *args):
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * self.total)
+        elif args[0] == 'scroll':
+            pasos = int(args[1])
+            self.first += pasos * (self.visible if args[2] == 'pages' else 1)
+        self._render()
+    
+    def _scroll(self, pasos: int):
+        self.first += pasos
+        self._render()
+        return 'break'
+    
+    def _on_mousewheel(self, event):
+        if abs(event.delta) >= 120:
+            pasos = -event.delta // 120 * 3
+        else:
+            pasos = -event.delta
+        return self._scroll(pasos)
+    
+    def _on_configure(self, event):
+        style = ttk.Style()
+        alto_fila = int(style.lookup('Treeview', 'rowheight') or 20)
+        visibles = max((event.height - alto_fila) // alto_fila, 1)
+        if visibles != self.visible:
+            self.visible = visibles
+            self._render()
+    
+    def _indice_seleccionado(self) -> Optional[int]:
+        if self.seleccionado_id is None:
+            return None
+        for indice, cita in enumerate(self._filas):
+            if cita is not None and cita.id_cita == self.seleccionado_id:
+                return self.first + indice
+        return None
+    
+    def _mover_seleccion(self, pasos: int):
+        actual = self._seleccion_pendiente
+        if actual is None:
+            actual = self._indice_seleccionado()
+        destino = self.first if actual is None else actual + pasos
+        destino = min(max(destino, 0), self.total - 1)
+        if destino < 0:
+            return 'break'
+        if destino < self.first:
+            self.first = destino
+        elif destino >= self.first + self.visible:
+            self.first = destino - self.visible + 1
+        self._seleccion_pendiente = destino
+        self._render()
+        return 'break'
+    
+    def _resolver_seleccion(self):
+        if self._seleccion_pendiente is None:
+            return
+        indice = self._seleccion_pendiente - self.first
+        if not 0 <= indice < len(self._filas):
+            self._seleccion_pendiente = None
+            return
+        cita = self._filas[indice]
+        if cita is None:
+            return
+        self._seleccion_pendiente = None
+        self.seleccionado_id = cita.id_cita
+        iid = self.tree.get_children()[indice]
+        if self.tree.selection() != (iid,):
+            self._seleccion_esperada = (iid,)
+            self.tree.selection_set((iid,))
+        self.on_select(cita)
+    
+    def _on_tree_select(self, event):
+        seleccion = self.tree.selection()
+        if seleccion == self._seleccion_esperada:
+            return
+        self._seleccion_esperada = seleccion
+        cita = None
+        if seleccion:
+            indice = self.tree.index(seleccion[0])
+            if indice < len(self._filas):
+                cita = self._filas[indice]
+        self.seleccionado_id = cita.id_cita if cita else None
+        self.on_select(cita)
@@ -1,4 +1,5 @@
 from .cita_viewmodel import CitaViewModel
+from .task_executor import TaskExecutor
 
-__all__ = ['CitaViewModel']
+__all__ = ['CitaViewModel', 'TaskExecutor']
 
@@ -1,21 +1,67 @@
-from typing import List, Optional
-from datetime import datetime
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
 from model.cita import Cita
+from model.cita_batch import CitaBatch
+from model.event_bus import Event, Subscription
+from model.disponibilidad import BuscadorHuecos, a_fecha
+from model.horario import Hueco
+from model.reportes import HistorialCitas, Tabla, resumen_periodo
+from model.paciente import normalizar_nombre
 from model.cita_repository import CitaRepository
 from model.paciente_repository import PacienteRepository
 from model.medico_repository import MedicoRepository
 from model.observer import Observer
+from .task_executor import TaskExecutor
+
+DIAS_BUSQUEDA_HUECOS = 60
+EVENTOS_CITAS = ('cita_*', 'citas_*')
+
+
+class ResultadoCita:
+    __slots__ = ('exito', 'mensaje', 'cita', 'codigo')
+    
+    def __init__(self, exito: bool, mensaje: str, cita: Optional[Cita] = None, codigo: Optional[str] = None):
+        self.exito = exito
+        self.mensaje = mensaje
+        self.cita = cita
+        self.codigo = codigo
+
+
+def _clave_evento(evento: Event):
+    if isinstance(evento.data, Cita) and evento.data.id_cita is not None:
+        return evento.data.id_cita
+    return None
+
+
+def _fusionar_eventos(anterior: Event, nuevo: Event) -> Optional[Event]:
+    if anterior.topic != 'cita_agregada':
+        return Event(nuevo.topic, nuevo.data, anterior.published)
+    if nuevo.topic == 'cita_eliminada':
+        return None
+    return Event('cita_agregada', nuevo.data, anterior.published)
 
 
 class CitaViewModel(Observer):
     def __init__(self, repository: CitaRepository, 
                  paciente_repo: PacienteRepository = None,
-                 medico_repo: MedicoRepository = None):
+                 medico_repo: MedicoRepository = None,
+                 executor: TaskExecutor = None,
+                 buscador: BuscadorHuecos = None):
         self.repository = repository
         self.paciente_repo = paciente_repo
         self.medico_repo = medico_repo
-        self.repository.attach(self)
+        self.executor = executor
+        self.buscador = buscador
         self._view_observers: List[Observer] = []
+        self._suscripcion: Optional[Subscription] = None
+        if self.repository.event_bus is not None:
+            self._suscripcion = self.repository.event_bus.subscribe(
+                self._recibir_eventos, topics=EVENTOS_CITAS, coalesce_key=_clave_evento,
+                merge=_fusionar_eventos
+            )
+        else:
+            self.repository.attach(self)
     
     def attach_view(self, observer: Observer):
         if observer not in self._view_observers:
@@ -29,12 +75,115 @@ class CitaViewModel(Observer):
         for observer in self._view_observers:
             observer.update(message, data)
     
+    def _notify_views_lote(self, eventos: List[Tuple[str, Any]]):
+        for observer in self._view_observers:
+            observer.update_many(eventos)
+    
+    def _preparar(self, message: str, data=None):
+        if message in ('cita_agregada', 'cita_actualizada') and isinstance(data, Cita):
+            return self._completar_nombres(data)
+        return data
+    
     def update(self, message: str, data=None):
-        self._notify_views(message, data)
+        data = self._preparar(message, data)
+        if self.executor is not None:
+            self.executor.llamar_en_ui(self._notify_views, message, data)
+        else:
+            self._notify_views(message, data)
+    
+    def _recibir_eventos(self, eventos: List[Event]):
+        lote = [(evento.topic, self._preparar(evento.topic, evento.data)) for evento in eventos]
+        if self.executor is not None:
+            self.executor.llamar_en_ui(self._notify_views_lote, lote)
+        else:
+            self._notify_views_lote(lote)
+    
+    def desconectar(self):
+        if self._suscripcion is not None:
+            self.repository.event_bus.unsubscribe(self._suscripcion)
+            self._suscripcion = None
+        else:
+            self.repository.detach(self)
+    
+    def _completar_nombres(self, cita: Cita) -> Cita:
+        if cita.nombre_paciente and cita.nombre_medico:
+            return cita
+        if cita.id_cita is not None:
+            completa = self.repository.get_by_id(cita.id_cita)
+            if completa:
+                return completa
+        return cita
+    
+    def ejecutar(self, fn: Callable, *args,
+                 clave=None,
+                 descartar_anteriores: bool = False,
+                 callback: Optional[Callable[[Any], None]] = None,
+                 on_error: Optional[Callable[[BaseException], None]] = None) -> Future:
+        if self.executor is not None:
+            return self.executor.submit(fn, *args, clave=clave,
+                                        descartar_anteriores=descartar_anteriores,
+                                        callback=callback, on_error=on_error)
+        future = Future()
+        try:
+            resultado = fn(*args)
+        except Exception as e:
+            future.set_exception(e)
+            if on_error:
+                on_error(e)
+            else:
+                print(f"Error en tarea: {e}")
+        else:
+            future.set_result(resultado)
+            if callback:
+                callback(resultado)
+        return future
+    
+    def cancelar_tareas(self, clave):
+        if self.executor is not None:
+            self.executor.cancelar(clave)
     
     def get_all_citas(self) -> List[Cita]:
         return self.repository.get_all()
     
+    def get_lote_citas(self) -> CitaBatch:
+        return self.repository.get_batch()
+    
+    def contar_citas(self, **filtros) -> int:
+        return self.repository.count(**filtros)
+    
+    def get_resumen_diario(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                           id_medico: Optional[int] = None) -> List[dict]:
+        return self.repository.get_resumen(('fecha', 'id_medico', 'estado'), desde, hasta, id_medico)
+    
+    def get_totales_por_estado(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                               id_medico: Optional[int] = None) -> Dict[str, int]:
+        filas = self.repository.get_resumen(('estado',), desde, hasta, id_medico)
+        return {fila['estado']: fila['total'] for fila in filas}
+    
+    def get_totales_por_medico(self, desde: Optional[str] = None,
+                               hasta: Optional[str] = None) -> Dict[int, Dict[str, int]]:
+        totales: Dict[int, Dict[str, int]] = {}
+        for fila in self.repository.get_resumen(('id_medico', 'estado'), desde, hasta):
+            totales.setdefault(fila['id_medico'], {})[fila['estado']] = fila['total']
+        return totales
+    
+    def generar_reportes(self, desde: Optional[str] = None, hasta: Optional[str] = None,
+                         por: str = 'especialidad') -> Dict[str, Tabla]:
+        historial = HistorialCitas.cargar(self.repository.db_config, desde, hasta)
+        plantillas = self._buscador_huecos().plantillas(sorted(historial.nombres_medico))
+        return resumen_periodo(historial, plantillas, por)
+    
+    def generar_reportes_async(self, callback: Callable[[Dict[str, Tabla]], None], desde: Optional[str] = None,
+                               hasta: Optional[str] = None, por: str = 'especialidad', on_error=None) -> Future:
+        return self.ejecutar(self.generar_reportes, desde, hasta, por, clave='reportes',
+                             descartar_anteriores=True, callback=callback, on_error=on_error)
+    
+    def get_citas_pagina(self, offset: int = 0, limit: int = 100,
+                         after: Optional[Tuple[str, str, int]] = None, **filtros) -> List[Cita]:
+        if after is not None:
+            return self.repository.get_page(after=after, limit=limit, **filtros)
+        return self.repository.get_page(limit=limit, offset=offset, **filtros)
+    
     def get_cita_by_id(self, id_cita: int) -> Optional[Cita]:
         return self.repository.get_by_id(id_cita)
     
@@ -48,90 +197,202 @@ class CitaViewModel(Observer):
             return self.medico_repo.get_all()
         return []
     
-    def agregar_cita(self, id_paciente: int, id_medico: int, fecha: str, 
+    def get_all_citas_async(self, callback: Callable[[List[Cita]], None], on_error=None) -> Future:
+        return self.ejecutar(self.get_all_citas, clave='listado_citas', descartar_anteriores=True,
+                             callback=callback, on_error=on_error)
+    
+    def get_lote_citas_async(self, callback: Callable[[CitaBatch], None], on_error=None) -> Future:
+        return self.ejecutar(self.get_lote_citas, clave='listado_citas', descartar_anteriores=True,
+                             callback=callback, on_error=on_error)
+    
+    def get_cita_by_id_async(self, id_cita: int, callback: Callable[[Optional[Cita]], None],
+                             on_error=None) -> Future:
+        return self.ejecutar(self.get_cita_by_id, id_cita, clave='seleccion_cita',
+                             descartar_anteriores=True, callback=callback, on_error=on_error)
+    
+    def get_all_medicos_async(self, callback: Callable[[list], None], on_error=None) -> Future:
+        return self.ejecutar(self.get_all_medicos, clave='listado_medicos', descartar_anteriores=True,
+                             callback=callback, on_error=on_error)
+    
+    def _buscador_huecos(self) -> BuscadorHuecos:
+        if self.buscador is None:
+            self.buscador = BuscadorHuecos(self.repository.db_config)
+        return self.buscador
+    
+    def _buscar_huecos(self, ids_medicos: List[int], desde, hasta, n: int) -> List[Hueco]:
+        ahora = datetime.now()
+        desde = a_fecha(desde) if desde else ahora.date()
+        hasta = a_fecha(hasta) if hasta else max(desde, ahora.date()) + timedelta(days=DIAS_BUSQUEDA_HUECOS)
+        huecos = self._buscador_huecos().buscar(ids_medicos, desde, hasta, n, despues=ahora)
+        if self.medico_repo:
+            medicos = {id_medico: self.medico_repo.get_by_id(id_medico) for id_medico in {h.id_medico for h in huecos}}
+            for hueco in huecos:
+                medico = medicos.get(hueco.id_medico)
+                if medico:
+                    hueco.nombre_medico = medico.nombre_completo
+                    hueco.especialidad = medico.especialidad
+        return huecos
+    
+    def buscar_huecos(self, id_medico: int, desde=None, hasta=None, n: int = 10) -> List[Hueco]:
+        return self._buscar_huecos([id_medico], desde, hasta, n)
+    
+    def buscar_huecos_especialidad(self, especialidad: str, desde=None, hasta=None, n: int = 10) -> List[Hueco]:
+        clave = normalizar_nombre(especialidad)
+        ids = [m.id_medico for m in self.get_all_medicos() if normalizar_nombre(m.especialidad or '') == clave]
+        return self._buscar_huecos(ids, desde, hasta, n)
+    
+    def buscar_huecos_async(self, id_medico: int, callback: Callable[[List[Hueco]], None],
+                            desde=None, hasta=None, n: int = 10, on_error=None) -> Future:
+        return self.ejecutar(self.buscar_huecos, id_medico, desde, hasta, n, clave='busqueda_huecos',
+                             descartar_anteriores=True, callback=callback, on_error=on_error)
+    
+    def buscar_huecos_especialidad_async(self, especialidad: str, callback: Callable[[List[Hueco]], None],
+                                         desde=None, hasta=None, n: int = 10, on_error=None) -> Future:
+        return self.ejecutar(self.buscar_huecos_especialidad, especialidad, desde, hasta, n,
+                             clave='busqueda_huecos', descartar_anteriores=True,
+                             callback=callback, on_error=on_error)
+    
+    def obtener_o_crear_paciente(self, nombre: str) -> Optional[int]:
+        if not self.paciente_repo:
+            return None
+        paciente = self.paciente_repo.get_or_create(nombre)
+        return paciente.id_paciente if paciente else None
+    
+    def agendar_cita(self, nombre_paciente: str, id_medico: int, fecha: str,
                      hora: str, estado: str = 'Programada') -> tuple[bool, str]:
-        if not id_paciente:
-            return False, "Debe seleccionar un paciente"
+        resultado = self.crear_cita(None, id_medico, fecha, hora, estado, nombre_paciente=nombre_paciente)
+        return resultado.exito, resultado.mensaje
+    
+    def reprogramar_cita(self, id_cita: int, nombre_paciente: str, id_medico: int,
+                         fecha: str, hora: str, estado: str) -> tuple[bool, str]:
+        resultado = self.modificar_cita(id_cita, None, id_medico, fecha, hora, estado,
+                                        nombre_paciente=nombre_paciente)
+        return resultado.exito, resultado.mensaje
+    
+    def agendar_cita_async(self, nombre_paciente: str, id_medico: int, fecha: str, hora: str,
+                           estado: str = 'Programada', callback=None, on_error=None) -> Future:
+        return self.ejecutar(self.agendar_cita, nombre_paciente, id_medico, fecha, hora, estado,
+                             clave=('paciente', normalizar_nombre(nombre_paciente)),
+                             callback=callback, on_error=on_error)
+    
+    def reprogramar_cita_async(self, id_cita: int, nombre_paciente: str, id_medico: int,
+                               fecha: str, hora: str, estado: str,
+                               callback=None, on_error=None) -> Future:
+        return self.ejecutar(self.reprogramar_cita, id_cita, nombre_paciente, id_medico, fecha, hora, estado,
+                             clave=('cita', id_cita), callback=callback, on_error=on_error)
+    
+    def actualizar_cita_async(self, id_cita: int, id_paciente: int, id_medico: int,
+                              fecha: str, hora: str, estado: str,
+                              callback=None, on_error=None) -> Future:
+        return self.ejecutar(self.actualizar_cita, id_cita, id_paciente, id_medico, fecha, hora, estado,
+                             clave=('cita', id_cita), callback=callback, on_error=on_error)
+    
+    def eliminar_cita_async(self, id_cita: int, callback=None, on_error=None) -> Future:
+        return self.ejecutar(self.eliminar_cita, id_cita, clave=('cita', id_cita),
+                             callback=callback, on_error=on_error)
+    
+    def cancelar_cita_async(self, id_cita: int, callback=None, on_error=None) -> Future:
+        return self.ejecutar(self.cancelar_cita, id_cita, clave=('cita', id_cita),
+                             callback=callback, on_error=on_error)
+    
+    def _validar_datos(self, id_paciente: int, id_medico: int, fecha: str, hora: str,
+                       estado: str = 'Programada',
+                       nombre_paciente: str = None) -> Tuple[Optional[ResultadoCita], Optional[Cita]]:
+        if not id_paciente and not nombre_paciente:
+            return ResultadoCita(False, "Debe seleccionar un paciente", codigo='invalida'), None
         
         if not id_medico:
-            return False, "Debe seleccionar un médico"
+            return ResultadoCita(False, "Debe seleccionar un médico", codigo='invalida'), None
         
-        if self.paciente_repo:
+        paciente = medico = None
+        if id_paciente and self.paciente_repo:
             paciente = self.paciente_repo.get_by_id(id_paciente)
             if not paciente:
-                return False, "El paciente seleccionado no existe"
+                return ResultadoCita(False, "El paciente seleccionado no existe", codigo='invalida'), None
         
         if self.medico_repo:
             medico = self.medico_repo.get_by_id(id_medico)
             if not medico:
-                return False, "El médico seleccionado no existe"
+                return ResultadoCita(False, "El médico seleccionado no existe", codigo='invalida'), None
         
         try:
-            datetime.strptime(fecha, "%Y-%m-%d")
-        except ValueError:
-            return False, "Formato de fecha inválido. Use YYYY-MM-DD"
+            fecha = datetime.strptime(fecha, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except (TypeError, ValueError):
+            return ResultadoCita(False, "Formato de fecha inválido. Use YYYY-MM-DD", codigo='invalida'), None
         
         try:
-            datetime.strptime(hora, "%H:%M")
-        except ValueError:
-            return False, "Formato de hora inválido. Use HH:MM"
+            hora = datetime.strptime(hora, "%H:%M").strftime("%H:%M")
+        except (TypeError, ValueError):
+            return ResultadoCita(False, "Formato de hora inválido. Use HH:MM", codigo='invalida'), None
         
-        nueva_cita = Cita(id_paciente, id_medico, fecha, hora, estado)
+        if estado not in Cita.ESTADOS:
+            return ResultadoCita(False, f"Estado inválido. Use {', '.join(Cita.ESTADOS)}",
+                                 codigo='invalida'), None
+        
+        if not id_paciente:
+            paciente = self.paciente_repo.get_or_create(nombre_paciente) if self.paciente_repo else None
+            if not paciente:
+                return ResultadoCita(False, "No se pudo crear el paciente", codigo='error'), None
+            id_paciente = paciente.id_paciente
+        
+        return None, Cita(id_paciente, id_medico, fecha, hora, estado,
+                          nombre_paciente=paciente.nombre_completo if paciente else None,
+                          nombre_medico=medico.nombre_completo if medico else None)
+    
+    def crear_cita(self, id_paciente: int, id_medico: int, fecha: str, hora: str,
+                   estado: str = 'Programada', nombre_paciente: str = None) -> ResultadoCita:
+        error, nueva_cita = self._validar_datos(id_paciente, id_medico, fecha, hora, estado, nombre_paciente)
+        if error:
+            return error
         
         resultado = self.repository.add(nueva_cita)
         if resultado is True:
             id_cita = nueva_cita.id_cita or "nueva"
-            return True, f"Cita #{id_cita} agregada exitosamente"
+            return ResultadoCita(True, f"Cita #{id_cita} agregada exitosamente", nueva_cita)
         elif resultado == "medico_ocupado":
-            return False, "El médico ya tiene una cita programada a esa fecha y hora"
+            return ResultadoCita(False, "El médico ya tiene una cita programada a esa fecha y hora",
+                                 codigo=resultado)
         elif resultado == "paciente_ocupado":
-            return False, "El paciente ya tiene una cita programada a esa fecha y hora"
+            return ResultadoCita(False, "El paciente ya tiene una cita programada a esa fecha y hora",
+                                 codigo=resultado)
         else:
-            return False, "No se pudo agregar la cita. Verifique que no haya duplicados"
+            return ResultadoCita(False, "No se pudo agregar la cita. Verifique que no haya duplicados",
+                                 codigo='error')
     
-    def actualizar_cita(self, id_cita: int, id_paciente: int, id_medico: int,
-                        fecha: str, hora: str, estado: str) -> tuple[bool, str]:
+    def agregar_cita(self, id_paciente: int, id_medico: int, fecha: str, 
+                     hora: str, estado: str = 'Programada') -> tuple[bool, str]:
+        resultado = self.crear_cita(id_paciente, id_medico, fecha, hora, estado)
+        return resultado.exito, resultado.mensaje
+    
+    def modificar_cita(self, id_cita: int, id_paciente: int, id_medico: int, fecha: str,
+                       hora: str, estado: str, nombre_paciente: str = None) -> ResultadoCita:
         cita_existente = self.repository.get_by_id(id_cita)
         if not cita_existente:
-            return False, "La cita no existe"
-        
-        if not id_paciente:
-            return False, "Debe seleccionar un paciente"
-        
-        if not id_medico:
-            return False, "Debe seleccionar un médico"
-        
-        if self.paciente_repo:
-            paciente = self.paciente_repo.get_by_id(id_paciente)
-            if not paciente:
-                return False, "El paciente seleccionado no existe"
-        
-        if self.medico_repo:
-            medico = self.medico_repo.get_by_id(id_medico)
-            if not medico:
-                return False, "El médico seleccionado no existe"
-        
-        try:
-            datetime.strptime(fecha, "%Y-%m-%d")
-        except ValueError:
-            return False, "Formato de fecha inválido. Use YYYY-MM-DD"
+            return ResultadoCita(False, "La cita no existe", codigo='no_encontrada')
         
-        try:
-            datetime.strptime(hora, "%H:%M")
-        except ValueError:
-            return False, "Formato de hora inválido. Use HH:MM"
-        
-        cita_actualizada = Cita(id_paciente, id_medico, fecha, hora, estado, id_cita=id_cita)
+        error, cita_actualizada = self._validar_datos(id_paciente, id_medico, fecha, hora, estado,
+                                                      nombre_paciente)
+        if error:
+            return error
+        cita_actualizada.id_cita = id_cita
         
         resultado = self.repository.update(id_cita, cita_actualizada)
         if resultado is True:
-            return True, f"Cita #{id_cita} actualizada exitosamente"
+            return ResultadoCita(True, f"Cita #{id_cita} actualizada exitosamente", cita_actualizada)
         elif resultado == "medico_ocupado":
-            return False, "El médico ya tiene otra cita programada a esa fecha y hora"
+            return ResultadoCita(False, "El médico ya tiene otra cita programada a esa fecha y hora",
+                                 codigo=resultado)
         elif resultado == "paciente_ocupado":
-            return False, "El paciente ya tiene otra cita programada a esa fecha y hora"
+            return ResultadoCita(False, "El paciente ya tiene otra cita programada a esa fecha y hora",
+                                 codigo=resultado)
         else:
-            return False, "No se pudo actualizar la cita. Verifique que no haya duplicados"
+            return ResultadoCita(False, "No se pudo actualizar la cita. Verifique que no haya duplicados",
+                                 codigo='error')
+    
+    def actualizar_cita(self, id_cita: int, id_paciente: int, id_medico: int,
+                        fecha: str, hora: str, estado: str) -> tuple[bool, str]:
+        resultado = self.modificar_cita(id_cita, id_paciente, id_medico, fecha, hora, estado)
+        return resultado.exito, resultado.mensaje
     
     def eliminar_cita(self, id_cita: int) -> tuple[bool, str]:
         if self.repository.delete(id_cita):
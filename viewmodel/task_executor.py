@@ -0,0 +1,129 @@
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+
+class TaskExecutor:
+    def __init__(self, max_workers: int = 4, poll_interval: int = 30):
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='citas-db')
+        self._pendientes_ui: queue.SimpleQueue = queue.SimpleQueue()
+        self._colas: Dict[Hashable, Deque[Tuple]] = {}
+        self._activas: Set[Hashable] = set()
+        self._generaciones: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._root = None
+        self._ui_thread = threading.get_ident()
+        self._cerrado = False
+    
+    def bind(self, root):
+        self._root = root
+        self._ui_thread = threading.get_ident()
+        self._root.after(self.poll_interval, self._procesar_ui)
+    
+    def en_hilo_ui(self) -> bool:
+        return self._root is None or threading.get_ident() == self._ui_thread
+    
+    def llamar_en_ui(self, fn: Callable, *args):
+        if self.en_hilo_ui():
+            fn(*args)
+        else:
+            self._pendientes_ui.put((fn, args))
+    
+    def _procesar_ui(self):
+        while True:
+            try:
+                fn, args = self._pendientes_ui.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error procesando resultado en la interfaz: {e}")
+        if not self._cerrado:
+            self._root.after(self.poll_interval, self._procesar_ui)
+    
+    def submit(self, fn: Callable, *args,
+               clave: Optional[Hashable] = None,
+               descartar_anteriores: bool = False,
+               callback: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> Future:
+        future = Future()
+        with self._lock:
+            if self._cerrado:
+                raise RuntimeError("El ejecutor de tareas está cerrado")
+            if clave is None:
+                self._pool.submit(self._ejecutar, None, (future, fn, args, callback, on_error, 0))
+                return future
+            if descartar_anteriores:
+                self._descartar(clave)
+            tarea = (future, fn, args, callback, on_error, self._generaciones.get(clave, 0))
+            if clave in self._activas:
+                self._colas.setdefault(clave, deque()).append(tarea)
+            else:
+                self._activas.add(clave)
+                self._pool.submit(self._ejecutar, clave, tarea)
+        return future
+    
+    def cancelar(self, clave: Hashable):
+        with self._lock:
+            self._descartar(clave)
+    
+    def _descartar(self, clave: Hashable):
+        self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+        pendientes = self._colas.pop(clave, None)
+        if pendientes:
+            for tarea in pendientes:
+                tarea[0].cancel()
+    
+    def _ejecutar(self, clave: Optional[Hashable], tarea: Tuple):
+        future, fn, args, callback, on_error, generacion = tarea
+        try:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                resultado = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+                self._entregar(clave, generacion, on_error or self._error_por_defecto, e)
+            else:
+                future.set_result(resultado)
+                if callback is not None:
+                    self._entregar(clave, generacion, callback, resultado)
+        finally:
+            if clave is not None:
+                self._siguiente(clave)
+    
+    def _siguiente(self, clave: Hashable):
+        with self._lock:
+            pendientes = self._colas.get(clave)
+            if pendientes and not self._cerrado:
+                self._pool.submit(self._ejecutar, clave, pendientes.popleft())
+                if not pendientes:
+                    del self._colas[clave]
+            else:
+                self._colas.pop(clave, None)
+                self._activas.discard(clave)
+    
+    def _entregar(self, clave: Optional[Hashable], generacion: int, fn: Callable, valor):
+        self.llamar_en_ui(self._entregar_si_vigente, clave, generacion, fn, valor)
+    
+    def _entregar_si_vigente(self, clave: Optional[Hashable], generacion: int, fn: Callable, valor):
+        if clave is not None and self._generaciones.get(clave, 0) != generacion:
+            return
+        fn(valor)
+    
+    @staticmethod
+    def _error_por_defecto(error: BaseException):
+        print(f"Error en tarea en segundo plano: {error}")
+    
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            self._cerrado = True
+            for pendientes in self._colas.values():
+                for tarea in pendientes:
+                    tarea[0].cancel()
+            self._colas.clear()
+        self._pool.shutdown(wait=wait, cancel_futures=True)